@@ -1,7 +1,7 @@
 from django.contrib import admin
 
-# Common app doesn't have models yet, but this file is here for future use
-# You can register any common models here when you add them
+from .models import StoredBlob
+
 
 class CommonAdmin(admin.ModelAdmin):
     """
@@ -14,4 +14,11 @@ class CommonAdmin(admin.ModelAdmin):
         readonly_fields = super().get_readonly_fields(request, obj)
         if obj:  # editing an existing object
             return readonly_fields + ('created_at',) if hasattr(obj, 'created_at') else readonly_fields
-        return readonly_fields
\ No newline at end of file
+        return readonly_fields
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(CommonAdmin):
+    list_display = ('name', 'size', 'refcount', 'created_at', 'updated_at')
+    list_filter = ('created_at',)
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'refcount', 'created_at', 'updated_at')
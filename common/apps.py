@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'common'
+
+    def ready(self):
+        from . import stats, storage, thumbnails
+        stats.mark_process_started()
+        storage.connect_signals()
+        thumbnails.connect_signals()
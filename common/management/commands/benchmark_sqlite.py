@@ -0,0 +1,166 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+BACKENDS = {
+    'stock': 'django.db.backends.sqlite3',
+    'tuned': 'common.backends.sqlite3',
+}
+
+SCHEMA = [
+    'CREATE TABLE bench_job (id INTEGER PRIMARY KEY, title TEXT NOT NULL, application_count INTEGER NOT NULL)',
+    'CREATE TABLE bench_application (id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL, applicant_id INTEGER NOT NULL, '
+    'status TEXT NOT NULL, cover_letter TEXT NOT NULL, updated REAL NOT NULL)',
+    'CREATE INDEX bench_application_job ON bench_application (job_id, status)',
+]
+
+
+class Command(BaseCommand):
+    help = ('Measure read/write throughput and "database is locked" errors of the stock and tuned '
+            'SQLite backends under concurrent threads, each on a scratch copy of a small schema')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Threads listing applications.')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Threads applying and updating statuses, like apply_job and the status views.')
+        parser.add_argument('--seconds', type=float, default=5, help='How long each backend runs.')
+        parser.add_argument('--jobs', type=int, default=50)
+        parser.add_argument('--applications', type=int, default=5000)
+        parser.add_argument('--backend', choices=sorted(BACKENDS), action='append',
+                            help='Only run this backend (repeatable). Default: all.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        results = [self.run(label) for label in options['backend'] or sorted(BACKENDS)]
+        self.stdout.write('%-6s %10s %10s %8s %8s %10s %10s' % (
+            'backend', 'reads/s', 'writes/s', 'locked', 'locked%', 'p95 read', 'p95 write',
+        ))
+        for result in results:
+            attempts = result['writes'] + result['reads'] + result['locked']
+            self.stdout.write('%-6s %10.0f %10.0f %8d %7.2f%% %8.1fms %8.1fms' % (
+                result['label'], result['reads'] / options['seconds'], result['writes'] / options['seconds'],
+                result['locked'], 100.0 * result['locked'] / max(attempts, 1),
+                result['p95_read'], result['p95_write'],
+            ))
+
+    def run(self, label):
+        options = self.options
+        directory = tempfile.mkdtemp(prefix='benchmark_sqlite_')
+        alias = 'benchmark_%s' % label
+        settings_dict = dict(connections['default'].settings_dict)
+        settings_dict.update({
+            'ENGINE': BACKENDS[label], 'NAME': os.path.join(directory, 'bench.sqlite3'),
+            'OPTIONS': {}, 'CONN_MAX_AGE': None,
+        })
+        connections.settings[alias] = settings_dict
+        try:
+            self.populate(alias)
+            stats = {'reads': 0, 'writes': 0, 'locked': 0, 'read_times': [], 'write_times': []}
+            lock = threading.Lock()
+            deadline = time.monotonic() + options['seconds']
+            threads = [
+                threading.Thread(target=self.worker, args=(alias, kind, deadline, stats, lock))
+                for kind, count in (('read', options['readers']), ('write', options['writers']))
+                for _ in range(count)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            del connections.settings[alias]
+            shutil.rmtree(directory, ignore_errors=True)
+        return {
+            'label': label, 'reads': stats['reads'], 'writes': stats['writes'], 'locked': stats['locked'],
+            'p95_read': percentile(stats['read_times']), 'p95_write': percentile(stats['write_times']),
+        }
+
+    def populate(self, alias):
+        options = self.options
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.executemany('INSERT INTO bench_job (id, title, application_count) VALUES (%s, %s, 0)', [
+                (job_id, 'Job %d' % job_id) for job_id in range(1, options['jobs'] + 1)
+            ])
+            cursor.executemany(
+                'INSERT INTO bench_application (job_id, applicant_id, status, cover_letter, updated) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [(random.randint(1, options['jobs']), n, 'submitted', 'x' * 500, time.time())
+                 for n in range(options['applications'])],
+            )
+        connection.close()
+
+    def worker(self, alias, kind, deadline, stats, lock):
+        connection = connections[alias]
+        reads = writes = locked = 0
+        times = []
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == 'read':
+                        self.read(connection)
+                        reads += 1
+                    else:
+                        self.write(alias, connection)
+                        writes += 1
+                except OperationalError as e:
+                    if 'locked' not in str(e) and 'busy' not in str(e):
+                        raise
+                    locked += 1
+                    continue
+                times.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+        with lock:
+            stats['reads'] += reads
+            stats['writes'] += writes
+            stats['locked'] += locked
+            stats['%s_times' % kind].extend(times)
+
+    def read(self, connection):
+        # The applicant list: a page of one job's applications plus its status counts
+        job_id = random.randint(1, self.options['jobs'])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id, applicant_id, status, substr(cover_letter, 1, 300) FROM bench_application '
+                'WHERE job_id = %s ORDER BY id DESC LIMIT 20', [job_id],
+            )
+            cursor.fetchall()
+            cursor.execute('SELECT status, COUNT(*) FROM bench_application WHERE job_id = %s GROUP BY status', [job_id])
+            cursor.fetchall()
+
+    def write(self, alias, connection):
+        # Read-then-write transactions, the shape that needs a lock upgrade under BEGIN DEFERRED
+        job_id = random.randint(1, self.options['jobs'])
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute('SELECT application_count FROM bench_job WHERE id = %s', [job_id])
+            cursor.fetchone()
+            if random.random() < 0.5:
+                cursor.execute(
+                    'INSERT INTO bench_application (job_id, applicant_id, status, cover_letter, updated) '
+                    'VALUES (%s, %s, %s, %s, %s)', [job_id, random.randint(1, 10 ** 6), 'submitted', 'x' * 500, time.time()],
+                )
+                cursor.execute('UPDATE bench_job SET application_count = application_count + 1 WHERE id = %s', [job_id])
+            else:
+                cursor.execute(
+                    'UPDATE bench_application SET status = %s, updated = %s WHERE id IN '
+                    '(SELECT id FROM bench_application WHERE job_id = %s LIMIT 5)',
+                    [random.choice(['under_review', 'shortlisted', 'rejected']), time.time(), job_id],
+                )
+
+
+def percentile(values, fraction=0.95):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
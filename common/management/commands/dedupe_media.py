@@ -0,0 +1,64 @@
+import hashlib
+import os
+
+from django.core.files.storage import default_storage, storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from common import storage
+
+
+class Command(BaseCommand):
+    help = 'Move uploads stored before content addressing into the blob layout, storing identical files once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the savings without moving anything.')
+
+    def handle(self, *args, **options):
+        if not isinstance(storages['default'], storage.ContentAddressedStorage):
+            raise CommandError('The default storage is not common.storage.ContentAddressedStorage.')
+
+        moved = {}
+        rows = missing = 0
+        for model, names in storage.tracked_fields().items():
+            for name in names:
+                legacy = (
+                    model._default_manager.exclude(**{name: ''}).exclude(**{name + '__isnull': True})
+                    .exclude(**{name + '__startswith': storage.BLOB_DIR + '/'})
+                    .values_list('pk', name)
+                )
+                for pk, old in legacy.iterator():
+                    if old not in moved:
+                        if not default_storage.exists(old):
+                            self.stderr.write(self.style.WARNING(f'{model._meta.label} {pk}: {old} is missing'))
+                            missing += 1
+                            continue
+                        moved[old] = self.store(old, options['dry_run'])
+                    if not options['dry_run']:
+                        # update(), not save(): refcounts are rebuilt in one pass below
+                        model._default_manager.filter(pk=pk).update(**{name: moved[old]})
+                    rows += 1
+
+        legacy_bytes = sum(default_storage.size(old) for old in moved)
+        unique = {new: default_storage.size(old) for old, new in moved.items()}
+        if not options['dry_run']:
+            for old in moved:
+                default_storage.delete(old)
+            with transaction.atomic():
+                storage.recount()
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(moved)} files referenced by {rows} rows into {len(unique)} blobs, '
+            f'saving {legacy_bytes - sum(unique.values())} bytes ({missing} missing).'
+        ))
+
+    @staticmethod
+    def store(name, dry_run):
+        with default_storage.open(name) as content:
+            if not dry_run:
+                return default_storage.save(name, content)
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+        return storage.blob_name(digest.hexdigest(), os.path.splitext(name)[1])
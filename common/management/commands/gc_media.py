@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from common import storage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored uploads that no file field has referenced for the grace period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=storage.GRACE_PERIOD.total_seconds() / 3600,
+                            help='Keep unreferenced blobs at least this long (uploads are stored before their row).')
+        parser.add_argument('--recount', action='store_true',
+                            help='Rebuild reference counts from the file fields first.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = storage.recount()
+            self.stdout.write(f'Recounted references; {fixed} blob{"s" if fixed != 1 else ""} corrected.')
+        deleted, freed = storage.collect_garbage(
+            grace=timedelta(hours=options['grace_hours']), dry_run=options['dry_run'],
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} unreferenced blob{"s" if deleted != 1 else ""}, freeing {freed} bytes.'
+        ))
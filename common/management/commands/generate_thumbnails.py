@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from common import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Generate every thumbnail variant of uploaded logos and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Delete all existing variants first (after changing THUMBNAIL_SIZES or quality).')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            thumbnails.purge_all()
+        names = set()
+        for model, fields in thumbnails.image_fields().items():
+            for field in fields:
+                names.update(
+                    model._default_manager.exclude(**{field: ''}).exclude(**{field + '__isnull': True})
+                    .values_list(field, flat=True).distinct()
+                )
+        variants = failed = 0
+        for name in sorted(names):
+            try:
+                variants += thumbnails.generate(name)
+            except thumbnails.ThumbnailError as e:
+                failed += 1
+                self.stderr.write(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'{variants} variants current for {len(names) - failed} images; {failed} failed.'
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from common import sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=sessions.CLEAR_BATCH_SIZE,
+                            help='Sessions deleted per statement.')
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Keep running and prune every SECONDS instead of once.')
+
+    def handle(self, *args, **options):
+        store = import_string(settings.SESSION_ENGINE + '.SessionStore')
+        if not issubclass(store, sessions.SessionStore):
+            raise CommandError(f'SESSION_ENGINE is {settings.SESSION_ENGINE}; use clearsessions instead.')
+        while True:
+            started = time.monotonic()
+            deleted = store.clear_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {deleted} expired session{"s" if deleted != 1 else ""} '
+                f'in {time.monotonic() - started:.2f}s.'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['loop'])
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections
+
+from common import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin dashboard statistics snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Keep running and refresh every SECONDS instead of once.')
+
+    def handle(self, *args, **options):
+        while True:
+            snapshot = stats.refresh(options['database'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Refreshed dashboard statistics in {snapshot.duration_ms} ms.'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['loop'])
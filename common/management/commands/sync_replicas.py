@@ -0,0 +1,42 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+from common.replicas import replica_aliases
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into each READ_REPLICAS file, standing in for replication locally'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Keep running and copy every SECONDS, so replicas lag by about that much.')
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('No replicas configured; set DATABASE_REPLICAS to one or more file paths.')
+        for alias in [DEFAULT_DB_ALIAS] + aliases:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias} is not SQLite; use the database\'s own replication.')
+        while True:
+            started = time.monotonic()
+            primary = connections[DEFAULT_DB_ALIAS]
+            primary.ensure_connection()
+            for alias in aliases:
+                # The backup API copies a consistent snapshot while the primary stays writable
+                replica = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    primary.connection.backup(replica)
+                finally:
+                    replica.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'Copied the primary into {len(aliases)} replica{"s" if len(aliases) != 1 else ""} '
+                f'in {time.monotonic() - started:.2f}s.'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['loop'])
@@ -0,0 +1,204 @@
+"""
+Serving uploaded files.
+
+Every upload is reached through the serve_media view, in development and
+production alike, so resumes are only ever sent to someone allowed to read
+them: the applicant, the employer who posted the job, or staff. Images
+(logos, profile pictures) are public. A file is found through the model
+fields that reference it, never by probing the filesystem, so nothing else
+under MEDIA_ROOT can be requested.
+
+Once access is settled the bytes are handed off. With MEDIA_SENDFILE set to
+'x-sendfile' (Apache mod_xsendfile, lighttpd) or 'x-accel-redirect' (nginx,
+with an internal location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) the
+front-end server sends the file and handles Range itself. Otherwise Django
+answers with a FileResponse over the open file, which WSGI servers with
+wsgi.file_wrapper send with sendfile(2), and serves single byte ranges and
+conditional requests itself so resumed downloads and PDF viewers work.
+Blob names contain the content hash (see common/storage.py), which makes a
+strong ETag and lets public images be cached indefinitely.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .storage import is_blob, tracked_fields
+
+PUBLIC = 'public'
+PRIVATE = 'private'
+FORBIDDEN = 'forbidden'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+INLINE_TYPES = ('image/', 'application/pdf')
+
+
+def _application_resume(user, rows):
+    return rows.filter(Q(applicant=user) | Q(job__employer=user))
+
+
+def _profile_resume(user, rows):
+    # Employers see the profile CV of anyone who applied to one of their jobs
+    return rows.filter(Q(user=user) | Q(user__applications__job__employer=user))
+
+
+# (model label, field): narrows rows referencing a file to those the user may read.
+# Tracked file fields not listed here are public.
+ACCESS_RULES = {
+    ('jobs.Application', 'resume'): _application_resume,
+    ('users.JobSeekerProfile', 'resume'): _profile_resume,
+}
+
+
+def access(user, name):
+    """PUBLIC, PRIVATE (allowed), FORBIDDEN, or None when no row references name"""
+    private = []
+    for model, fields in tracked_fields().items():
+        for field in fields:
+            rows = model._default_manager.filter(**{field: name})
+            rule = ACCESS_RULES.get((model._meta.label, field))
+            if rule is None:
+                if rows.exists():
+                    return PUBLIC
+            else:
+                private.append((rule, rows))
+    if user.is_authenticated:
+        for rule, rows in private:
+            if (rows if user.is_staff else rule(user, rows)).exists():
+                return PRIVATE
+    if any(rows.exists() for rule, rows in private):
+        return FORBIDDEN
+    return None
+
+
+class FileRange:
+    """
+    One byte range of an open file. read() stops at the end of the range and
+    fileno() is kept, so servers using sendfile(2) send the range (from the
+    current offset, for Content-Length bytes) without copying it.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    The inclusive (start, end) of a single Range header, or None to send the
+    whole file (no header, or one this view does not split, such as several
+    ranges). Raises ValueError when the range lies outside the file.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def range_applies(request, etag, last_modified):
+    """An If-Range precondition that no longer matches means the client wants the whole new file"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def etag_for(name, stat):
+    if is_blob(name):
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (stat.st_size, stat.st_mtime_ns)
+
+
+def serve(request, name, private=True, immutable=None):
+    """
+    Send the stored file ``name`` (access already checked). Public files are
+    cached indefinitely when ``immutable``, which defaults to whether the name
+    is a content-hashed blob.
+    """
+    path = default_storage.path(name)
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    etag = etag_for(name, stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        mode = getattr(settings, 'MEDIA_SENDFILE', None)
+        if mode == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        elif mode == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + quote(name)
+        else:
+            response = _file_response(request, path, stat.st_size, content_type, etag, last_modified)
+        response['Content-Disposition'] = content_disposition_header(
+            not content_type.startswith(INLINE_TYPES), os.path.basename(name),
+        )
+        response['X-Content-Type-Options'] = 'nosniff'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if private:
+        # Browsers may keep a copy but must revalidate (a 304) on each use
+        response['Cache-Control'] = 'private, no-cache'
+    elif is_blob(name) if immutable is None else immutable:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def _file_response(request, path, size, content_type, etag, last_modified):
+    header = request.headers.get('Range') if range_applies(request, etag, last_modified) else None
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */%d' % size
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+    response['Accept-Ranges'] = 'bytes'
+    return response
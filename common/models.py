@@ -1,3 +1,30 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
+
+class DashboardSnapshot(models.Model):
+    """Precomputed site statistics, refreshed by common.stats"""
+    key = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} at {self.computed_at}"
+
+class StoredBlob(models.Model):
+    """A file in the content-addressed storage and how many file fields point at it (see common/storage.py)"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='blob_unreferenced_idx', condition=models.Q(refcount__lte=0)),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
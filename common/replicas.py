@@ -0,0 +1,198 @@
+"""
+Read replicas.
+
+Every alias named in READ_REPLICAS holds a copy of the primary ('default')
+database. ReplicaRouter sends ORM reads there only while a view decorated
+with @read_from_replica is running (the public job pages); everything else,
+and every write, uses the primary, so views that have not been looked at
+for staleness keep their current behaviour. Replicas are used round-robin,
+skipping any that failed a health check (a query against the migrations
+table) within the last REPLICA_HEALTH_CHECK_INTERVAL seconds.
+
+Replicas lag the primary, so a user who has just written must not be shown
+the old state. The first write of a request pins the rest of it to the
+primary, and replica_pin_middleware sets a cookie that keeps that browser's
+next REPLICA_PIN_SECONDS of requests there too. Sessions and users are
+always read from the primary (a fresh login must not vanish on a replica),
+so writing them pins nothing.
+
+job_list asks for the search backend of the alias its queryset was routed
+to, so keyword search there reads the replica's copy of the FTS index,
+which, like every other replicated table, is only as fresh as the last
+sync. Raw SQL on django.db.connection is not routed and stays on the
+primary.
+
+Locally, point DATABASE_REPLICAS at SQLite file paths and run manage.py
+sync_replicas to copy the primary into them.
+"""
+import contextvars
+import functools
+import itertools
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+
+PIN_COOKIE = 'primary_pin'
+PIN_SECONDS = 10
+HEALTH_CHECK_INTERVAL = 15
+PRIMARY_ONLY_APPS = {'sessions', 'users', 'auth', 'contenttypes'}
+
+# Per request: {'replica_reads': in a @read_from_replica view, 'pinned': reads must use
+# the primary, 'wrote': this request wrote, 'replica': the one it reads from}. A dict, so changes made in threads that
+# asgiref runs sync code on are seen by the middleware.
+_state = contextvars.ContextVar('replica_state', default=None)
+
+
+def _new_state(pinned=False):
+    return {'replica_reads': False, 'pinned': pinned, 'wrote': False}
+
+
+def replica_aliases():
+    return list(getattr(settings, 'READ_REPLICAS', []))
+
+
+class ReplicaHealth:
+    """Round-robin over the replicas that passed their latest health check"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+        self._turn = itertools.count()
+
+    def check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                # Not SELECT 1: connecting to a missing SQLite file creates an empty one
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+            return True
+        except DatabaseError:
+            connections[alias].close()
+            return False
+
+    def healthy(self, alias):
+        interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', HEALTH_CHECK_INTERVAL)
+        now = time.monotonic()
+        with self._lock:
+            state = self._checked.get(alias)
+        if state is None or now - state[1] > interval:
+            state = (self.check(alias), now)
+            with self._lock:
+                self._checked[alias] = state
+        return state[0]
+
+    def choose(self):
+        """The next healthy replica, or None when there is none"""
+        aliases = replica_aliases()
+        if not aliases:
+            return None
+        start = next(self._turn)
+        for offset in range(len(aliases)):
+            alias = aliases[(start + offset) % len(aliases)]
+            if self.healthy(alias):
+                return alias
+        return None
+
+
+health = ReplicaHealth()
+
+
+def pin_to_primary():
+    """Read from the primary for the rest of this request (and, via the middleware, the next few)"""
+    state = _state.get()
+    if state is not None:
+        state['pinned'] = state['wrote'] = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if not state or not state['replica_reads'] or state['pinned']:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # A transaction reads its own uncommitted rows
+            return None
+        if 'replica' not in state:
+            # One replica per request, so a count and its page agree
+            state['replica'] = health.choose()
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            # Session saves don't count: sessions are read from the primary anyway
+            pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own
+        return db not in replica_aliases()
+
+
+def read_from_replica(view):
+    """Let a read-mostly view's ORM queries go to a read replica"""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        token = _state.set(_new_state()) if state is None else None
+        state = _state.get()
+        state['replica_reads'] = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state['replica_reads'] = False
+            if token is not None:
+                _state.reset(token)
+
+    return wrapper
+
+
+def _pin_state(request):
+    try:
+        pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    return _new_state(pinned=pinned_until > time.time())
+
+
+def _set_pin_cookie(state, response):
+    if state['wrote'] and replica_aliases():
+        seconds = getattr(settings, 'REPLICA_PIN_SECONDS', PIN_SECONDS)
+        response.set_cookie(PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
+    return response
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """Keeps a browser on the primary for a few seconds after it writes"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state = _pin_state(request)
+            token = _state.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                _state.reset(token)
+            return _set_pin_cookie(state, response)
+
+        markcoroutinefunction(middleware)
+    else:
+        def middleware(request):
+            state = _pin_state(request)
+            token = _state.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                _state.reset(token)
+            return _set_pin_cookie(state, response)
+
+    return middleware
@@ -0,0 +1,111 @@
+"""
+Database sessions that are not rewritten on every request.
+
+With SESSION_SAVE_EVERY_REQUEST the session cookie's expiry slides forward
+on each response, and the stock backends also UPDATE the session row every
+time just to move its expire_date. This engine keeps the sliding cookie but
+only writes the row when the session data changed or its stored expiry has
+fallen more than SESSION_REFRESH_INTERVAL behind the sliding one, so an
+active user costs one write per interval instead of one per page. The
+server-side expiry can therefore trail the cookie by up to that interval.
+
+Reads go through SESSION_CACHE_ALIAS first, caching the data with its stored
+expiry. A per-process cache cannot see another worker's writes, so entries
+are only trusted for SESSION_CACHE_TIMEOUT seconds; with a shared cache
+(Redis, memcached) that can be raised to the session lifetime.
+
+clear_expired() deletes in batches, so both clearsessions and the
+prune_sessions command leave the table available to requests meanwhile.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+logger = logging.getLogger('django.contrib.sessions')
+
+KEY_PREFIX = 'common.sessions'
+REFRESH_INTERVAL = 24 * 60 * 60
+CACHE_TIMEOUT = 300
+CLEAR_BATCH_SIZE = 1000
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._stored_expiry = None
+
+    def _cache_session(self, data, expiry):
+        self._stored_expiry = expiry
+        timeout = min(self.get_expiry_age(expiry=expiry), getattr(settings, 'SESSION_CACHE_TIMEOUT', CACHE_TIMEOUT))
+        try:
+            self._cache.set(self.cache_key, (data, expiry), timeout)
+        except Exception:
+            logger.exception('Error saving to cache (%s)', self._cache)
+
+    def load(self):
+        try:
+            cached = self._cache.get(self.cache_key)
+        except Exception:
+            # Some backends reject odd keys; fall back to the database
+            cached = None
+        if cached is not None and cached[1] > timezone.now():
+            self._stored_expiry = cached[1]
+            return cached[0]
+        session = self._get_session_from_db()
+        if session is None:
+            self._stored_expiry = None
+            return {}
+        data = self.decode(session.session_data)
+        self._cache_session(data, session.expire_date)
+        return data
+
+    def needs_save(self):
+        """Whether save() has anything to write: changed data or an expiry refresh that is due"""
+        if self.modified or self._stored_expiry is None:
+            return True
+        remaining = (self._stored_expiry - timezone.now()).total_seconds()
+        interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', REFRESH_INTERVAL)
+        return remaining < self.get_expiry_age() - interval
+
+    def create_model_instance(self, data):
+        instance = super().create_model_instance(data)
+        self._saved_expiry = instance.expire_date
+        return instance
+
+    def save(self, must_create=False):
+        if self.session_key is not None and not must_create:
+            # Loads the session (from the cache) so its stored expiry is known
+            self._get_session()
+            if not self.needs_save():
+                return
+        # The database write only; the cache entry is replaced below with its expiry
+        DBStore.save(self, must_create)
+        self._cache_session(self._session, self._saved_expiry)
+
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    @classmethod
+    def clear_expired(cls, batch_size=CLEAR_BATCH_SIZE):
+        """Delete expired sessions ``batch_size`` at a time; returns how many"""
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now()).order_by('expire_date')
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
+
+    @classmethod
+    async def aclear_expired(cls):
+        return await sync_to_async(cls.clear_expired)()
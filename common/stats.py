@@ -0,0 +1,141 @@
+"""
+Site-wide statistics for the admin dashboard.
+
+compute() gathers everything in a handful of queries: one conditional
+aggregate per table instead of a count() per figure, one grouped query for
+the application status breakdown and one UNION ALL for the row counts of
+every table. The result is stored as a DashboardSnapshot row so every process
+shares it; get_snapshot() recomputes it only once it is older than
+ADMIN_DASHBOARD_STATS_TTL seconds, and the refresh_dashboard_stats command
+can keep it warm in the background so page loads never pay for it.
+"""
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, Q
+from django.utils import timezone
+
+SNAPSHOT_KEY = 'admin_dashboard'
+DEFAULT_TTL = 300
+
+# Set when the app registry is ready (see CommonConfig.ready)
+process_started = time.time()
+
+
+def mark_process_started():
+    global process_started
+    process_started = time.time()
+
+
+def uptime():
+    return timedelta(seconds=int(time.time() - process_started))
+
+
+def database_size(using=DEFAULT_DB_ALIAS):
+    """Size of the database in bytes, or None if the backend can't tell"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA page_count')
+            page_count = cursor.fetchone()[0]
+            cursor.execute('PRAGMA page_size')
+            size = page_count * cursor.fetchone()[0]
+            # Committed pages not yet checkpointed back into the main file
+            wal = '%s-wal' % connection.settings_dict['NAME']
+            return size + (os.path.getsize(wal) if os.path.exists(wal) else 0)
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_database_size(current_database())')
+            return cursor.fetchone()[0]
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT SUM(data_length + index_length) FROM information_schema.tables '
+                'WHERE table_schema = DATABASE()'
+            )
+            return int(cursor.fetchone()[0] or 0)
+    return None
+
+
+def table_row_counts(using=DEFAULT_DB_ALIAS):
+    """{table: rows} for every Django-managed table, in one UNION ALL query"""
+    connection = connections[using]
+    tables = sorted(connection.introspection.django_table_names(only_existing=True))
+    if not tables:
+        return {}
+    quote = connection.ops.quote_name
+    sql = ' UNION ALL '.join('SELECT %%s, COUNT(*) FROM %s' % quote(table) for table in tables)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, tables)
+        return dict(cursor.fetchall())
+
+
+def compute(using=DEFAULT_DB_ALIAS):
+    from jobs.models import Application, Company, Job
+
+    User = get_user_model()
+    now = timezone.now()
+    week_ago = now - timedelta(days=7)
+
+    users = User.objects.using(using).aggregate(
+        total_users=Count('id'),
+        job_seekers=Count('id', filter=Q(user_type='job_seeker')),
+        employers=Count('id', filter=Q(user_type='employer')),
+        admins=Count('id', filter=Q(user_type='admin')),
+        new_users_week=Count('id', filter=Q(date_joined__gte=week_ago)),
+    )
+    jobs = Job.objects.using(using).aggregate(
+        total_jobs=Count('id'),
+        active_jobs=Count('id', filter=Q(is_active=True)),
+        expired_jobs=Count('id', filter=Q(application_deadline__lt=now)),
+        new_jobs_week=Count('id', filter=Q(created_at__gte=week_ago)),
+    )
+    status_counts = dict(
+        Application.objects.using(using).order_by().values_list('status').annotate(count=Count('id'))
+    )
+    applications = Application.objects.using(using).aggregate(
+        new_applications_week=Count('id', filter=Q(applied_date__gte=week_ago)),
+    )
+    return {
+        **users,
+        **jobs,
+        **applications,
+        'total_applications': sum(status_counts.values()),
+        'total_companies': Company.objects.using(using).count(),
+        'application_status': [
+            {'status': status, 'count': status_counts[status]}
+            for status, _ in Application.STATUS_CHOICES if status_counts.get(status)
+        ],
+        'database_size': database_size(using),
+        'table_rows': table_row_counts(using),
+    }
+
+
+def refresh(using=DEFAULT_DB_ALIAS):
+    """Recompute and store the snapshot, returning it"""
+    from .models import DashboardSnapshot
+
+    started = time.monotonic()
+    data = compute(using)
+    snapshot, _ = DashboardSnapshot.objects.using(using).update_or_create(
+        key=SNAPSHOT_KEY,
+        defaults={
+            'data': data,
+            'computed_at': timezone.now(),
+            'duration_ms': int((time.monotonic() - started) * 1000),
+        },
+    )
+    return snapshot
+
+
+def get_snapshot(using=DEFAULT_DB_ALIAS):
+    """The stored snapshot, recomputed first if it is missing or older than the TTL"""
+    from .models import DashboardSnapshot
+
+    ttl = getattr(settings, 'ADMIN_DASHBOARD_STATS_TTL', DEFAULT_TTL)
+    snapshot = DashboardSnapshot.objects.using(using).filter(key=SNAPSHOT_KEY).first()
+    if snapshot is None or snapshot.computed_at < timezone.now() - timedelta(seconds=ttl):
+        snapshot = refresh(using)
+    return snapshot
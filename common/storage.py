@@ -0,0 +1,217 @@
+"""
+Content-addressed file storage.
+
+Every upload (resumes, profile pictures, logos) is streamed to a temporary
+file while its SHA-256 is computed, then moved to blobs/<aa>/<bb>/<sha256><ext>.
+Identical bytes therefore land on the same name and are stored once, however
+many applications attach the same CV, and the two-level shard keeps any one
+directory small.
+
+StoredBlob records each blob's size and how many model fields point at it.
+Signals connected in CommonConfig.ready() move the counts when a file field
+is saved with a different file or its row is deleted; a blob is only removed
+by gc_media, once nothing has referenced it for a grace period (an upload is
+stored before the row that points at it is saved). Updates that bypass
+signals let the counts drift, so gc_media --recount rebuilds them from the
+file fields first. dedupe_media moves files stored before this backend into
+the blob layout.
+"""
+import functools
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+BLOB_DIR = 'blobs'
+TMP_DIR = 'blobs/tmp'
+GRACE_PERIOD = timedelta(hours=24)
+
+
+def blob_name(digest, extension=''):
+    return '%s/%s/%s/%s%s' % (BLOB_DIR, digest[:2], digest[2:4], digest, extension.lower())
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/') and not name.startswith(TMP_DIR + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by the hash of their content"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save(), and an existing
+        # file with that name already holds the same bytes
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1]
+        os.makedirs(self.path(TMP_DIR), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=self.path(TMP_DIR))
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+                    size += len(chunk)
+            name = blob_name(digest.hexdigest(), extension)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                # Atomic on one filesystem: readers never see a partial blob
+                os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        register(name, size)
+        return name
+
+    def delete(self, name):
+        # Other rows may share the blob; gc_media removes it once unreferenced
+        if not is_blob(name):
+            super().delete(name)
+
+    def purge(self, name):
+        super().delete(name)
+
+
+def register(name, size):
+    from .models import StoredBlob
+
+    try:
+        with transaction.atomic():
+            StoredBlob.objects.get_or_create(name=name, defaults={'size': size})
+    except IntegrityError:
+        # Stored concurrently by another upload of the same bytes
+        pass
+
+
+def adjust(name, delta):
+    from .models import StoredBlob
+
+    if not is_blob(name):
+        return
+    blobs = StoredBlob.objects.filter(name=name)
+    # updated_at starts the grace period gc_media waits out once refcount reaches zero
+    if blobs.update(refcount=F('refcount') + delta, updated_at=timezone.now()) or delta < 0:
+        return
+    register(name, default_storage.size(name) if default_storage.exists(name) else 0)
+    blobs.update(refcount=F('refcount') + delta, updated_at=timezone.now())
+
+
+@functools.cache
+def tracked_fields():
+    """{model: [file field names]} for every field stored in the default storage"""
+    fields = {}
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage):
+                fields.setdefault(model, []).append(field.attname)
+    return fields
+
+
+def remember_stored_files(sender, instance, update_fields=None, raw=False, **kwargs):
+    names = tracked_fields().get(sender, [])
+    if update_fields is not None:
+        names = [name for name in names if name in update_fields]
+    instance._stored_files = {}
+    if raw or not names or instance._state.adding or instance.pk is None:
+        return
+    instance._stored_files = sender._default_manager.filter(pk=instance.pk).values(*names).first() or {}
+
+
+def update_references(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored_files', {})
+    names = stored.keys() if not created else tracked_fields().get(sender, [])
+    for name in names:
+        old = stored.get(name) or ''
+        new = getattr(instance, name).name or ''
+        if old != new:
+            adjust(old, -1)
+            adjust(new, 1)
+
+
+def release_references(sender, instance, **kwargs):
+    for name in tracked_fields().get(sender, []):
+        adjust(getattr(instance, name).name or '', -1)
+
+
+def connect_signals():
+    for model in tracked_fields():
+        pre_save.connect(remember_stored_files, sender=model, dispatch_uid='blob_refs_pre_%s' % model._meta.label)
+        post_save.connect(update_references, sender=model, dispatch_uid='blob_refs_post_%s' % model._meta.label)
+        post_delete.connect(release_references, sender=model, dispatch_uid='blob_refs_delete_%s' % model._meta.label)
+
+
+def recount():
+    """Rebuild every StoredBlob refcount from the file fields; returns the rows fixed"""
+    from .models import StoredBlob
+
+    actual = {}
+    for model, names in tracked_fields().items():
+        for name in names:
+            rows = model._default_manager.order_by().exclude(**{name: ''}).exclude(**{name + '__isnull': True})
+            for value, total in rows.values_list(name).annotate(total=Count('pk')):
+                actual[value] = actual.get(value, 0) + total
+    stale = []
+    with transaction.atomic():
+        for blob in StoredBlob.objects.all():
+            refcount = actual.pop(blob.name, 0)
+            if blob.refcount != refcount:
+                blob.refcount = refcount
+                blob.updated_at = timezone.now()
+                stale.append(blob)
+        StoredBlob.objects.bulk_update(stale, ['refcount', 'updated_at'], batch_size=500)
+        # Referenced blobs with no row (stored before tracking, or rows lost)
+        missing = [
+            StoredBlob(name=name, size=default_storage.size(name), refcount=refcount)
+            for name, refcount in actual.items() if is_blob(name) and default_storage.exists(name)
+        ]
+        StoredBlob.objects.bulk_create(missing)
+    return len(stale) + len(missing)
+
+
+def collect_garbage(grace=GRACE_PERIOD, dry_run=False):
+    """
+    Delete blobs nobody has referenced since before ``grace`` ago, plus
+    abandoned temporary uploads, along with their thumbnails. Returns (blobs deleted, bytes freed).
+    """
+    from . import thumbnails
+    from .models import StoredBlob
+
+    cutoff = timezone.now() - grace
+    unreferenced = StoredBlob.objects.filter(refcount__lte=0, updated_at__lt=cutoff)
+    deleted = freed = 0
+    for blob in unreferenced.iterator():
+        if not dry_run:
+            with transaction.atomic():
+                # Re-check: it may have been attached again since the query
+                if not StoredBlob.objects.filter(pk=blob.pk, refcount__lte=0).delete()[0]:
+                    continue
+                default_storage.purge(blob.name)
+                thumbnails.delete_variants(blob.name)
+        deleted += 1
+        freed += blob.size
+
+    temporary_dir = default_storage.path(TMP_DIR)
+    if os.path.isdir(temporary_dir):
+        for entry in os.scandir(temporary_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff.timestamp():
+                freed += entry.stat().st_size
+                if not dry_run:
+                    os.remove(entry.path)
+    return deleted, freed
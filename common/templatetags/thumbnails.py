@@ -0,0 +1,36 @@
+from django import template
+from django.forms.utils import flatatt
+from django.urls import reverse
+from django.utils.html import format_html
+
+from common import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail(image, size='small', **attrs):
+    """
+    A <picture> of an uploaded image scaled to ``size``: WebP where the
+    browser takes it, the fallback format otherwise, and the next size up
+    that is at least twice as large for high-density screens.
+    """
+    if not image:
+        return ''
+    boxes = thumbnails.sizes()
+    denser = [name for name, box in boxes.items() if box >= 2 * boxes[size]]
+    retina = min(denser, key=boxes.get) if denser else None
+
+    def srcset(fmt):
+        url = reverse('serve_thumbnail', args=[size, fmt, image.name])
+        if retina:
+            return '%s 1x, %s 2x' % (url, reverse('serve_thumbnail', args=[retina, fmt, image.name]))
+        return url
+
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"><img src="{}" srcset="{}"{}></picture>',
+        srcset('webp'), reverse('serve_thumbnail', args=[size, 'fallback', image.name]), srcset('fallback'),
+        flatatt(attrs),
+    )
@@ -1,3 +1,269 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Application, Company, Job
+
+from . import replicas
+from .sessions import SessionStore
+
+RESUME = 'applications/resumes/cv.pdf'
+CONTENT = bytes(range(100))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], MEDIA_SENDFILE=None)
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        # Rolled-back users never commit, so their ids' cached identities (users/backends.py) must go
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for name in (RESUME, 'db.sqlite3'):
+            os.makedirs(os.path.join(media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(media_root, name), 'wb') as file:
+                file.write(CONTENT)
+
+        User = get_user_model()
+        self.employer = User.objects.create_user('employer', 'employer@example.com', 'pw', user_type='employer')
+        self.applicant = User.objects.create_user('applicant', 'applicant@example.com', 'pw')
+        self.stranger = User.objects.create_user('stranger', 'stranger@example.com', 'pw')
+        job = Job.objects.create(
+            title='Python Developer', company=Company.objects.create(name='Acme', description=''),
+            employer=self.employer, description='Django', requirements='Python', location='Nairobi',
+            job_type='full_time', application_deadline=timezone.now() + timedelta(days=30),
+        )
+        Application.objects.create(job=job, applicant=self.applicant, resume=RESUME)
+
+    def get(self, name=RESUME, user=None, **headers):
+        if user:
+            self.client.force_login(user)
+        return self.client.get(reverse('serve_media', args=[name]), headers=headers)
+
+    def test_applicant_and_employer_may_download(self):
+        for user in (self.applicant, self.employer):
+            with self.subTest(user=user.username):
+                response = self.get(user=user)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), CONTENT)
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+                self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_stranger_is_refused(self):
+        self.assertEqual(self.get(user=self.stranger).status_code, 403)
+
+    def test_anonymous_user_is_sent_to_log_in(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_unreferenced_file_is_not_found(self):
+        # Present under MEDIA_ROOT, but no model field points at it
+        self.assertEqual(self.get('db.sqlite3', user=self.applicant).status_code, 404)
+        self.assertEqual(self.get('../' + RESUME, user=self.applicant).status_code, 404)
+
+    def test_byte_ranges(self):
+        for header, content_range, body in (
+            ('bytes=10-19', 'bytes 10-19/100', CONTENT[10:20]),
+            ('bytes=90-', 'bytes 90-99/100', CONTENT[90:]),
+            ('bytes=-5', 'bytes 95-99/100', CONTENT[95:]),
+            ('bytes=95-500', 'bytes 95-99/100', CONTENT[95:]),
+        ):
+            with self.subTest(range=header):
+                response = self.get(user=self.applicant, Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+                self.assertEqual(b''.join(response.streaming_content), body)
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=100-', 'bytes=50-40'):
+            with self.subTest(range=header):
+                response = self.get(user=self.applicant, Range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.get(user=self.applicant, Range='bytes=10-19', If_Range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_revalidation_is_not_modified(self):
+        etag = self.get(user=self.applicant)['ETag']
+        self.assertEqual(self.get(user=self.applicant, If_None_Match=etag).status_code, 304)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_front_end_server_sends_the_file(self):
+        response = self.get(user=self.applicant)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + RESUME)
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(READ_REPLICAS=['replica1', 'replica2'], REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.health = replicas.ReplicaHealth()
+        self.check = mock.patch.object(self.health, 'check', return_value=True).start()
+        mock.patch.object(replicas, 'health', self.health).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def request(self, view, cookies=None):
+        """Run view through replica_pin_middleware; returns (what the view returned, the response)"""
+        seen = []
+
+        def get_response(request):
+            seen.append(view(request))
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        response = replicas.replica_pin_middleware(get_response)(request)
+        return seen[0], response
+
+    def reads(self, *models, write=None):
+        """A @read_from_replica view returning where each model is read from, after writing ``write``"""
+
+        @replicas.read_from_replica
+        def view(request):
+            if write:
+                self.router.db_for_write(write)
+            return [self.router.db_for_read(model) for model in models]
+
+        return view
+
+    def test_reads_use_a_replica_only_inside_decorated_views(self):
+        self.assertEqual(self.router.db_for_read(Job), None)
+        routed, response = self.request(self.reads(Job, Company))
+        self.assertIn(routed[0], ('replica1', 'replica2'))
+        # One replica for the whole request
+        self.assertEqual(routed[1], routed[0])
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+        undecorated, _ = self.request(lambda request: self.router.db_for_read(Job))
+        self.assertIsNone(undecorated)
+
+    def test_replicas_are_used_in_turn(self):
+        first, _ = self.request(self.reads(Job))
+        second, _ = self.request(self.reads(Job))
+        self.assertEqual({first[0], second[0]}, {'replica1', 'replica2'})
+
+    def test_write_pins_the_request_and_sets_the_cookie(self):
+        routed, response = self.request(self.reads(Job, write=Job))
+        self.assertEqual(routed, [None])
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(cookie['httponly'])
+
+        # The next request from that browser reads from the primary too
+        routed, _ = self.request(self.reads(Job), cookies={replicas.PIN_COOKIE: cookie.value})
+        self.assertEqual(routed, [None])
+
+    def test_expired_or_garbled_pin_cookie_is_ignored(self):
+        for value in ('0', 'soon'):
+            with self.subTest(cookie=value):
+                routed, _ = self.request(self.reads(Job), cookies={replicas.PIN_COOKIE: value})
+                self.assertIsNotNone(routed[0])
+
+    def test_primary_only_apps_stay_on_the_primary(self):
+        routed, response = self.request(self.reads(Session, get_user_model(), Job, write=Session))
+        self.assertEqual(routed[:2], [None, None])
+        # Writing a session pins nothing
+        self.assertIsNotNone(routed[2])
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+    def test_atomic_blocks_stay_on_the_primary(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            routed, _ = self.request(self.reads(Job))
+        self.assertEqual(routed, [None])
+
+    def test_unhealthy_replica_falls_back(self):
+        self.check.side_effect = lambda alias: alias == 'replica2'
+        for _ in range(3):
+            routed, _ = self.request(self.reads(Job))
+            self.assertEqual(routed, ['replica2'])
+        # Each replica is checked once per REPLICA_HEALTH_CHECK_INTERVAL
+        self.assertEqual(sorted(call.args[0] for call in self.check.call_args_list), ['replica1', 'replica2'])
+
+        self.check.side_effect = None
+        self.check.return_value = False
+        self.health._checked.clear()
+        routed, _ = self.request(self.reads(Job))
+        self.assertEqual(routed, [None])
+
+
+@override_settings(SESSION_REFRESH_INTERVAL=3600, SESSION_COOKIE_AGE=14 * 24 * 3600)
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['cart'] = 1
+        session.save()
+        self.key = session.session_key
+
+    def stored_expiry(self):
+        return Session.objects.get(session_key=self.key).expire_date
+
+    def save_later(self, seconds, modify=False):
+        """Load and save the session as a request ``seconds`` from now would; returns the queries run"""
+        later = timezone.now() + timedelta(seconds=seconds)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            with CaptureQueriesContext(connection) as queries:
+                session = SessionStore(self.key)
+                session['cart']
+                if modify:
+                    session['cart'] = 2
+                session.save()
+        return [query['sql'] for query in queries]
+
+    def test_unmodified_session_is_not_written_within_the_interval(self):
+        before = self.stored_expiry()
+        with self.assertNumQueries(0):
+            session = SessionStore(self.key)
+            self.assertEqual(session['cart'], 1)
+            session.save()
+        self.assertEqual(self.save_later(3000), [])
+        self.assertEqual(self.stored_expiry(), before)
+
+    def test_expiry_is_refreshed_once_the_interval_passes(self):
+        before = self.stored_expiry()
+        queries = self.save_later(3700)
+        self.assertEqual(len([sql for sql in queries if sql.startswith('UPDATE')]), 1)
+        self.assertGreater(self.stored_expiry(), before)
+
+    def test_modified_session_is_written(self):
+        queries = self.save_later(60, modify=True)
+        self.assertEqual(len([sql for sql in queries if sql.startswith('UPDATE')]), 1)
+        cache.clear()
+        self.assertEqual(SessionStore(self.key)['cart'], 2)
+
+    def test_cache_miss_reads_but_does_not_write(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            session = SessionStore(self.key)
+            self.assertEqual(session['cart'], 1)
+            session.save()
+
+    def test_clear_expired_deletes_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([
+            Session(session_key=f'expired{n}', session_data='', expire_date=past) for n in range(5)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(SessionStore.clear_expired(batch_size=2), 5)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('DELETE')]), 3)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [self.key])
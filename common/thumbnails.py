@@ -0,0 +1,209 @@
+"""
+Thumbnails for uploaded images.
+
+Logos and profile pictures are shown in lists at a few fixed sizes, so each
+is scaled once into every size in THUMBNAIL_SIZES, as WebP plus a fallback
+(PNG for formats that may carry transparency, JPEG otherwise) for browsers
+without WebP. The {% thumbnail %} tag emits a <picture> offering both.
+
+Variants live beside the uploads at thumbs/<size>/<source name>.<ext>.
+Saving a model with a new image queues its variants on a small thread pool
+once the transaction commits; any variant still missing (a restart dropped
+the queue, a size was added) is made by the thumbnail view on first
+request. A lock file per variant keeps concurrent requests from all
+scaling the same image: the first one generates, the rest wait for it.
+manage.py generate_thumbnails fills in everything ahead of time, and
+gc_media removes the variants of blobs it deletes.
+"""
+import functools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import ImageField
+from django.db.models.signals import post_save
+
+from .storage import tracked_fields
+
+THUMBNAIL_DIR = 'thumbs'
+SIZES = {'small': 64, 'medium': 160, 'large': 320}
+FORMATS = ('webp', 'fallback')
+CONTENT_TYPES = {'webp': 'image/webp', 'png': 'image/png', 'jpg': 'image/jpeg'}
+TRANSPARENT_EXTENSIONS = ('.png', '.gif', '.webp')
+# A lock older than this belongs to a crashed worker and is taken over
+LOCK_TIMEOUT = 30
+LOCK_POLL = 0.05
+
+_executor = None
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def sizes():
+    return getattr(settings, 'THUMBNAIL_SIZES', SIZES)
+
+
+def extension(name, fmt):
+    if fmt == 'webp':
+        return 'webp'
+    return 'png' if os.path.splitext(name)[1].lower() in TRANSPARENT_EXTENSIONS else 'jpg'
+
+
+def variant_name(name, size, fmt):
+    return '%s/%s/%s.%s' % (THUMBNAIL_DIR, size, os.path.splitext(name)[0], extension(name, fmt))
+
+
+@functools.cache
+def image_fields():
+    """{model: [image field names]} among the tracked upload fields"""
+    return {
+        model: names for model, names in (
+            (model, [name for name in names if isinstance(model._meta.get_field(name), ImageField)])
+            for model, names in tracked_fields().items()
+        ) if names
+    }
+
+
+def _render(source, target, box, fmt):
+    from PIL import Image, ImageOps
+
+    with default_storage.open(source, 'rb') as content:
+        with Image.open(content) as image:
+            # JPEG can decode straight at a fraction of its size
+            image.draft('RGB', (box, box))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((box, box), Image.Resampling.LANCZOS)
+            transparent = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            if fmt == 'jpg' or not transparent:
+                image = image.convert('RGB')
+            elif image.mode != 'RGBA':
+                image = image.convert('RGBA')
+            if fmt == 'webp':
+                image.save(target, 'WEBP', quality=80, method=4)
+            elif fmt == 'png':
+                image.save(target, 'PNG', optimize=True)
+            else:
+                image.save(target, 'JPEG', quality=85, optimize=True, progressive=True)
+
+
+def _fresh(path, source_path):
+    try:
+        return os.stat(path).st_mtime >= os.stat(source_path).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def ensure(name, size, fmt):
+    """Storage name of the variant, generating it first if it is missing or stale"""
+    if size not in sizes() or fmt not in FORMATS:
+        raise ThumbnailError('Unknown thumbnail %s/%s' % (size, fmt))
+    variant = variant_name(name, size, fmt)
+    path = default_storage.path(variant)
+    source_path = default_storage.path(name)
+    if _fresh(path, source_path):
+        return variant
+    if not os.path.exists(source_path):
+        raise ThumbnailError('Source image %s is missing' % name)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock = path + '.lock'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            if _fresh(path, source_path):
+                # Another worker finished it while we waited
+                return variant
+            try:
+                if time.time() - os.stat(lock).st_mtime > LOCK_TIMEOUT:
+                    os.remove(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise ThumbnailError('Timed out waiting for %s' % variant)
+            time.sleep(LOCK_POLL)
+    try:
+        if _fresh(path, source_path):
+            return variant
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                _render(name, output, sizes()[size], extension(name, fmt))
+            os.chmod(temporary, default_storage.file_permissions_mode or 0o644)
+            # Atomic: readers never see a half-written variant
+            os.replace(temporary, path)
+        except Exception as e:
+            raise ThumbnailError('Could not make a thumbnail of %s: %s' % (name, e))
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+    finally:
+        os.remove(lock)
+    return variant
+
+
+def generate(name):
+    """Make every variant of an image; returns how many were written or already current"""
+    count = 0
+    for size in sizes():
+        for fmt in FORMATS:
+            ensure(name, size, fmt)
+            count += 1
+    return count
+
+
+def _generate_quietly(name):
+    try:
+        generate(name)
+    except ThumbnailError:
+        # Left to the view, which falls back to the original image
+        pass
+
+
+def queue(name):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 1), thread_name_prefix='thumbnails',
+        )
+    _executor.submit(_generate_quietly, name)
+
+
+def delete_variants(name):
+    for size in sizes():
+        for fmt in FORMATS:
+            path = default_storage.path(variant_name(name, size, fmt))
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def queue_new_images(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored_files', {})
+    for field in image_fields().get(sender, []):
+        if not created and field not in stored:
+            continue
+        name = getattr(instance, field).name or ''
+        if name and name != stored.get(field):
+            transaction.on_commit(lambda name=name: queue(name))
+
+
+def connect_signals():
+    for model in image_fields():
+        post_save.connect(queue_new_images, sender=model, dispatch_uid='thumbnails_%s' % model._meta.label)
+
+
+def purge_all():
+    """Remove every variant; the next requests or generate_thumbnails make them again"""
+    shutil.rmtree(default_storage.path(THUMBNAIL_DIR), ignore_errors=True)
@@ -1,13 +1,20 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.views.decorators.http import require_safe
+from django.db.models import Sum
 from django.utils import timezone
-from datetime import timedelta
-from jobs.models import Job, Application, SavedJob, Company,Notification
+from jobs.models import Job, Application, ApplicationStatusCount, SavedJob
+from jobs import notifications as notification_service
 from django.contrib.auth import get_user_model
+from . import media, stats, storage, thumbnails
+from .replicas import read_from_replica
 
 User = get_user_model()
 
+@read_from_replica
 def home(request):
     # Show recent jobs on home page
     recent_jobs = Job.objects.filter(is_active=True).order_by('-created_at')[:6]
@@ -32,14 +39,16 @@ def dashboard(request):
         # Employer dashboard
         jobs = Job.objects.filter(employer=request.user).order_by('-created_at')
         recent_jobs = jobs[:5]
-        total_applications = Application.objects.filter(job__employer=request.user).count()
+        # Totals come from the denormalized counters (see jobs/counters.py), not a scan of applications
+        total_applications = jobs.aggregate(total=Sum('application_count'))['total'] or 0
         active_jobs = jobs.filter(is_active=True).count()
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+        unread_count = notification_service.unread_count(request.user)
         
         # Add applicant statistics
-        applicant_stats = Application.objects.filter(
-            job__employer=request.user
-        ).values('status').annotate(count=Count('status'))
+        applicant_stats = (
+            ApplicationStatusCount.objects.filter(job__employer=request.user, count__gt=0)
+            .values('status').annotate(count=Sum('count')).order_by('status')
+        )
         
         context.update({
             'recent_jobs': recent_jobs,
@@ -50,33 +59,9 @@ def dashboard(request):
         })
         template = 'common/employer_dashboard.html'
     else:  # admin
-        # Admin dashboard statistics
-        today = timezone.now()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        
-        # Basic counts
-        total_users = User.objects.count()
-        total_jobs = Job.objects.count()
-        total_applications = Application.objects.count()
-        total_companies = Company.objects.count()
-        
-        # User statistics
-        job_seekers = User.objects.filter(user_type='job_seeker').count()
-        employers = User.objects.filter(user_type='employer').count()
-        admins = User.objects.filter(user_type='admin').count()
-        
-        # Recent activity
-        new_users_week = User.objects.filter(date_joined__gte=week_ago).count()
-        new_jobs_week = Job.objects.filter(created_at__gte=week_ago).count()
-        new_applications_week = Application.objects.filter(applied_date__gte=week_ago).count()
-        
-        # Job statistics
-        active_jobs = Job.objects.filter(is_active=True).count()
-        expired_jobs = Job.objects.filter(application_deadline__lt=today).count()
-        
-        # Application status breakdown
-        application_status = Application.objects.values('status').annotate(count=Count('status'))
+        # Counts come from a shared snapshot (see common/stats.py) that is
+        # refreshed at most every ADMIN_DASHBOARD_STATS_TTL seconds.
+        snapshot = stats.get_snapshot()
         
         # Recent users (last 5)
         recent_users = User.objects.select_related('jobseekerprofile', 'employerprofile').order_by('-date_joined')[:5]
@@ -85,48 +70,51 @@ def dashboard(request):
         recent_jobs = Job.objects.select_related('company', 'employer').order_by('-created_at')[:5]
         
         # Recent applications (last 5)
-        recent_applications = Application.objects.select_related('job', 'applicant').order_by('-applied_date')[:5]
-        
-        # System health (placeholder values)
-        system_status = 'Healthy'
-        database_size = '2.5 MB'
-        uptime = '99.8%'
+        recent_applications = Application.objects.select_related('job__company', 'applicant').order_by('-applied_date')[:5]
         
+        context.update(snapshot.data)
         context.update({
-            # Basic counts
-            'total_users': total_users,
-            'total_jobs': total_jobs,
-            'total_applications': total_applications,
-            'total_companies': total_companies,
-            
-            # User breakdown
-            'job_seekers': job_seekers,
-            'employers': employers,
-            'admins': admins,
-            
-            # Recent activity
-            'new_users_week': new_users_week,
-            'new_jobs_week': new_jobs_week,
-            'new_applications_week': new_applications_week,
-            
-            # Job statistics
-            'active_jobs': active_jobs,
-            'expired_jobs': expired_jobs,
-            
-            # Application statistics
-            'application_status': application_status,
-            
             # Recent data
             'recent_users': recent_users,
             'recent_jobs': recent_jobs,
             'recent_applications': recent_applications,
             
             # System info
-            'system_status': system_status,
-            'database_size': database_size,
-            'uptime': uptime,
-            'today': today,
+            'system_status': 'Healthy',
+            'table_rows': sorted(snapshot.data['table_rows'].items()),
+            'stats_computed_at': snapshot.computed_at,
+            'uptime': stats.uptime(),
+            'today': timezone.now(),
         })
         template = 'common/admin_dashboard.html'
     
-    return render(request, template, context)
\ No newline at end of file
+    return render(request, template, context)
+
+
+@require_safe
+def serve_media(request, name):
+    """Uploaded files, once the user is allowed to see them (see common/media.py)"""
+    access = media.access(request.user, name)
+    if access is None:
+        raise Http404('File not found')
+    if access == media.FORBIDDEN:
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        raise PermissionDenied
+    return media.serve(request, name, private=access == media.PRIVATE)
+
+
+@require_safe
+def serve_thumbnail(request, size, fmt, name):
+    """A scaled copy of a public image, generated on first request if need be"""
+    if size not in thumbnails.sizes() or fmt not in thumbnails.FORMATS:
+        raise Http404('Unknown thumbnail')
+    if media.access(request.user, name) != media.PUBLIC:
+        raise Http404('File not found')
+    try:
+        variant = thumbnails.ensure(name, size, fmt)
+    except thumbnails.ThumbnailError:
+        # A broken or unreadable upload: send it as it is rather than nothing
+        return media.serve(request, name, private=False)
+    # The variant only changes when its source does, and blob sources never do
+    return media.serve(request, variant, private=False, immutable=storage.is_blob(name))
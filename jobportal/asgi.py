@@ -3,6 +3,15 @@ ASGI config for jobportal project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the site through this so the notification stream holds its open
+connections in the event loop, e.g. with gunicorn and uvicorn's worker:
+
+    gunicorn jobportal.asgi:application -k uvicorn.workers.UvicornWorker
+
+or ``uvicorn jobportal.asgi:application`` in development. Under WSGI a
+stream would tie up a worker for as long as the tab is open, so pages only
+open it when served through ASGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
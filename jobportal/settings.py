@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Outside the session middleware so a session write also pins to the primary
+    'common.replicas.replica_pin_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,28 +60,62 @@ ROOT_URLCONF = 'jobportal.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'jobs.context_processors.live_notifications',
             ],
         },
     },
 ]
 
+# Deploy through ASGI so the notification stream can stay open, e.g.
+#   gunicorn jobportal.asgi:application -k uvicorn.workers.UvicornWorker
+# Under WSGI the site still works, but pages don't open the stream.
 WSGI_APPLICATION = 'jobportal.wsgi.application'
+ASGI_APPLICATION = 'jobportal.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# common.backends.sqlite3 is the stock SQLite backend with WAL, tuned pragmas and
+# BEGIN IMMEDIATE transactions; see its module docstring. Connections are kept for
+# DB_CONN_MAX_AGE seconds so requests reuse them instead of reconnecting.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'common.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+    }
+}
+
+# Read replicas (common/replicas.py): DATABASE_REPLICAS is a comma-separated list of
+# database files, each added as replica1, replica2, ... Views marked
+# @read_from_replica read from them; a browser that writes stays on the primary for
+# REPLICA_PIN_SECONDS. Locally, manage.py sync_replicas copies db.sqlite3 into them.
+READ_REPLICAS = []
+for index, name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    DATABASES['replica%d' % index] = {**DATABASES['default'], 'NAME': name.strip(), 'TEST': {'MIRROR': 'default'}}
+    READ_REPLICAS.append('replica%d' % index)
+DATABASE_ROUTERS = ['common.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+REPLICA_HEALTH_CHECK_INTERVAL = 15
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Defaults to a per-process memory cache; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache (e.g. django.core.cache.backends.redis.RedisCache) in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'jobportal'),
     }
 }
 
@@ -103,6 +139,16 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTH_USER_MODEL = 'users.CustomUser'
+# Users are loaded with their profiles in one query and cached (users/backends.py).
+# ModelBackend stays listed so sessions started before the cached backend remain valid;
+# drop it once SESSION_COOKIE_AGE has passed, as failed logins are checked by both.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Seconds a cached user is served; saves invalidate it at once within a process, so
+# raise this when CACHE_BACKEND is shared between workers
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 60))
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -127,11 +173,52 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Uploads have always been stored under the project directory. Only files referenced
+# by a model field are reachable, through common.views.serve_media.
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR)
+# Hand authorised downloads to the front-end server: 'x-sendfile' (Apache, lighttpd) or
+# 'x-accel-redirect' (nginx, with an internal location at MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT). Unset, Django streams the file itself with Range support.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Bounding boxes (px) of the logo and profile picture thumbnails (common/thumbnails.py),
+# and the threads generating them after an upload
+THUMBNAIL_SIZES = {'small': 64, 'medium': 160, 'large': 320}
+THUMBNAIL_WORKERS = 1
+
+# Uploads are stored once per distinct content (see common/storage.py).
+# STORAGES replaces STATICFILES_STORAGE, which Django 5.1+ ignores, so static
+# files keep the plain storage they were already served from.
+STORAGES = {
+    'default': {'BACKEND': 'common.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Job search index backend. Use 'jobs.search.DatabaseSearchBackend' on databases without FTS5.
+JOB_SEARCH_BACKEND = os.environ.get('JOB_SEARCH_BACKEND', 'jobs.search.SQLiteFTSBackend')
+# Relevance ranking: BM25 column boosts and the age in days at which a posting's score halves
+JOB_SEARCH_FIELD_WEIGHTS = {'title': 10.0, 'company_name': 5.0, 'description': 1.0, 'requirements': 1.0}
+JOB_SEARCH_RECENCY_HALF_LIFE = 30
+# Seconds job_list results, totals and facet counts are cached per distinct search.
+# Job/Company changes invalidate them immediately; the TTL only bounds deadline expiry.
+JOB_SEARCH_CACHE_TIMEOUT = int(os.environ.get('JOB_SEARCH_CACHE_TIMEOUT', 120))
+# Upper bound on radius_km searches
+JOB_SEARCH_MAX_RADIUS_KM = 500
+# Seconds before the in-process autocomplete index is rebuilt from the database
+JOB_AUTOCOMPLETE_MAX_AGE = 600
+# Salary histogram buckets (KES); the last bucket is open-ended
+JOB_SALARY_BUCKET_WIDTH = 10000
+JOB_SALARY_BUCKET_COUNT = 30
+
+# Seconds the admin dashboard statistics snapshot is served before it is recomputed
+ADMIN_DASHBOARD_STATS_TTL = int(os.environ.get('ADMIN_DASHBOARD_STATS_TTL', 300))
+
 # Add this to your settings.py
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
@@ -140,6 +227,12 @@ LOGIN_URL = 'login'
 # Optional: Add these for better security
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 SESSION_SAVE_EVERY_REQUEST = True
+# Cached database sessions that only rewrite the row when the data changes or the
+# stored expiry is more than SESSION_REFRESH_INTERVAL seconds behind (common/sessions.py).
+# Cached entries are trusted for SESSION_CACHE_TIMEOUT seconds; raise it with a shared cache.
+SESSION_ENGINE = 'common.sessions'
+SESSION_REFRESH_INTERVAL = 24 * 60 * 60
+SESSION_CACHE_TIMEOUT = int(os.environ.get('SESSION_CACHE_TIMEOUT', 300))
 
 # Email configuration (for development)
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
@@ -161,6 +254,29 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@jobportal.com')
 
+# Counters (jobs/counters.py, jobs/notifications.py) drift when rows change without
+# signals (queryset.update(), raw SQL); recount them nightly:
+#   30 3 * * * python manage.py reconcile_counters
+
+# Saved-search alerts (jobs/alerts.py): posting a job only queues it. Match often, so
+# in-app alerts arrive within minutes, and email the digests daily:
+#   * * * * * python manage.py send_job_alerts --match-only
+#   0 7 * * * python manage.py send_job_alerts
+
+# Email outbox (jobs/outbox.py): views queue emails, manage.py send_outbox sends them
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 6 * 60 * 60
+
+# Read notifications older than this are removed by manage.py prune_notifications
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+# Live notifications (jobs/broker.py). LocalBroker serves a single process; with several
+# ASGI workers use jobs.broker.RedisBroker and point NOTIFICATION_BROKER_URL at Redis.
+NOTIFICATION_BROKER = os.environ.get('NOTIFICATION_BROKER', 'jobs.broker.LocalBroker')
+NOTIFICATION_BROKER_URL = os.environ.get('NOTIFICATION_BROKER_URL', 'redis://localhost:6379/0')
+# Seconds between keepalive comments on an idle notification stream
+NOTIFICATION_STREAM_HEARTBEAT = 25
+
 
 # Security settings for production
 if not DEBUG:
@@ -18,7 +18,6 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from django.conf import settings
-from django.conf.urls.static import static
 from common import views as common_views
 
 urlpatterns = [
@@ -29,10 +28,11 @@ urlpatterns = [
     path('jobs/', include('jobs.urls')),
     path('login/', auth_views.LoginView.as_view(template_name='users/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(template_name='users/logout.html'), name='logout'),
+    # Uploads go through a view in every environment so resumes stay private
+    path(settings.MEDIA_URL.lstrip('/') + 'thumbs/<str:size>/<str:fmt>/<path:name>',
+         common_views.serve_thumbnail, name='serve_thumbnail'),
+    path(settings.MEDIA_URL.lstrip('/') + '<path:name>', common_views.serve_media, name='serve_media'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     
     
 # Custom admin header (optional)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Company, Job, Application, Category, SavedJob
+from .models import Company, Job, Application, Category, OutboundEmail, ResumeText, SavedJob, SavedSearch
+from . import outbox
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
@@ -18,12 +19,12 @@ class CompanyAdmin(admin.ModelAdmin):
     )
     
     def job_count(self, obj):
-        return obj.job_set.count()
+        return obj.job_count
     job_count.short_description = 'Total Jobs'
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
-    list_display = ('title', 'company', 'employer', 'location', 'job_type', 'experience_level', 'salary', 'is_active', 'created_at')
+    list_display = ('title', 'company', 'employer', 'location', 'job_type', 'experience_level', 'salary', 'application_count', 'is_active', 'created_at')
     list_filter = ('job_type', 'experience_level', 'is_active', 'created_at', 'application_deadline')
     search_fields = ('title', 'description', 'requirements', 'company__name', 'employer__username')
     readonly_fields = ('created_at', 'updated_at')
@@ -50,7 +51,7 @@ class JobAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('company', 'employer')
     
     def application_count(self, obj):
-        return obj.applications.count()
+        return obj.application_count
     application_count.short_description = 'Applications'
 
 @admin.register(Application)
@@ -98,4 +99,40 @@ class SavedJobAdmin(admin.ModelAdmin):
     readonly_fields = ('saved_date',)
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user', 'job')
\ No newline at end of file
+        return super().get_queryset(request).select_related('user', 'job')
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'match_key', 'email_alerts', 'created_at')
+    list_filter = ('email_alerts', 'created_at')
+    search_fields = ('name', 'user__username')
+    readonly_fields = ('match_key', 'created_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'kind', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('to_email', 'subject', 'last_error')
+    readonly_fields = ('attempts', 'claimed_by', 'last_error', 'created_at', 'sent_at')
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected dead letters')
+    def requeue(self, request, queryset):
+        count = outbox.requeue(queryset)
+        self.message_user(request, f'{count} email{"s" if count != 1 else ""} requeued.')
+
+@admin.register(ResumeText)
+class ResumeTextAdmin(admin.ModelAdmin):
+    list_display = ('file', 'status', 'attempts', 'created_at', 'extracted_at')
+    list_filter = ('status',)
+    search_fields = ('file', 'error')
+    readonly_fields = ('file', 'text', 'attempts', 'error', 'created_at', 'extracted_at')
+    actions = ['retry']
+
+    @admin.action(description='Extract selected files again')
+    def retry(self, request, queryset):
+        count = queryset.update(status=ResumeText.PENDING, attempts=0, error='')
+        self.message_user(request, f'{count} file{"s" if count != 1 else ""} queued for extraction.')
@@ -0,0 +1,153 @@
+"""
+Saved-search alerts.
+
+Instead of re-running every saved search against each new job, saved searches
+are indexed the other way round: each one is filed under a single match key
+taken from its most selective criterion (its longest keyword, else its job
+type, else its experience level, else the catch-all '*'). A new job expands
+into every key it could satisfy -- each prefix of each word in its text plus
+its job type and level -- and one indexed IN query over SavedSearch.match_key
+returns the only searches that can possibly match. Those candidates are then
+checked against the job in Python with the same rules job_list applies.
+
+Matching is not done while the employer waits: create_job only queues the
+job's id as a PendingJobAlert, and send_job_alerts (see settings.py for the
+schedule) runs match_pending() before it builds the email digests. Each
+queued job is matched, notified and dequeued in one transaction, so a run
+that fails partway neither loses a job nor notifies anyone twice.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from . import notifications
+from .geo import MAX_RADIUS_KM, haversine_km, resolve
+from .search import tokenize
+
+MATCH_ALL = '*'
+KEY_LENGTH = 40
+KEY_CHUNK_SIZE = 500
+MATCH_BATCH_SIZE = 100
+
+
+def match_key(filters):
+    """The reverse-index key a saved search with these filters is filed under"""
+    terms = tokenize(filters.get('query'))
+    if terms:
+        return 'term:' + max(terms, key=len)[:KEY_LENGTH - 5]
+    if filters.get('job_type'):
+        return 'job_type:' + filters['job_type']
+    if filters.get('experience_level'):
+        return 'level:' + filters['experience_level']
+    return MATCH_ALL
+
+
+def job_tokens(job):
+    return set(tokenize(' '.join((job.title, job.company.name, job.description, job.requirements))))
+
+
+def job_keys(job, tokens):
+    """Every match key a saved search matching job could be filed under"""
+    keys = {MATCH_ALL, 'job_type:' + job.job_type, 'level:' + job.experience_level}
+    for token in tokens:
+        for length in range(1, min(len(token), KEY_LENGTH - 5) + 1):
+            keys.add('term:' + token[:length])
+    return keys
+
+
+def matches(filters, job, tokens):
+    """Whether job satisfies saved filters, mirroring the job_list filters"""
+    for term in tokenize(filters.get('query')):
+        if term not in tokens and not any(token.startswith(term) for token in tokens):
+            return False
+    for name in ('job_type', 'experience_level'):
+        if filters.get(name) and getattr(job, name) != filters[name]:
+            return False
+    if 'min_salary' in filters or 'max_salary' in filters:
+        if job.salary is None:
+            return False
+        if job.salary < filters.get('min_salary', 0) or job.salary > filters.get('max_salary', job.salary):
+            return False
+    location = filters.get('location')
+    if filters.get('radius_km'):
+        if 'latitude' in filters and 'longitude' in filters:
+            center = (filters['latitude'], filters['longitude'])
+        else:
+            match = resolve(location)
+            center = match[1:] if match else None
+        if center is None or job.latitude is None:
+            return False
+        radius_km = min(filters['radius_km'], getattr(settings, 'JOB_SEARCH_MAX_RADIUS_KM', MAX_RADIUS_KM))
+        return haversine_km(center[0], center[1], job.latitude, job.longitude) <= radius_km
+    if location and location not in job.location.lower():
+        return False
+    return True
+
+
+def find_matching_searches(job):
+    """Saved searches (other than the poster's own) that job matches"""
+    from .models import SavedSearch
+
+    tokens = job_tokens(job)
+    keys = list(job_keys(job, tokens))
+    candidates = []
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        candidates.extend(
+            SavedSearch.objects.filter(match_key__in=keys[start:start + KEY_CHUNK_SIZE])
+            .exclude(user_id=job.employer_id)
+        )
+    return [saved for saved in candidates if matches(saved.filters, job, tokens)]
+
+
+def notify_matches(job):
+    """Record alert matches for a newly posted job, one notification per user; returns the match count"""
+    from .models import JobAlertMatch, Notification
+
+    saved_searches = find_matching_searches(job)
+    if not saved_searches:
+        return 0
+    by_user = {}
+    for saved in saved_searches:
+        by_user.setdefault(saved.user_id, []).append(saved)
+    with transaction.atomic():
+        JobAlertMatch.objects.bulk_create(
+            [JobAlertMatch(saved_search=saved, job=job) for saved in saved_searches],
+            ignore_conflicts=True,
+        )
+        notifications.create([
+            Notification(
+                user_id=user_id,
+                notification_type='job_alert',
+                title=f'New job matching "{searches[0].name}"',
+                message=f'{job.title} at {job.company.name} ({job.location}) matches your saved search.',
+                related_job=job,
+            )
+            for user_id, searches in by_user.items()
+        ])
+    return len(saved_searches)
+
+
+def queue(job):
+    """Have the next send_job_alerts run match a newly posted job"""
+    from .models import PendingJobAlert
+
+    PendingJobAlert.objects.get_or_create(job=job)
+
+
+def match_pending(batch_size=MATCH_BATCH_SIZE):
+    """Match and notify every queued job, oldest first; returns (jobs, matches)"""
+    from .models import PendingJobAlert
+
+    jobs = matched = 0
+    while True:
+        batch = list(
+            PendingJobAlert.objects.select_related('job__company').order_by('created_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return jobs, matched
+        for pending in batch:
+            with transaction.atomic():
+                # Whoever deletes the row matches the job, so concurrent runs don't notify twice
+                if not PendingJobAlert.objects.filter(pk=pending.pk).delete()[0]:
+                    continue
+                matched += notify_matches(pending.job)
+            jobs += 1
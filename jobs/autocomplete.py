@@ -0,0 +1,191 @@
+"""
+In-process typeahead suggestions for the job search form.
+
+Every listable job contributes its title, its company name and its
+normalized location. Each distinct value is stored in a sorted array once per
+word it contains (under the text from that word onwards), so "dev" finds both
+"Developer" and "Senior Developer". A lookup bisects to both ends of the run
+of keys starting with the typed prefix and ranks every value in it by how
+many active postings carry them. Runs longer than SCAN_LIMIT keys (one or
+two letter prefixes) keep their ranked top TOP_N until a value under that
+prefix is added or removed, so the common case is not a full scan per
+keystroke.
+
+Job saves and deletes update the index in place (see jobs/signals.py).
+Deadlines pass without any save, and other processes' writes are not seen
+here, so the whole index is also rebuilt from the database once it is older
+than JOB_AUTOCOMPLETE_MAX_AGE seconds; one request rebuilds while the others
+keep reading the old index.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+from .facets import normalize_location
+
+KINDS = ('title', 'company', 'location')
+MAX_AGE = 600
+SCAN_LIMIT = 500
+TOP_N = 20
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+
+def word_keys(value):
+    """The normalized value from each word onwards: 'senior dev' -> ['senior dev', 'dev']"""
+    words = normalize(value).split()
+    return [' '.join(words[index:]) for index in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted (key, value) pairs plus a posting count per value"""
+
+    def __init__(self):
+        self.keys = []
+        self.counts = Counter()
+        # Ranked top TOP_N for prefixes whose run is longer than SCAN_LIMIT
+        self.top = {}
+
+    def _invalidate(self, value):
+        for key in word_keys(value):
+            for end in range(1, len(key) + 1):
+                self.top.pop(key[:end], None)
+
+    def add(self, value):
+        if not value:
+            return
+        self._invalidate(value)
+        self.counts[value] += 1
+        if self.counts[value] == 1:
+            for key in word_keys(value):
+                bisect.insort(self.keys, (key, value))
+
+    def remove(self, value):
+        if not value or not self.counts[value]:
+            return
+        self._invalidate(value)
+        self.counts[value] -= 1
+        if not self.counts[value]:
+            del self.counts[value]
+            for key in word_keys(value):
+                position = bisect.bisect_left(self.keys, (key, value))
+                if position < len(self.keys) and self.keys[position] == (key, value):
+                    del self.keys[position]
+
+    def search(self, prefix, limit):
+        """[(value, count)] whose words start with prefix, most postings first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if prefix in self.top and limit <= TOP_N:
+            return self.top[prefix][:limit]
+        position = bisect.bisect_left(self.keys, (prefix, ''))
+        end = bisect.bisect_left(self.keys, (prefix + '\uffff', ''), position)
+        if end - position <= SCAN_LIMIT or limit > TOP_N:
+            return self._rank(position, end, limit)
+        self.top[prefix] = self._rank(position, end, TOP_N)
+        return self.top[prefix][:limit]
+
+    def _rank(self, position, end, limit):
+        found = {value for key, value in self.keys[position:end]}
+        counts = self.counts
+        ranked = heapq.nsmallest(limit, found, key=lambda value: (-counts[value], value))
+        return [(value, counts[value]) for value in ranked]
+
+
+class Autocomplete:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.built_at = None
+        self.indexes = {}
+        self.entries = {}
+
+    def _entry(self, job, company_name):
+        if not job.is_active or job.application_deadline <= timezone.now():
+            return None
+        return (job.title.strip(), company_name.strip(), normalize_location(job.location))
+
+    def _apply(self, entry, method):
+        for kind, value in zip(KINDS, entry):
+            getattr(self.indexes[kind], method)(value)
+
+    def rebuild(self):
+        from .models import Job
+
+        indexes = {kind: PrefixIndex() for kind in KINDS}
+        entries = {}
+        rows = (
+            Job.objects.filter(is_active=True, application_deadline__gt=timezone.now())
+            .values_list('id', 'title', 'company__name', 'location')
+        )
+        for job_id, title, company_name, location in rows.iterator():
+            entry = (title.strip(), company_name.strip(), normalize_location(location))
+            entries[job_id] = entry
+            for kind, value in zip(KINDS, entry):
+                indexes[kind].add(value)
+        with self.lock:
+            self.indexes, self.entries = indexes, entries
+            self.built_at = time.monotonic()
+
+    def is_stale(self):
+        max_age = getattr(settings, 'JOB_AUTOCOMPLETE_MAX_AGE', MAX_AGE)
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def ensure_built(self):
+        if not self.is_stale():
+            return
+        # Only the first index has to be waited for; an old one serves until its replacement is ready
+        if not self.build_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.is_stale():
+                self.rebuild()
+        finally:
+            self.build_lock.release()
+
+    def update_job(self, job, company_name=None):
+        """Replace job's contribution after it was created or edited"""
+        if self.built_at is None:
+            return
+        if company_name is None:
+            company_name = job.company.name
+        entry = self._entry(job, company_name)
+        with self.lock:
+            old = self.entries.pop(job.pk, None)
+            if old:
+                self._apply(old, 'remove')
+            if entry:
+                self.entries[job.pk] = entry
+                self._apply(entry, 'add')
+
+    def remove_job(self, job_id):
+        if self.built_at is None:
+            return
+        with self.lock:
+            old = self.entries.pop(job_id, None)
+            if old:
+                self._apply(old, 'remove')
+
+    def suggest(self, prefix, kinds=KINDS, limit=8):
+        """[{'value', 'kind', 'count'}] across kinds, most postings first"""
+        self.ensure_built()
+        with self.lock:
+            matches = [
+                {'value': value, 'kind': kind, 'count': count}
+                for kind in kinds
+                for value, count in self.indexes[kind].search(prefix, limit)
+            ]
+        matches.sort(key=lambda match: -match['count'])
+        return matches[:limit]
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,139 @@
+"""
+Pub/sub for pushing new notifications to connected browsers.
+
+The notification_stream view subscribes each open connection to its user's
+events; jobs/notifications.py publishes every notification once its
+transaction commits. A subscriber is just an asyncio.Queue waiting in the
+event loop, so an idle connection costs a few hundred bytes and no queries.
+
+LocalBroker fans events out within one process, which is all a single ASGI
+worker needs. RedisBroker publishes through a Redis channel so events reach
+connections held by other processes (several ASGI workers, or a WSGI process
+creating the notification); each process keeps one subscription and hands
+events to its local queues. Run ``redis-server`` locally to use it in
+development. NOTIFICATION_BROKER selects the class.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+_broker = None
+
+
+def _offer(queue, event):
+    if queue.full():
+        # A stalled client loses its oldest event, not the newest
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class LocalBroker:
+    """Delivers events to subscribers in this process only"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            # Publishers may be on another thread (sync views) than the subscriber's loop
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The loop closed before the subscription was removed
+                pass
+
+    async def start(self):
+        """Called before the first subscription in each event loop"""
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        await self.start()
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(subscriber)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class RedisBroker(LocalBroker):
+    """Relays events between processes over one Redis pub/sub channel"""
+
+    def __init__(self, url=None, channel=None):
+        super().__init__()
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroker requires the redis package (pip install redis).')
+        self.url = url or getattr(settings, 'NOTIFICATION_BROKER_URL', 'redis://localhost:6379/0')
+        self.channel = channel or getattr(settings, 'NOTIFICATION_BROKER_CHANNEL', 'jobportal:notifications')
+        self._client = None
+        self._relays = {}
+
+    def publish(self, user_id, event):
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        try:
+            self._client.publish(self.channel, json.dumps({'user_id': user_id, 'event': event}))
+        except redis.RedisError:
+            # Connected browsers miss a live update; they catch up on their next reconnect
+            logger.exception('Could not publish notification event')
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        relay = self._relays.get(loop)
+        if relay is None or relay.done():
+            self._relays[loop] = loop.create_task(self._relay())
+
+    async def _relay(self):
+        import redis.asyncio as redis
+
+        while True:
+            try:
+                client = redis.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            data = json.loads(message['data'])
+                            self.deliver(data['user_id'], data['event'])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Notification relay lost its Redis subscription; reconnecting')
+                await asyncio.sleep(1)
+
+
+def get_broker():
+    """The configured broker, shared by the whole process"""
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'NOTIFICATION_BROKER', 'jobs.broker.LocalBroker'))()
+    return _broker
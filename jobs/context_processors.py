@@ -0,0 +1,6 @@
+from django.core.handlers.asgi import ASGIRequest
+
+
+def live_notifications(request):
+    """Whether pages open the notification stream: only under ASGI can it stay open without holding a worker"""
+    return {'live_notifications': isinstance(request, ASGIRequest)}
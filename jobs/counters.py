@@ -0,0 +1,105 @@
+"""
+Denormalized counters: Job.application_count, ApplicationStatusCount (per job
+and status) and Company.job_count.
+
+Signals (see jobs/signals.py) adjust them with F() updates whenever an
+application or job is created, deleted, changes status or moves company, so
+listing pages read a column instead of running a COUNT per row. Anything
+that bypasses signals (queryset.update(), raw SQL, bulk_create) lets them
+drift; reconcile() recounts from the source tables and fixes only the rows
+that are wrong. Schedule manage.py reconcile_counters (see settings.py) so
+drift doesn't outlive a night.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def adjust_applications(job_id, delta, using='default'):
+    from .models import Job
+
+    # Floored at 0: the column is unsigned, and a drifted count must not make a delete fail
+    Job.objects.using(using).filter(pk=job_id).update(application_count=Greatest(F('application_count') + delta, 0))
+
+
+def adjust_status(job_id, status, delta, using='default'):
+    from .models import ApplicationStatusCount
+
+    rows = ApplicationStatusCount.objects.using(using).filter(job_id=job_id, status=status)
+    if rows.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic(using=using):
+            ApplicationStatusCount.objects.using(using).create(job_id=job_id, status=status, count=delta)
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(count=F('count') + delta)
+
+
+def adjust_jobs(company_id, delta, using='default'):
+    from .models import Company
+
+    Company.objects.using(using).filter(pk=company_id).update(job_count=Greatest(F('job_count') + delta, 0))
+
+
+def application_added(job_id, status, using='default'):
+    adjust_applications(job_id, 1, using)
+    adjust_status(job_id, status, 1, using)
+
+
+def application_removed(job_id, status, using='default'):
+    adjust_applications(job_id, -1, using)
+    adjust_status(job_id, status, -1, using)
+
+
+def statuses_changed(job_id, old_statuses, new_status, using='default'):
+    """Move a bulk status update's applications between status rows; old_statuses maps status to count"""
+    for status, count in old_statuses.items():
+        if status != new_status:
+            adjust_status(job_id, status, -count, using)
+            adjust_status(job_id, new_status, count, using)
+
+
+def _count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def reconcile(using='default'):
+    """
+    Recount every counter from the source tables and repair the ones that
+    drifted. Returns {counter: rows fixed}.
+    """
+    from .models import Application, ApplicationStatusCount, Company, Job
+
+    fixed = {}
+    with transaction.atomic(using=using):
+        jobs = Job.objects.using(using).annotate(actual=_count_subquery(Application, 'job'))
+        fixed['application_count'] = jobs.exclude(application_count=F('actual')).update(
+            application_count=_count_subquery(Application, 'job'),
+        )
+        companies = Company.objects.using(using).annotate(actual=_count_subquery(Job, 'company'))
+        fixed['job_count'] = companies.exclude(job_count=F('actual')).update(
+            job_count=_count_subquery(Job, 'company'),
+        )
+
+        actual = {
+            (job_id, status): total
+            for job_id, status, total in Application.objects.using(using).order_by()
+            .values_list('job_id', 'status').annotate(total=Count('id'))
+        }
+        stale = []
+        for row in ApplicationStatusCount.objects.using(using).all():
+            total = actual.pop((row.job_id, row.status), 0)
+            if row.count != total:
+                row.count = total
+                stale.append(row)
+        ApplicationStatusCount.objects.using(using).bulk_update(stale, ['count'], batch_size=500)
+        ApplicationStatusCount.objects.using(using).bulk_create([
+            ApplicationStatusCount(job_id=job_id, status=status, count=total)
+            for (job_id, status), total in actual.items()
+        ])
+        fixed['status_counts'] = len(stale) + len(actual)
+    return fixed
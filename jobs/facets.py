@@ -0,0 +1,63 @@
+"""
+Facet counts for the job search sidebar.
+
+Counts for every facet come from one GROUP BY over (job_type,
+experience_level, location) on the jobs matching the current keywords and
+location text. Each facet is then tallied in Python against the selections
+made in the *other* facets, so picking "Remote" still shows how many jobs the
+other job types would have. The grouped rows depend only on the keywords and
+location text, so callers cache them per normalized query.
+"""
+from collections import Counter
+
+from django.db.models import Count
+
+FACET_FIELDS = ('job_type', 'experience_level', 'location')
+
+
+def normalize_location(location):
+    """Group 'Nairobi', 'nairobi ' and 'Nairobi, Kenya' under one facet value"""
+    return (location or '').split(',')[0].strip().title()
+
+
+def grouped_rows(queryset):
+    """(job_type, experience_level, location, count) rows for queryset, in one GROUP BY"""
+    rows = Counter()
+    grouped = (
+        queryset.order_by()
+        .values_list('job_type', 'experience_level', 'location')
+        .annotate(total=Count('id'))
+    )
+    for job_type, experience_level, location, total in grouped:
+        rows[(job_type, experience_level, normalize_location(location))] += total
+    return [key + (total,) for key, total in rows.items()]
+
+
+def facet_counts(rows, selected, location_limit=10):
+    """
+    Tally grouped rows into {facet: Counter} honouring the selections in the
+    other facets. ``selected`` maps facet names to the chosen value (or '');
+    free-text location is already applied to the queryset, so it is not a
+    selection here.
+    """
+    counts = {field: Counter() for field in FACET_FIELDS}
+    for row in rows:
+        values = dict(zip(FACET_FIELDS, row[:3]))
+        total = row[3]
+        for field in FACET_FIELDS:
+            if all(
+                not selected.get(other) or values[other] == selected[other]
+                for other in FACET_FIELDS if other != field
+            ):
+                counts[field][values[field]] += total
+    counts['location'].pop('', None)
+    counts['location'] = Counter(dict(counts['location'].most_common(location_limit)))
+    return counts
+
+
+def choice_labels(choices, counts):
+    """Append '(n)' to each choice label, leaving the blank 'All' choice alone"""
+    return [
+        (value, '%s (%d)' % (label, counts.get(value, 0)) if value else label)
+        for value, label in choices
+    ]
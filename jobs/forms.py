@@ -1,5 +1,10 @@
+import hashlib
+import json
+
 from django import forms
 from .models import Job, Application, Company, Category
+from .facets import choice_labels
+from .geo import resolve
 from django.utils import timezone
 
 class CompanyForm(forms.ModelForm):
@@ -46,6 +51,12 @@ class JobForm(forms.ModelForm):
             raise forms.ValidationError("Application deadline must be in the future.")
         return deadline
 
+    def clean_salary(self):
+        salary = self.cleaned_data.get('salary')
+        if salary and salary < 0:
+            raise forms.ValidationError("Salary cannot be negative.")
+        return salary
+
 class ApplicationForm(forms.ModelForm):
     class Meta:
         model = Application
@@ -58,17 +69,108 @@ class ApplicationForm(forms.ModelForm):
         }
 
 class JobSearchForm(forms.Form):
+    FILTER_FIELDS = [
+        'query', 'location', 'job_type', 'experience_level', 'radius_km', 'latitude', 'longitude',
+        'min_salary', 'max_salary',
+    ]
+
+    SORT_CHOICES = [
+        ('relevance', 'Most Relevant'),
+        ('newest', 'Newest'),
+        ('distance', 'Nearest'),
+    ]
+
+    RADIUS_CHOICES = [
+        ('', 'Any distance'),
+        ('10', 'Within 10 km'),
+        ('25', 'Within 25 km'),
+        ('50', 'Within 50 km'),
+        ('100', 'Within 100 km'),
+        ('250', 'Within 250 km'),
+    ]
+
     query = forms.CharField(required=False, widget=forms.TextInput(attrs={
-        'placeholder': 'Search by job title, company, or keywords...'
+        'placeholder': 'Search by job title, company, or keywords...',
+        'list': 'query-suggestions', 'autocomplete': 'off', 'data-autocomplete': 'query',
     }))
     location = forms.CharField(required=False, widget=forms.TextInput(attrs={
-        'placeholder': 'City, state, or remote...'
+        'placeholder': 'City, state, or remote...',
+        'list': 'location-suggestions', 'autocomplete': 'off', 'data-autocomplete': 'location',
     }))
     job_type = forms.ChoiceField(required=False, choices=[('', 'All Types')] + Job.JOB_TYPES)
     experience_level = forms.ChoiceField(required=False, choices=[('', 'All Levels')] + Job.EXPERIENCE_LEVELS)
+    radius_km = forms.TypedChoiceField(required=False, choices=RADIUS_CHOICES, coerce=int, empty_value=None)
+    # Filled in by the browser's geolocation for "near me" searches
+    latitude = forms.FloatField(required=False, min_value=-90, max_value=90, widget=forms.HiddenInput)
+    longitude = forms.FloatField(required=False, min_value=-180, max_value=180, widget=forms.HiddenInput)
+    min_salary = forms.IntegerField(required=False, min_value=0, widget=forms.NumberInput(attrs={'placeholder': 'Min'}))
+    max_salary = forms.IntegerField(required=False, min_value=0, widget=forms.NumberInput(attrs={'placeholder': 'Max'}))
+    sort = forms.ChoiceField(required=False, choices=SORT_CHOICES)
 
-    def clean_salary(self):
-        salary = self.cleaned_data.get('salary')
-        if salary and salary < 0:
-            raise forms.ValidationError("Salary cannot be negative.")
-        return salary
\ No newline at end of file
+    def clean_sort(self):
+        # Relevance only means something when there are terms to rank by
+        sort = self.cleaned_data.get('sort')
+        if not sort:
+            sort = 'relevance' if self.cleaned_data.get('query') else 'newest'
+        return sort
+
+    def clean(self):
+        cleaned_data = super().clean()
+        min_salary, max_salary = cleaned_data.get('min_salary'), cleaned_data.get('max_salary')
+        if min_salary is not None and max_salary is not None and min_salary > max_salary:
+            self.add_error('max_salary', "Maximum salary must be at least the minimum.")
+        cleaned_data['center'] = None
+        if cleaned_data.get('radius_km'):
+            latitude, longitude = cleaned_data.get('latitude'), cleaned_data.get('longitude')
+            if latitude is not None and longitude is not None:
+                cleaned_data['center'] = (latitude, longitude)
+            else:
+                match = resolve(cleaned_data.get('location'))
+                if match:
+                    cleaned_data['center'] = match[1:]
+                else:
+                    self.add_error('location', "Enter a known city or town, or use your current location, to search by distance.")
+        return cleaned_data
+
+    def set_facet_counts(self, facets):
+        """Show the facet count next to each job type and experience level choice"""
+        for name in ('job_type', 'experience_level'):
+            field = self.fields[name]
+            field.choices = choice_labels(field.choices, facets[name])
+
+    def get_filters(self):
+        """Normalized non-empty filters of a valid form; an invalid or unbound form filters nothing"""
+        if not (self.is_bound and self.is_valid()):
+            return {}
+        filters = {}
+        for name in self.FILTER_FIELDS:
+            value = self.cleaned_data.get(name)
+            if isinstance(value, str):
+                value = ' '.join(value.lower().split())
+            elif isinstance(value, float):
+                # ~100 m is plenty for caching "near me" searches
+                value = round(value, 3)
+            if value not in (None, ''):
+                filters[name] = value
+        return filters
+
+    def describe(self):
+        """Short human-readable summary of the filters, used to name saved searches"""
+        filters = self.get_filters()
+        parts = [self.cleaned_data['query']] if filters.get('query') else []
+        if filters.get('radius_km'):
+            parts.append('within %d km of %s' % (filters['radius_km'], self.cleaned_data['location'] or 'my location'))
+        elif filters.get('location'):
+            parts.append(self.cleaned_data['location'])
+        for name, choices in (('job_type', Job.JOB_TYPES), ('experience_level', Job.EXPERIENCE_LEVELS)):
+            if filters.get(name):
+                parts.append(dict(choices)[filters[name]])
+        if 'min_salary' in filters or 'max_salary' in filters:
+            parts.append('salary %s–%s' % (filters.get('min_salary', 0), filters.get('max_salary', 'any')))
+        return ' · '.join(parts)[:100] or 'All jobs'
+
+    def get_cache_key(self, exclude=()):
+        """Stable digest of get_filters() minus exclude, for caching per distinct search"""
+        filters = {name: value for name, value in self.get_filters().items() if name not in exclude}
+        raw = json.dumps(filters, sort_keys=True, default=str)
+        return hashlib.md5(raw.encode()).hexdigest()
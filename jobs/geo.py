@@ -0,0 +1,157 @@
+"""
+Location normalization and radius search.
+
+Free-text Job.location values are matched against a small gazetteer (Place,
+loaded from jobs/data/gazetteer.csv) and the matching coordinates are stored
+on the job together with a grid cell number. A radius search first selects
+the grid cells overlapping the search circle's bounding box, which the
+geo_cell index answers directly, then computes the exact great-circle
+(haversine) distance in SQL for those candidates only, filtering and ordering
+on it.
+"""
+import csv
+import math
+import os
+import re
+
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.5
+MAX_RADIUS_KM = 500
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+_lookup = None
+
+
+def normalize_name(name):
+    return ' '.join(re.findall(r'\w+', (name or '').lower()))
+
+
+def read_gazetteer(path=GAZETTEER_PATH):
+    """Yield the rows of a gazetteer CSV as dicts ready for Place(**row)"""
+    with open(path, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            yield {
+                'name': row['name'],
+                'country': row['country'],
+                'search_name': normalize_name(row['name']),
+                'aliases': row.get('aliases') or '',
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'population': int(row.get('population') or 0),
+            }
+
+
+def grid_cell(latitude, longitude):
+    row = int((latitude + 90) // CELL_DEGREES)
+    column = int((longitude + 180) // CELL_DEGREES) % int(360 / CELL_DEGREES)
+    return row * int(360 / CELL_DEGREES) + column
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the search circle"""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6 or abs(latitude) + delta_lat >= 90:
+        delta_lon = 180
+    else:
+        delta_lon = min(180, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return (max(-90, latitude - delta_lat), min(90, latitude + delta_lat),
+            longitude - delta_lon, longitude + delta_lon)
+
+
+def cells_for_box(min_lat, max_lat, min_lon, max_lon):
+    """Grid cell numbers overlapping a bounding box (longitudes may wrap)"""
+    columns = int(360 / CELL_DEGREES)
+    cells = set()
+    row_start = int((min_lat + 90) // CELL_DEGREES)
+    row_end = int((min(max_lat, 90 - 1e-9) + 90) // CELL_DEGREES)
+    span = max_lon - min_lon
+    column_start = int((min_lon + 180) // CELL_DEGREES)
+    column_count = columns if span >= 360 else int((max_lon + 180) // CELL_DEGREES) - column_start + 1
+    for row in range(row_start, row_end + 1):
+        for offset in range(min(column_count, columns)):
+            cells.add(row * columns + (column_start + offset) % columns)
+    return cells
+
+
+def build_lookup(places):
+    """{normalized name or alias: (place_id, latitude, longitude)}, most populous place wins"""
+    lookup = {}
+    for place in sorted(places, key=lambda place: place.population):
+        names = [place.name] + [alias for alias in place.aliases.split(';') if alias.strip()]
+        for name in names:
+            lookup[normalize_name(name)] = (place.pk, place.latitude, place.longitude)
+    return lookup
+
+
+def get_lookup():
+    global _lookup
+    if _lookup is None:
+        from .models import Place
+        _lookup = build_lookup(Place.objects.all())
+    return _lookup
+
+
+def clear_lookup():
+    global _lookup
+    _lookup = None
+
+
+def resolve(location, lookup=None):
+    """
+    Resolve free text like 'Westlands, Nairobi' or 'Nairobi, Kenya' to
+    (place_id, latitude, longitude), trying the whole string and then each
+    comma-separated part from most to least specific. Returns None if unknown.
+    """
+    if lookup is None:
+        lookup = get_lookup()
+    candidates = [location] + re.split(r'[,/;|()-]', location or '')
+    for candidate in candidates:
+        match = lookup.get(normalize_name(candidate))
+        if match:
+            return match
+    return None
+
+
+def geocode_job(job, lookup=None):
+    """Fill in job.place/latitude/longitude/geo_cell from job.location"""
+    match = resolve(job.location, lookup)
+    if match:
+        job.place_id, job.latitude, job.longitude = match
+        job.geo_cell = grid_cell(job.latitude, job.longitude)
+    else:
+        job.place_id = job.latitude = job.longitude = job.geo_cell = None
+
+
+def distance_expression(latitude, longitude):
+    """Haversine distance in km from the point to each row's coordinates, computed in SQL"""
+    lat1 = math.radians(latitude)
+    half_dlat = (Radians(F('latitude')) - lat1) / 2
+    half_dlon = (Radians(F('longitude')) - math.radians(longitude)) / 2
+    a = Power(Sin(half_dlat), 2) + math.cos(lat1) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlon), 2)
+    return ExpressionWrapper(2 * EARTH_RADIUS_KM * ASin(Sqrt(a)), output_field=FloatField())
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Restrict queryset to jobs within radius_km of the point, annotated with distance_km"""
+    radius_km = min(radius_km, getattr(settings, 'JOB_SEARCH_MAX_RADIUS_KM', MAX_RADIUS_KM))
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    return (
+        queryset
+        .filter(geo_cell__in=cells_for_box(min_lat, max_lat, min_lon, max_lon),
+                latitude__range=(min_lat, max_lat))
+        .annotate(distance_km=distance_expression(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+    )
@@ -0,0 +1,108 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Company, Job
+from jobs.search import DatabaseSearchBackend, get_search_backend
+
+WORDS = (
+    'python django developer engineer senior junior backend frontend data analyst '
+    'marketing sales manager accountant nurse teacher designer product remote nairobi '
+    'mombasa kisumu cloud devops support customer finance operations logistics driver '
+    'security network mobile android ios react java golang research writer editor'
+).split()
+
+# Skills that only some postings mention, so the run includes selective terms
+# and not only the common words above that nearly every posting contains
+SKILLS = (
+    'kubernetes terraform salesforce quickbooks photoshop figma tableau spark kafka '
+    'flutter kotlin swift excel sap oracle hadoop'
+).split()
+
+QUERIES = ['python', 'senior developer', 'nairobi', 'cloud devops engineer', 'kubernetes', 'tableau analyst', 'zzzz']
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains search against the full-text index on a seeded dataset (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=20000, help='Number of jobs to seed.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query.')
+
+    def sentence(self, rng, length):
+        return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+    def seed(self, count):
+        rng = random.Random(42)
+        employer = get_user_model().objects.create_user(
+            username='benchmark-employer', password=None, user_type='employer'
+        )
+        companies = Company.objects.bulk_create([
+            Company(name=f'{self.sentence(rng, 2).title()} Ltd', description='Benchmark company')
+            for _ in range(200)
+        ])
+        deadline = timezone.now() + timedelta(days=30)
+        jobs = []
+        for _ in range(count):
+            jobs.append(Job(
+                title=self.sentence(rng, 3).title(),
+                company=rng.choice(companies),
+                employer=employer,
+                description=self.sentence(rng, 80),
+                requirements=self.sentence(rng, 30) + ' ' + ' '.join(rng.sample(SKILLS, 2)),
+                location=rng.choice(['Nairobi', 'Mombasa', 'Kisumu', 'Remote']),
+                job_type=rng.choice(Job.JOB_TYPES)[0],
+                application_deadline=deadline,
+            ))
+            if len(jobs) == 1000:
+                Job.objects.bulk_create(jobs)
+                jobs = []
+        Job.objects.bulk_create(jobs)
+
+    def best_of(self, repeat, run):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, result
+
+    def time_query(self, backend, query, repeat):
+        """Best (first page ms, count ms, hits) of the newest-first listing job_list runs"""
+        base = Job.objects.filter(is_active=True, application_deadline__gt=timezone.now())
+        matches = backend.filter(base, query)
+        page_ms, _ = self.best_of(repeat, lambda: list(
+            matches.order_by('-created_at', '-id').values_list('id', flat=True)[:10]
+        ))
+        count_ms, total = self.best_of(repeat, matches.count)
+        return page_ms, count_ms, total
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['jobs']} jobs...")
+            self.seed(options['jobs'])
+            indexed = get_search_backend().rebuild()
+            self.stdout.write(f'Indexed {indexed} jobs.\n')
+
+            # Both backends AND the terms, so they return the same jobs (the
+            # index matches term prefixes, icontains any substring)
+            old, new = DatabaseSearchBackend(), get_search_backend()
+            self.stdout.write(
+                f"{'query':<24}{'hits':>7}{'page: icontains':>17}{'index':>9}{'speedup':>9}"
+                f"{'count: icontains':>18}{'index':>9}{'speedup':>9}"
+            )
+            for query in QUERIES:
+                old_page, old_count, old_total = self.time_query(old, query, options['repeat'])
+                new_page, new_count, new_total = self.time_query(new, query, options['repeat'])
+                hits = str(new_total) if old_total == new_total else f'{old_total}!={new_total}'
+                self.stdout.write(
+                    f'{query:<24}{hits:>7}{old_page:>15.1f}ms{new_page:>7.1f}ms{old_page / new_page:>8.1f}x'
+                    f'{old_count:>16.1f}ms{new_count:>7.1f}ms{old_count / new_count:>8.1f}x'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from jobs.models import Application, ApplicationStatusCount, Job, Notification, OutboundEmail, SavedJob
+from jobs.geo import within_radius
+from jobs.search import get_search_backend
+
+
+def is_full_scan(step):
+    # "SCAN jobs_job" reads the whole table; "SCAN ... USING [COVERING] INDEX" and
+    # "SEARCH ..." are index driven, virtual tables (FTS5) plan their own access and
+    # "SCAN (subquery-1)" / "SCAN CONSTANT ROW" are not table reads.
+    return (
+        step.startswith('SCAN ')
+        and ' USING ' not in step
+        and 'VIRTUAL TABLE' not in step
+        and not step.startswith(('SCAN (', 'SCAN CONSTANT ROW'))
+    )
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN QUERY PLAN on each view's main query and fail if any falls back to a full table scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just failures.')
+
+    def view_queries(self, using):
+        """(label, queryset) pairs mirroring the hot query of each view; ids are placeholders"""
+        now = timezone.now()
+        listable = Job.objects.using(using).filter(is_active=True, application_deadline__gt=now)
+        searched = get_search_backend(using).filter(listable, 'developer')
+        employer_jobs = Job.objects.using(using).filter(employer_id=1)
+        return [
+            ('job_list', listable.order_by('-created_at', '-id')[:11]),
+            ('job_list count', listable.values('id')),
+            ('job_list search', searched.order_by('-created_at', '-id')[:11]),
+            ('job_list radius', within_radius(listable, -1.286, 36.817, 25).order_by('distance_km', '-id')[:11]),
+            ('job_list salary', listable.filter(salary__gte=50000, salary__lte=90000).order_by('-created_at', '-id')[:11]),
+            ('salary histogram closing today', Job.objects.using(using).filter(
+                is_active=True, salary__isnull=False, application_deadline__gt=now,
+                application_deadline__lt=now + timedelta(hours=6),
+            ).order_by().values_list('salary')),
+            ('job_list facets', listable.order_by().values_list('job_type', 'experience_level', 'location')
+                                        .annotate(total=Count('id'))),
+            ('employer_dashboard jobs', employer_jobs.order_by('-created_at')),
+            ('employer_dashboard active', employer_jobs.filter(is_active=True, application_deadline__gt=now)),
+            ('employer_dashboard applicant stats', ApplicationStatusCount.objects.using(using)
+                                                   .filter(job__employer_id=1, count__gt=0)
+                                                   .values('status').annotate(total=Sum('count'))),
+            ('view_applicants', Application.objects.using(using).filter(job_id=1).order_by('-applied_date', '-id')[:21]),
+            ('view_applicants status', Application.objects.using(using).filter(job_id=1, status='shortlisted')),
+            ('my_applications', Application.objects.using(using).filter(applicant_id=1)
+                                                    .order_by('-applied_date', '-id')[:11]),
+            ('saved_jobs', SavedJob.objects.using(using).filter(user_id=1).order_by('-saved_date', '-id')[:11]),
+            ('employer_notifications', Notification.objects.using(using).filter(user_id=1).order_by('-created_at', '-id')[:21]),
+            ('mark all notifications read', Notification.objects.using(using).filter(user_id=1, is_read=False).values('id')),
+            ('prune notifications', Notification.objects.using(using).filter(
+                is_read=True, created_at__lt=now,
+            ).order_by('created_at').values('id')[:1000]),
+            ('outbox due', OutboundEmail.objects.using(using).filter(
+                status=OutboundEmail.PENDING, next_attempt_at__lte=now,
+            ).order_by('next_attempt_at', 'id').values('id')[:100]),
+        ]
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN checks are only implemented for SQLite.')
+
+        failures = []
+        for label, queryset in self.view_queries(using):
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            scans = [step for step in plan if is_full_scan(step)]
+            if scans:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {label}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok         {label}'))
+            if scans or options['verbose_plans']:
+                for step in plan:
+                    self.stdout.write(f'           {step}')
+
+        if failures:
+            raise CommandError(f"{len(failures)} quer{'y' if len(failures) == 1 else 'ies'} fall back to a full scan: "
+                               + ', '.join(failures))
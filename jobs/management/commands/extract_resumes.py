@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import resume_text
+
+
+class Command(BaseCommand):
+    help = 'Extract text from queued resume files in a pool of worker processes and index it for applicant search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes parsing files.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Files claimed per batch.')
+        parser.add_argument('--timeout', type=int, default=resume_text.EXTRACT_TIMEOUT,
+                            help='Seconds before a single file is given up on.')
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Keep running and check for new files every SECONDS instead of once.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            extracted = failed = 0
+            while True:
+                batch = resume_text.process(options['batch_size'], options['workers'], options['timeout'])
+                if batch == (0, 0):
+                    break
+                extracted += batch[0]
+                failed += batch[1]
+            if extracted or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Extracted {extracted} resumes, {failed} failed or retrying, '
+                    f'in {time.monotonic() - started:.2f}s.'
+                ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['loop'])
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs import geo, search_cache
+from jobs.models import Job, Place
+
+
+class Command(BaseCommand):
+    help = 'Load places from a gazetteer CSV and re-geocode job locations against them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=geo.GAZETTEER_PATH,
+                            help='CSV with name, country, latitude, longitude, population, aliases columns.')
+        parser.add_argument('--skip-jobs', action='store_true',
+                            help='Only load the places; leave job coordinates as they are.')
+
+    def handle(self, *args, **options):
+        places = [Place(**row) for row in geo.read_gazetteer(options['path'])]
+        with transaction.atomic():
+            Place.objects.bulk_create(
+                places, update_conflicts=True, unique_fields=['name', 'country'],
+                update_fields=['search_name', 'aliases', 'latitude', 'longitude', 'population'],
+            )
+            geo.clear_lookup()
+            updated = 0
+            if not options['skip_jobs']:
+                lookup = geo.get_lookup()
+                jobs = list(Job.objects.only('id', 'location'))
+                for job in jobs:
+                    geo.geocode_job(job, lookup)
+                Job.objects.bulk_update(jobs, ['place', 'latitude', 'longitude', 'geo_cell'], batch_size=500)
+                updated = sum(1 for job in jobs if job.place_id)
+        search_cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {len(places)} places; {updated} jobs matched a place.'
+        ))
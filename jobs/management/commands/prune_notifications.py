@@ -0,0 +1,33 @@
+import gzip
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from jobs import notifications
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications older than the retention period, optionally archiving them first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--days', type=int,
+                            default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', notifications.RETENTION_DAYS),
+                            help='Keep read notifications newer than this many days.')
+        parser.add_argument('--batch-size', type=int, default=notifications.PRUNE_BATCH_SIZE,
+                            help='Notifications deleted per transaction.')
+        parser.add_argument('--archive', metavar='PATH',
+                            help='Append the deleted notifications to this JSON lines file (gzipped if it ends in .gz).')
+
+    def handle(self, *args, **options):
+        kwargs = {'days': options['days'], 'batch_size': options['batch_size'], 'using': options['database']}
+        if options['archive']:
+            opener = gzip.open if options['archive'].endswith('.gz') else open
+            with opener(options['archive'], 'at', encoding='utf-8') as archive:
+                deleted = notifications.prune(archive=archive, **kwargs)
+        else:
+            deleted = notifications.prune(**kwargs)
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {deleted} read notification{"s" if deleted != 1 else ""} older than {options["days"]} days.'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from jobs import salary
+
+
+class Command(BaseCommand):
+    help = 'Recount the salary histogram from active, unexpired jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        rows = salary.rebuild(options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt salary histogram: {rows} non-empty rows.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from jobs.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the job and applicant full-text search indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Database alias whose index should be rebuilt.')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        with transaction.atomic(using=options['database']):
+            count = backend.rebuild()
+            applications = backend.rebuild_applications()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} jobs and {applications} applications with {backend.__class__.__name__}.'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from jobs import notifications
+from jobs.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount application, job and notification counters from the source tables and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(using=options['database'])
+        fixed['notification_counters'] = notifications.reconcile(using=options['database'])
+        for counter, rows in fixed.items():
+            style = self.style.WARNING if rows else self.style.SUCCESS
+            self.stdout.write(style(f'{counter}: {rows} row{"s" if rows != 1 else ""} repaired'))
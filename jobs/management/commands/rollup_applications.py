@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from jobs import rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold applications changed since the last run into the daily analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recount every cohort from scratch instead of only the changed ones.')
+        parser.add_argument('--lag', type=int, default=rollups.DEFAULT_LAG_SECONDS,
+                            help='Leave rows newer than this many seconds for the next run.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        cohorts = rollups.refresh(full=options['full'], lag_seconds=options['lag'], using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Recounted {cohorts} job/day cohorts.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from jobs import search_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Report job search cache hit/miss ratios. Counters live in the default cache, '
+        'so they cover all processes only when that cache is shared (e.g. Redis).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after reporting.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'kind':<10}{'hits':>10}{'misses':>10}{'hit ratio':>12}")
+        for kind, (hits, misses) in search_cache.get_stats().items():
+            total = hits + misses
+            ratio = f'{hits / total:.1%}' if total else '-'
+            self.stdout.write(f'{kind:<10}{hits:>10}{misses:>10}{ratio:>12}')
+        self.stdout.write(f'Current version: {search_cache.get_version()}')
+        if options['reset']:
+            search_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
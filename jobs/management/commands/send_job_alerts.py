@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs import alerts, outbox
+from jobs.models import JobAlertMatch
+
+
+class Command(BaseCommand):
+    help = ('Match newly posted jobs against saved searches, then queue one outbox email per job seeker '
+            'with their new matches; send_outbox delivers them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Digests queued per transaction; each batch is marked emailed as it is queued.')
+        parser.add_argument('--site-url', default=getattr(settings, 'SITE_URL', ''),
+                            help='Absolute URL prefix for job links, e.g. https://jobs.example.com')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be sent without sending.')
+        parser.add_argument('--match-only', action='store_true',
+                            help='Match queued jobs and notify users in the app, without queueing digests.')
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            jobs, matched = alerts.match_pending()
+            if jobs:
+                self.stdout.write(f'Matched {jobs} new job{"s" if jobs != 1 else ""} to {matched} saved searches.')
+        if options['match_only']:
+            return
+
+        pending = (
+            JobAlertMatch.objects.filter(emailed_at__isnull=True, saved_search__email_alerts=True)
+            .select_related('saved_search__user', 'job__company')
+            .order_by('saved_search__user_id', '-job__created_at')
+        )
+        digests = {}
+        for match in pending:
+            digests.setdefault(match.saved_search.user, []).append(match)
+
+        if options['dry_run']:
+            for user, matches in digests.items():
+                self.stdout.write(f'{user.email or user.username}: {len(matches)} jobs')
+            return
+
+        queued = 0
+        users = list(digests)
+        for start in range(0, len(users), options['batch_size']):
+            batch = users[start:start + options['batch_size']]
+            emails, match_ids = [], []
+            for user in batch:
+                matches = self.unique_jobs(digests[user])
+                match_ids.extend(match.id for match in digests[user])
+                if not user.email:
+                    continue
+                emails.append(outbox.build(
+                    user.email,
+                    f"{len(matches)} new job{'s' if len(matches) != 1 else ''} matching your searches",
+                    'emails/job_alert_digest.html',
+                    {'user': user, 'matches': matches, 'site_url': options['site_url']},
+                    kind='job_alert_digest',
+                ))
+            # The digests and their emailed_at commit together, so a failed run
+            # neither repeats a batch that was queued nor skips one that wasn't
+            with transaction.atomic():
+                queued += len(outbox.enqueue(emails))
+                JobAlertMatch.objects.filter(id__in=match_ids).update(emailed_at=timezone.now())
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} job alert digests.'))
+
+    @staticmethod
+    def unique_jobs(matches):
+        """A job matching several of a user's searches is listed once"""
+        seen = set()
+        unique = []
+        for match in matches:
+            if match.job_id not in seen:
+                seen.add(match.job_id)
+                unique.append(match)
+        return unique
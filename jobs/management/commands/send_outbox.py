@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox over one SMTP connection, retrying failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails claimed and sent per batch.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches per pass.')
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Keep running and poll for due emails every SECONDS instead of once.')
+        parser.add_argument('--stats', action='store_true', help='Print the queue depth and exit.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['stats']:
+            self.print_stats()
+            return
+
+        while True:
+            started = time.monotonic()
+            sent, retried, dead = outbox.drain(
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches'],
+                on_batch=self.report_batch,
+            )
+            if sent or retried or dead or not options['loop']:
+                elapsed = time.monotonic() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f'Sent {sent}, retrying {retried}, dead-lettered {dead} '
+                    f'in {elapsed:.2f}s ({sent / elapsed if elapsed else 0:.1f} emails/s).'
+                ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['loop'])
+
+    def report_batch(self, sent, retried, dead, seconds):
+        if self.verbosity >= 2:
+            self.stdout.write(
+                f'  batch: {sent} sent, {retried} retrying, {dead} dead in {seconds * 1000:.0f} ms'
+            )
+
+    def print_stats(self):
+        stats = outbox.stats()
+        age = stats.pop('oldest_due_age')
+        for status, count in stats.items():
+            self.stdout.write(f'{status}: {count}')
+        self.stdout.write(f'oldest due: {age or "-"}')
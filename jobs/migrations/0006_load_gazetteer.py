@@ -0,0 +1,83 @@
+import csv
+import os
+import re
+
+from django.db import migrations
+
+# The geocoding rules as of this migration, kept here so later changes to
+# jobs.geo don't change what it does
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'gazetteer.csv')
+CELL_DEGREES = 0.5
+
+
+def normalize_name(name):
+    return ' '.join(re.findall(r'\w+', (name or '').lower()))
+
+
+def read_gazetteer():
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            yield {
+                'name': row['name'],
+                'country': row['country'],
+                'search_name': normalize_name(row['name']),
+                'aliases': row.get('aliases') or '',
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'population': int(row.get('population') or 0),
+            }
+
+
+def build_lookup(places):
+    lookup = {}
+    for place in sorted(places, key=lambda place: place.population):
+        names = [place.name] + [alias for alias in place.aliases.split(';') if alias.strip()]
+        for name in names:
+            lookup[normalize_name(name)] = (place.pk, place.latitude, place.longitude)
+    return lookup
+
+
+def geocode_job(job, lookup):
+    for candidate in [job.location] + re.split(r'[,/;|()-]', job.location or ''):
+        match = lookup.get(normalize_name(candidate))
+        if match:
+            job.place_id, job.latitude, job.longitude = match
+            row = int((job.latitude + 90) // CELL_DEGREES)
+            column = int((job.longitude + 180) // CELL_DEGREES) % int(360 / CELL_DEGREES)
+            job.geo_cell = row * int(360 / CELL_DEGREES) + column
+            return
+
+
+def load_gazetteer(apps, schema_editor):
+    Place = apps.get_model('jobs', 'Place')
+    Job = apps.get_model('jobs', 'Job')
+    db_alias = schema_editor.connection.alias
+    Place.objects.using(db_alias).bulk_create(
+        [Place(**row) for row in read_gazetteer()], ignore_conflicts=True,
+    )
+    lookup = build_lookup(Place.objects.using(db_alias).all())
+    jobs = list(Job.objects.using(db_alias).only('id', 'location'))
+    for job in jobs:
+        geocode_job(job, lookup)
+    Job.objects.using(db_alias).bulk_update(
+        jobs, ['place', 'latitude', 'longitude', 'geo_cell'], batch_size=500,
+    )
+
+
+def unload_gazetteer(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Place = apps.get_model('jobs', 'Place')
+    db_alias = schema_editor.connection.alias
+    Job.objects.using(db_alias).update(place=None, latitude=None, longitude=None, geo_cell=None)
+    Place.objects.using(db_alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_job_places'),
+    ]
+
+    operations = [
+        migrations.RunPython(load_gazetteer, unload_gazetteer),
+    ]
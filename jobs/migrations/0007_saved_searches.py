@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_load_gazetteer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='related_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='jobs.job'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('application_status', 'Application Status Update'), ('interview', 'Interview Invitation'), ('message', 'Message'), ('system', 'System Notification'), ('job_alert', 'Job Alert')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('filters', models.JSONField(default=dict)),
+                ('filters_key', models.CharField(max_length=32)),
+                ('match_key', models.CharField(db_index=True, editable=False, max_length=40)),
+                ('email_alerts', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Saved searches',
+                'ordering': ['-created_at'],
+                'unique_together': {('user', 'filters_key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobAlertMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('emailed_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='jobs.job')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='jobs.savedsearch')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('emailed_at__isnull', True)), fields=['emailed_at'], name='jobalert_pending_idx')],
+                'unique_together': {('saved_search', 'job')},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:32
+
+from django.conf import settings
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_histogram(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    SalaryHistogram = apps.get_model('jobs', 'SalaryHistogram')
+    db_alias = schema_editor.connection.alias
+    # The bucketing of jobs.salary as of this migration
+    width = getattr(settings, 'JOB_SALARY_BUCKET_WIDTH', 10000)
+    last_bucket = getattr(settings, 'JOB_SALARY_BUCKET_COUNT', 30) - 1
+    totals = Counter(
+        (job_type, experience_level, min(int(salary // width), last_bucket), timezone.localdate(deadline))
+        for salary, job_type, experience_level, deadline in
+        Job.objects.using(db_alias)
+        .filter(is_active=True, salary__isnull=False, application_deadline__gt=timezone.now())
+        .values_list('salary', 'job_type', 'experience_level', 'application_deadline')
+    )
+    SalaryHistogram.objects.using(db_alias).bulk_create([
+        SalaryHistogram(job_type=job_type, experience_level=experience_level, bucket=bucket,
+                        deadline_date=deadline_date, count=total)
+        for (job_type, experience_level, bucket, deadline_date), total in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_saved_searches'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('full_time', 'Full Time'), ('part_time', 'Part Time'), ('contract', 'Contract'), ('internship', 'Internship'), ('remote', 'Remote')], max_length=20)),
+                ('experience_level', models.CharField(choices=[('entry', 'Entry Level'), ('mid', 'Mid Level'), ('senior', 'Senior Level')], max_length=20)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('deadline_date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['salary'], name='job_active_salary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryhistogram',
+            index=models.Index(fields=['deadline_date', 'bucket'], name='salaryhistogram_live_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='salaryhistogram',
+            unique_together={('job_type', 'experience_level', 'bucket', 'deadline_date')},
+        ),
+        migrations.RunPython(populate_histogram, migrations.RunPython.noop),
+    ]
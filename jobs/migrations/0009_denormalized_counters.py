@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def populate_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Company = apps.get_model('jobs', 'Company')
+    Application = apps.get_model('jobs', 'Application')
+    ApplicationStatusCount = apps.get_model('jobs', 'ApplicationStatusCount')
+    db_alias = schema_editor.connection.alias
+    Job.objects.using(db_alias).update(application_count=count_subquery(Application, 'job'))
+    Company.objects.using(db_alias).update(job_count=count_subquery(Job, 'company'))
+    ApplicationStatusCount.objects.using(db_alias).bulk_create([
+        ApplicationStatusCount(job_id=job_id, status=status, count=total)
+        for job_id, status, total in Application.objects.using(db_alias).order_by()
+        .values_list('job_id', 'status').annotate(total=Count('id'))
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_salary_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='application_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ApplicationStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('under_review', 'Under Review'), ('shortlisted', 'Shortlisted'), ('rejected', 'Rejected'), ('accepted', 'Accepted'), ('interview_scheduled', 'Interview Scheduled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counts', to='jobs.job')),
+            ],
+            options={
+                'unique_together': {('job', 'status')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Notification = apps.get_model('jobs', 'Notification')
+    NotificationCounter = apps.get_model('jobs', 'NotificationCounter')
+    db_alias = schema_editor.connection.alias
+    NotificationCounter.objects.using(db_alias).bulk_create([
+        NotificationCounter(user_id=user_id, notification_type=notification_type, total=total, unread=unread)
+        for user_id, notification_type, total, unread in Notification.objects.using(db_alias).order_by()
+        .values_list('user_id', 'notification_type')
+        .annotate(total=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_email_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('application_status', 'Application Status Update'), ('interview', 'Interview Invitation'), ('message', 'Message'), ('system', 'System Notification'), ('job_alert', 'Job Alert')], max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['created_at'], name='notification_read_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_counters', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='notificationcounter',
+            unique_together={('user', 'notification_type')},
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+def queue_resumes(apps, schema_editor):
+    Application = apps.get_model('jobs', 'Application')
+    ResumeText = apps.get_model('jobs', 'ResumeText')
+    using = schema_editor.connection.alias
+    files = Application.objects.using(using).exclude(resume='').values_list('resume', flat=True).distinct()
+    ResumeText.objects.using(using).bulk_create([ResumeText(file=name) for name in files], ignore_conflicts=True)
+
+
+def create_applicant_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_application_fts USING fts5("
+        "applicant, email, cover_letter, resume, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    # Resume text is filled in as extract_resumes processes the queued files
+    schema_editor.execute(
+        "INSERT INTO jobs_application_fts (rowid, applicant, email, cover_letter, resume) "
+        "SELECT a.id, u.username || ' ' || u.first_name || ' ' || u.last_name, u.email, a.cover_letter, '' "
+        "FROM jobs_application a INNER JOIN users_customuser u ON u.id = a.applicant_id"
+    )
+
+
+def drop_applicant_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS jobs_application_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_notification_counters'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=255, unique=True)),
+                ('text', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Extracted'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='resumetext_pending_idx')],
+            },
+        ),
+        migrations.RunPython(queue_resumes, migrations.RunPython.noop),
+        migrations.RunPython(create_applicant_index, drop_applicant_index),
+    ]
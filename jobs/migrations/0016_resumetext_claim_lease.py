@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_job_active_closing_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumetext',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='resumetext',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
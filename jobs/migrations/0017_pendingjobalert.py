@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_resumetext_claim_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingJobAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='jobs.job')),
+            ],
+        ),
+    ]
@@ -6,6 +6,10 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import FileExtensionValidator, MinValueValidator
 from django.utils import timezone
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .alerts import match_key
 
 class Company(models.Model):
     name = models.CharField(max_length=200)
@@ -13,10 +17,29 @@ class Company(models.Model):
     website = models.URLField(blank=True)
     logo = models.ImageField(upload_to='company_logos/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by signals (see jobs/counters.py)
+    job_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
+class Place(models.Model):
+    """Gazetteer entry that free-text job locations are normalized to"""
+    name = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    search_name = models.CharField(max_length=100, db_index=True)
+    aliases = models.CharField(max_length=200, blank=True, help_text="Semicolon-separated alternative names")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    population = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['name', 'country']
+        ordering = ['-population']
+
+    def __str__(self):
+        return f"{self.name}, {self.country}"
+
 class Job(models.Model):
     JOB_TYPES = [
         ('full_time', 'Full Time'),
@@ -52,6 +75,15 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Geocoded from `location` against the gazetteer on save (see jobs/geo.py)
+    place = models.ForeignKey(Place, on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+
+    # Maintained by signals (see jobs/counters.py)
+    application_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return f"{self.title} at {self.company.name}"
 
@@ -60,6 +92,37 @@ class Job(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Public listings: active, not past the deadline, newest first
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True),
+                         name='job_active_recent_idx'),
+            models.Index(fields=['is_active', 'application_deadline'], name='job_active_deadline_idx'),
+            # Employer views
+            models.Index(fields=['employer', 'is_active'], name='job_employer_active_idx'),
+            models.Index(fields=['employer', '-created_at'], name='job_employer_recent_idx'),
+            # Salary range filters
+            models.Index(fields=['salary'], condition=models.Q(is_active=True), name='job_active_salary_idx'),
+            # Salary histogram: active jobs closing later today
+            models.Index(fields=['application_deadline'], condition=models.Q(is_active=True),
+                         name='job_active_closing_idx'),
+        ]
+
+class SalaryHistogram(models.Model):
+    """Active jobs per salary bucket, kept current by signals (see jobs/salary.py)"""
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPES)
+    experience_level = models.CharField(max_length=20, choices=Job.EXPERIENCE_LEVELS)
+    bucket = models.PositiveSmallIntegerField()
+    deadline_date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['job_type', 'experience_level', 'bucket', 'deadline_date']
+        indexes = [
+            models.Index(fields=['deadline_date', 'bucket'], name='salaryhistogram_live_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type}/{self.experience_level} bucket {self.bucket} until {self.deadline_date}: {self.count}"
 
 class Application(models.Model):
     STATUS_CHOICES = [
@@ -103,6 +166,9 @@ class SavedJob(models.Model):
 
     class Meta:
         unique_together = ['job', 'user']
+        indexes = [
+            models.Index(fields=['user', '-saved_date', '-id'], name='savedjob_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} saved {self.job.title}"
@@ -123,9 +189,11 @@ class Application(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applicant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='applications')
     cover_letter = models.TextField()
+    # Indexed: media access checks and resume text indexing look applications up by file
     resume = models.FileField(
         upload_to='applications/resumes/',
-        validators=[FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])]
+        validators=[FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])],
+        db_index=True,
     )
     applied_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted')
@@ -139,6 +207,13 @@ class Application(models.Model):
     class Meta:
         unique_together = ['job', 'applicant']
         ordering = ['-applied_date']
+        indexes = [
+            models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+            models.Index(fields=['job', '-applied_date', '-id'], name='application_job_recent_idx'),
+            models.Index(fields=['applicant', '-applied_date', '-id'], name='application_applicant_idx'),
+            # Incremental rollups (jobs/rollups.py) read rows changed since a watermark
+            models.Index(fields=['last_status_update'], name='application_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.applicant.username} - {self.job.title}"
@@ -148,12 +223,76 @@ class Application(models.Model):
         self.notified_at = timezone.now()
         self.save()
 
+class ResumeText(models.Model):
+    """Plain text extracted from a stored resume file, one row per file (see jobs/resume_text.py)"""
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Extracted'),
+        (FAILED, 'Failed'),
+    ]
+
+    file = models.CharField(max_length=255, unique=True)
+    text = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    # The extract_resumes run working on this file, until claimed_until passes
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='resumetext_pending_idx', condition=models.Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.file} ({self.status})"
+
+class ApplicationStatusCount(models.Model):
+    """Applications per job and status, maintained by signals (see jobs/counters.py)"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='status_counts')
+    status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['job', 'status']
+
+    def __str__(self):
+        return f"{self.job.title} - {self.status}: {self.count}"
+
+class ApplicationDailyRollup(models.Model):
+    """Applications per job, day applied and current status (see jobs/rollups.py)"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['job', 'day', 'status']
+
+    def __str__(self):
+        return f"{self.job.title} {self.day} {self.status}: {self.count}"
+
+class RollupWatermark(models.Model):
+    """How far an incremental rollup has processed its source rows"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
         ('application_status', 'Application Status Update'),
         ('interview', 'Interview Invitation'),
         ('message', 'Message'),
         ('system', 'System Notification'),
+        ('job_alert', 'Job Alert'),
     ]
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
@@ -161,11 +300,113 @@ class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     related_application = models.ForeignKey(Application, on_delete=models.CASCADE, null=True, blank=True)
+    related_job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notification_inbox_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_page_idx'),
+            models.Index(fields=['created_at'], name='notification_read_idx', condition=models.Q(is_read=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.title}"
+
+class NotificationCounter(models.Model):
+    """Notifications per user and type, maintained by jobs/notifications.py"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notification_counters')
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    total = models.IntegerField(default=0)
+    unread = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'notification_type']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.notification_type}: {self.unread}/{self.total}"
+
+class SavedSearch(models.Model):
+    """A job seeker's saved search filters, alerted when a matching job is posted"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100)
+    filters = models.JSONField(default=dict)
+    filters_key = models.CharField(max_length=32)
+    match_key = models.CharField(max_length=40, db_index=True, editable=False)
+    email_alerts = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'filters_key']
+        ordering = ['-created_at']
+        verbose_name_plural = 'Saved searches'
+
+    def save(self, *args, **kwargs):
+        self.match_key = match_key(self.filters)
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('job_list') + '?' + urlencode(self.filters)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name}"
+
+class JobAlertMatch(models.Model):
+    """A new job that matched a saved search; emailed_at is set once its digest is queued in the outbox"""
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    emailed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['saved_search', 'job']
+        indexes = [
+            models.Index(fields=['emailed_at'], name='jobalert_pending_idx', condition=models.Q(emailed_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.job.title} matched {self.saved_search.name}"
+
+class PendingJobAlert(models.Model):
+    """A newly posted job waiting for send_job_alerts to match it against saved searches (see jobs/alerts.py)"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.job.title} (alerts pending)"
+
+class OutboundEmail(models.Model):
+    """An email waiting to be sent by the send_outbox worker (see jobs/outbox.py)"""
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead letter'),
+    ]
+
+    kind = models.CharField(max_length=50, blank=True)
+    from_email = models.CharField(max_length=254)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='outbox_due_idx', condition=models.Q(status='pending')),
+            models.Index(fields=['claimed_by'], name='outbox_claim_idx', condition=models.Q(status='pending')),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.title}"
\ No newline at end of file
+        return f"{self.to_email} - {self.subject} ({self.status})"
@@ -0,0 +1,223 @@
+"""
+Notification inbox.
+
+Everything that creates, reads or deletes notifications goes through here so
+NotificationCounter (total and unread per user and type) stays in step with
+the notification table: the badge and the inbox header read those few rows
+instead of counting a user's whole history. create() bulk-inserts and bumps
+the counters in the same transaction, then publishes the new notifications
+to connected browsers once it commits (see jobs/broker.py); mark_all_read()
+is one UPDATE over the unread part of the inbox index followed by a recount
+of just that user's counters; prune() deletes old read notifications in
+batches, optionally archiving them first.
+
+Deletes are uncounted by a post_delete receiver (see jobs/signals.py), so
+notifications that disappear by cascade with a job or application leave
+the badge right too. reconcile() recounts every counter after changes that
+bypass signals; the nightly reconcile_counters job (see settings.py) runs it.
+"""
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .pagination import CursorPaginator
+
+RETENTION_DAYS = 90
+PRUNE_BATCH_SIZE = 1000
+INBOX_PAGE_SIZE = 20
+
+
+def _adjust(user_id, notification_type, total, unread, using='default'):
+    from .models import NotificationCounter
+
+    rows = NotificationCounter.objects.using(using).filter(user_id=user_id, notification_type=notification_type)
+    # Floored at 0 so a counter that has drifted low never shows a negative badge
+    if rows.update(total=Greatest(F('total') + total, 0), unread=Greatest(F('unread') + unread, 0)) or total < 0:
+        return
+    try:
+        with transaction.atomic(using=using):
+            NotificationCounter.objects.using(using).create(
+                user_id=user_id, notification_type=notification_type, total=total, unread=unread,
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(total=F('total') + total, unread=F('unread') + unread)
+
+
+def create(notifications, using='default'):
+    """Insert unsaved Notifications in one statement and count them; returns them"""
+    from .models import Notification
+
+    totals, unread = Counter(), Counter()
+    for notification in notifications:
+        key = (notification.user_id, notification.notification_type)
+        totals[key] += 1
+        unread[key] += not notification.is_read
+    with transaction.atomic(using=using):
+        created = Notification.objects.using(using).bulk_create(notifications)
+        for (user_id, notification_type), total in totals.items():
+            _adjust(user_id, notification_type, total, unread[(user_id, notification_type)], using)
+        transaction.on_commit(lambda: publish(created), using=using)
+    return created
+
+
+def removed(notification, using='default'):
+    """Uncount a deleted notification"""
+    _adjust(notification.user_id, notification.notification_type, -1, -(not notification.is_read), using)
+
+
+def as_event(notification):
+    """The JSON-serializable form pushed to the notification stream"""
+    return {
+        'id': notification.id,
+        'type': notification.notification_type,
+        'type_display': notification.get_notification_type_display(),
+        'title': notification.title,
+        'message': notification.message,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def publish(notifications):
+    from .broker import get_broker
+
+    broker = get_broker()
+    for notification in notifications:
+        broker.publish(notification.user_id, as_event(notification))
+
+
+def notify(user, notification_type, title, message, **related):
+    """Create a single notification"""
+    from .models import Notification
+
+    return create([Notification(
+        user_id=getattr(user, 'pk', user), notification_type=notification_type,
+        title=title, message=message, **related,
+    )])[0]
+
+
+def counts(user, using='default'):
+    """{'total', 'unread', 'by_type': {type: {'total', 'unread'}}} from the counters"""
+    from .models import NotificationCounter
+
+    by_type = {
+        notification_type: {'total': total, 'unread': unread}
+        for notification_type, total, unread in NotificationCounter.objects.using(using)
+        .filter(user=user).values_list('notification_type', 'total', 'unread')
+    }
+    return {
+        'total': sum(row['total'] for row in by_type.values()),
+        'unread': sum(row['unread'] for row in by_type.values()),
+        'by_type': by_type,
+    }
+
+
+def unread_count(user, using='default'):
+    return counts(user, using)['unread']
+
+
+def inbox(user, notification_type=None, cursor=None, per_page=INBOX_PAGE_SIZE, totals=None):
+    """A keyset page of user's notifications, newest first"""
+    from .models import Notification
+
+    notifications = Notification.objects.filter(user=user).select_related('related_application__job', 'related_job')
+    totals = totals or counts(user)
+    count = totals['total']
+    if notification_type:
+        notifications = notifications.filter(notification_type=notification_type)
+        count = totals['by_type'].get(notification_type, {}).get('total', 0)
+    paginator = CursorPaginator(notifications, per_page, ordering=('-created_at', '-id'), count=count)
+    return paginator.get_page(cursor)
+
+
+def mark_read(user, notification_id, using='default'):
+    """Mark one notification read; returns whether it was unread"""
+    from .models import Notification
+
+    with transaction.atomic(using=using):
+        unread = Notification.objects.using(using).filter(user=user, id=notification_id, is_read=False)
+        notification_type = unread.values_list('notification_type', flat=True).first()
+        if notification_type is None or not unread.update(is_read=True):
+            return False
+        _adjust(getattr(user, 'pk', user), notification_type, 0, -1, using)
+    return True
+
+
+def mark_all_read(user, notification_type=None, using='default'):
+    """Mark every unread notification (of one type) read in one UPDATE; returns how many"""
+    from .models import Notification, NotificationCounter
+
+    unread = Notification.objects.using(using).filter(user=user, is_read=False)
+    counters = NotificationCounter.objects.using(using).filter(user=user)
+    if notification_type:
+        unread = unread.filter(notification_type=notification_type)
+        counters = counters.filter(notification_type=notification_type)
+    with transaction.atomic(using=using):
+        updated = unread.update(is_read=True)
+        # Recount rather than zero, so a notification committed in between is not lost
+        counters.update(unread=Coalesce(Subquery(
+            Notification.objects.using(using).filter(
+                user=OuterRef('user'), notification_type=OuterRef('notification_type'), is_read=False,
+            ).order_by().values('user').annotate(total=Count('id')).values('total')
+        ), Value(0)))
+    return updated
+
+
+def prune(days=None, batch_size=PRUNE_BATCH_SIZE, archive=None, using='default'):
+    """
+    Delete read notifications older than ``days`` (NOTIFICATION_RETENTION_DAYS
+    by default) in batches, writing each one to the ``archive`` file object as
+    a JSON line first if given. Returns the number deleted.
+    """
+    from .models import Notification
+
+    if days is None:
+        days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', RETENTION_DAYS)
+    cutoff = timezone.now() - timedelta(days=days)
+    expired = Notification.objects.using(using).filter(is_read=True, created_at__lt=cutoff)
+    fields = [field.attname for field in Notification._meta.concrete_fields]
+    deleted = 0
+    while True:
+        with transaction.atomic(using=using):
+            rows = list(expired.order_by('created_at').values(*fields)[:batch_size])
+            if not rows:
+                break
+            if archive is not None:
+                for row in rows:
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            # Uncounted row by row by the post_delete receiver
+            Notification.objects.using(using).filter(id__in=[row['id'] for row in rows]).delete()
+        deleted += len(rows)
+    return deleted
+
+
+def reconcile(using='default'):
+    """Recount every notification counter; returns the number of rows repaired"""
+    from .models import Notification, NotificationCounter
+
+    with transaction.atomic(using=using):
+        actual = {
+            (user_id, notification_type): (total, unread)
+            for user_id, notification_type, total, unread in Notification.objects.using(using).order_by()
+            .values_list('user_id', 'notification_type')
+            .annotate(total=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+        }
+        stale = []
+        for row in NotificationCounter.objects.using(using).all():
+            row_total, row_unread = actual.pop((row.user_id, row.notification_type), (0, 0))
+            if (row.total, row.unread) != (row_total, row_unread):
+                row.total, row.unread = row_total, row_unread
+                stale.append(row)
+        NotificationCounter.objects.using(using).bulk_update(stale, ['total', 'unread'], batch_size=500)
+        NotificationCounter.objects.using(using).bulk_create([
+            NotificationCounter(user_id=user_id, notification_type=notification_type, total=total, unread=unread)
+            for (user_id, notification_type), (total, unread) in actual.items()
+        ])
+    return len(stale) + len(actual)
@@ -0,0 +1,252 @@
+"""
+Transactional email outbox.
+
+Views never talk to SMTP. enqueue() writes an OutboundEmail row with the
+already rendered message, inside whatever transaction made the change the
+email is about, so the email exists if and only if that change committed.
+The send_outbox worker drains the table: claim() leases a batch of due rows
+by pushing their next_attempt_at forward and stamping them with a claim
+token in one UPDATE (several workers can run, and a worker that dies just
+lets its lease expire), then deliver() sends the batch over one SMTP
+connection. Failures are retried with exponential backoff; a message that
+still fails after EMAIL_OUTBOX_MAX_ATTEMPTS tries, or that the server
+refuses with a permanent (5xx) reply, is kept as a dead letter for the
+admin to inspect and requeue. Temporary (4xx) refusals such as greylisting
+are retried like any other failure.
+
+A failure of the connection itself (DNS, refused, timeout) is not the
+message's fault, so it stops the batch: the email being sent is retried with
+backoff, the rest of the batch waits for the same time without an attempt
+counted against it, and drain() stops instead of reconnecting for each
+email.
+"""
+import smtplib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db.models import Count, Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 6 * 60 * 60
+LEASE_SECONDS = 300
+
+# Refusals of one message; the connection itself is still usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class ServerUnavailable(Exception):
+    """deliver() stopped its batch because the connection failed; outcome is (sent, retried, dead)"""
+
+    def __init__(self, error, outcome):
+        super().__init__(error)
+        self.outcome = outcome
+
+
+def get_max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', MAX_ATTEMPTS)
+
+
+def is_permanent(error):
+    """Whether the server refused the message for good (a 5xx reply) rather than for now"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(code >= 500 for code in codes)
+    if isinstance(error, MESSAGE_ERRORS):
+        return error.smtp_code >= 500
+    return False
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the given number of failed attempts"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', RETRY_BASE_SECONDS)
+    ceiling = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', RETRY_MAX_SECONDS)
+    return min(base * 2 ** (attempts - 1), ceiling)
+
+
+def build(to_email, subject, template_name, context, kind='', from_email=None):
+    """An unsaved OutboundEmail with the template rendered as its HTML part"""
+    from .models import OutboundEmail
+
+    html_body = render_to_string(template_name, context)
+    return OutboundEmail(
+        kind=kind,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to_email=to_email,
+        subject=subject,
+        body=strip_tags(html_body),
+        html_body=html_body,
+    )
+
+
+def enqueue(emails):
+    """Queue unsaved OutboundEmails in one INSERT; call it inside the transaction they belong to"""
+    from .models import OutboundEmail
+
+    return OutboundEmail.objects.bulk_create([email for email in emails if email.to_email])
+
+
+def application_status_email(application, old_status, new_status):
+    return build(
+        application.applicant.email,
+        f'Application Status Update - {application.job.title}',
+        'emails/application_status_update.html',
+        {
+            'applicant': application.applicant,
+            'job': application.job,
+            'old_status': old_status,
+            'new_status': new_status,
+            'application': application,
+            'company': application.job.company,
+        },
+        kind='application_status',
+    )
+
+
+def claim(batch_size, lease_seconds=LEASE_SECONDS):
+    """Lease up to batch_size due emails to this caller and return them"""
+    from .models import OutboundEmail
+
+    now = timezone.now()
+    pending = OutboundEmail.objects.filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+    due = list(pending.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not due:
+        return []
+    token = uuid.uuid4().hex
+    # Re-checking next_attempt_at makes this a compare-and-set against other workers
+    pending.filter(id__in=due).update(
+        claimed_by=token, next_attempt_at=now + timedelta(seconds=lease_seconds),
+    )
+    return list(OutboundEmail.objects.filter(status=OutboundEmail.PENDING, claimed_by=token).order_by('id'))
+
+
+def to_message(email, connection):
+    message = mail.EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def deliver(emails, connection):
+    """
+    Send claimed emails over an open connection and record each outcome.
+    Returns (sent, retried, dead); raises ServerUnavailable, once the
+    outcomes are saved, if the connection failed.
+    """
+    from .models import OutboundEmail
+
+    sent, retried, dead, released = [], [], [], []
+    unavailable = None
+    for index, email in enumerate(emails):
+        email.attempts += 1
+        try:
+            # Reconnects only if an earlier batch's failure dropped the connection
+            connection.open()
+            if not connection.send_messages([to_message(email, connection)]):
+                raise smtplib.SMTPException('Message was not accepted')
+        except Exception as e:
+            email.last_error = f'{type(e).__name__}: {e}'
+            retry_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+            if is_permanent(e) or email.attempts >= get_max_attempts():
+                email.status = OutboundEmail.DEAD
+                dead.append(email)
+            else:
+                email.next_attempt_at = retry_at
+                retried.append(email)
+            if not isinstance(e, MESSAGE_ERRORS):
+                connection.close()
+                unavailable = e
+                # Untried: no attempt counted, due again with the failed email
+                released = emails[index + 1:]
+                for untried in released:
+                    untried.next_attempt_at = retry_at
+                    untried.claimed_by = ''
+        else:
+            email.status = OutboundEmail.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            sent.append(email)
+        email.claimed_by = ''
+        if unavailable:
+            break
+
+    OutboundEmail.objects.bulk_update(
+        sent + retried + dead + released,
+        ['status', 'attempts', 'next_attempt_at', 'claimed_by', 'last_error', 'sent_at'],
+    )
+    outcome = (len(sent), len(retried), len(dead))
+    if unavailable:
+        raise ServerUnavailable(unavailable, outcome)
+    return outcome
+
+
+def drain(batch_size=100, max_batches=None, connection=None, on_batch=None):
+    """
+    Send due emails batch by batch over one connection until none are due,
+    or until the server is unreachable; the emails left are then not due
+    until the backoff has passed, so a --loop worker idles meanwhile.
+    on_batch(sent, retried, dead, seconds) is called after each batch.
+    Returns the (sent, retried, dead) totals.
+    """
+    totals = [0, 0, 0]
+    batches = 0
+    # Not opened here: deliver() connects on first use, so an unreachable
+    # server becomes retries with backoff rather than an exception
+    connection = connection or mail.get_connection()
+    try:
+        while max_batches is None or batches < max_batches:
+            emails = claim(batch_size)
+            if not emails:
+                break
+            started = time.monotonic()
+            try:
+                outcome = deliver(emails, connection)
+                unavailable = False
+            except ServerUnavailable as e:
+                outcome = e.outcome
+                unavailable = True
+            for index, count in enumerate(outcome):
+                totals[index] += count
+            batches += 1
+            if on_batch:
+                on_batch(*outcome, time.monotonic() - started)
+            if unavailable:
+                break
+    finally:
+        connection.close()
+    return tuple(totals)
+
+
+def requeue(emails):
+    """Give dead letters a fresh set of attempts"""
+    from .models import OutboundEmail
+
+    return emails.filter(status=OutboundEmail.DEAD).update(
+        status=OutboundEmail.PENDING, attempts=0, next_attempt_at=timezone.now(), claimed_by='',
+    )
+
+
+def stats():
+    """Queue depth per status and how long the oldest due email has waited"""
+    from .models import OutboundEmail
+
+    counts = dict(OutboundEmail.objects.order_by().values_list('status').annotate(total=Count('id')))
+    oldest = OutboundEmail.objects.filter(
+        status=OutboundEmail.PENDING, next_attempt_at__lte=timezone.now(),
+    ).aggregate(oldest=Min('created_at'))['oldest']
+    return {
+        **{status: counts.get(status, 0) for status, _ in OutboundEmail.STATUS_CHOICES},
+        'oldest_due_age': timezone.now() - oldest if oldest else None,
+    }
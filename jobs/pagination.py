@@ -0,0 +1,187 @@
+"""
+Cursor (keyset) pagination.
+
+Django's Paginator runs a COUNT(*) and an OFFSET scan for every page, so deep
+pages cost as much as reading every row before them. CursorPaginator instead
+seeks past the last row of the current page using the ordering columns, which
+an index on those columns answers directly. Cursors are opaque tokens so the
+URL never exposes the keyset values.
+"""
+import base64
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _json_default(value):
+    # Full microsecond precision: the keyset compares these values for equality
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(repr(value))
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, default=_json_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if not isinstance(data, dict):
+        raise InvalidCursor(token)
+    return data
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by keyset on ``ordering``, which must end in a unique
+    column (normally ``-id``). Pass ``ordering=None`` to page an already
+    ordered queryset (e.g. by relevance) with offset cursors instead.
+
+    ``count`` is exact unless ``count_key`` is given, in which case the total
+    is cached under that key for ``count_timeout`` seconds; callers pick a key
+    that identifies the filter, since querysets with ``now()`` in them never
+    compare equal. ``count_cache`` replaces cache.get_or_set for that lookup.
+    Pass ``count`` when the total is already known (e.g. from a counter).
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'),
+                 count_key=None, count_timeout=300, count_cache=None, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering) if ordering else None
+        self.count_key = count_key
+        self.count_timeout = count_timeout
+        self.count_cache = count_cache
+        if count is not None:
+            self._count = count
+        if self.ordering:
+            self.queryset = queryset.order_by(*self.ordering)
+
+    @property
+    def count(self):
+        if not hasattr(self, '_count'):
+            if self.count_key and self.count_cache:
+                self._count = self.count_cache(self.count_key, self.queryset.count, self.count_timeout)
+            elif self.count_key:
+                key = 'pagination:count:%s' % self.count_key
+                self._count = cache.get_or_set(key, self.queryset.count, self.count_timeout)
+            else:
+                self._count = self.queryset.count()
+        return self._count
+
+    def _field_names(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def _position(self, obj):
+        return [getattr(obj, name) for name in self._field_names()]
+
+    def _load_position(self, values):
+        names = self._field_names()
+        if not isinstance(values, list) or len(values) != len(names):
+            raise InvalidCursor(values)
+        fields = [self.queryset.model._meta.get_field(name) for name in names]
+        try:
+            position = [field.to_python(value) for field, value in zip(fields, values)]
+        except (ValidationError, TypeError, ValueError):
+            # e.g. a list where an id belongs, which int() rejects with TypeError
+            raise InvalidCursor(values)
+        if None in position:
+            # The seek lookups cannot compare against NULL
+            raise InvalidCursor(values)
+        return position
+
+    def _seek(self, values, forward):
+        """Q object selecting the rows after (or before) values in ordering"""
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            field = name.lstrip('-')
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            clause = Q(**{'%s__%s' % (field, lookup): values[index]})
+            for previous, value in zip(self._field_names()[:index], values[:index]):
+                clause &= Q(**{previous: value})
+            condition |= clause
+        return condition
+
+    def page(self, cursor=None):
+        data = decode_cursor(cursor) if cursor else {}
+        if self.ordering is None:
+            return self._offset_page(data)
+        return self._keyset_page(data)
+
+    def get_page(self, cursor=None):
+        """Like page(), but falls back to the first page on a malformed cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    def _keyset_page(self, data):
+        forward = data.get('d', 'n') == 'n'
+        queryset = self.queryset
+        if 'k' in data:
+            queryset = queryset.filter(self._seek(self._load_position(data['k']), forward))
+        if not forward:
+            queryset = queryset.reverse()
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, 'k' in data
+        else:
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor({'k': self._position(rows[-1]), 'd': 'n'})
+        if rows and has_previous:
+            previous_cursor = encode_cursor({'k': self._position(rows[0]), 'd': 'p'})
+        return CursorPage(rows, self, has_next, has_previous, next_cursor, previous_cursor)
+
+    def _offset_page(self, data):
+        offset = data.get('o', 0)
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidCursor(data)
+        rows = list(self.queryset[offset:offset + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = encode_cursor({'o': offset + self.per_page}) if has_next else None
+        previous_cursor = encode_cursor({'o': max(offset - self.per_page, 0)}) if offset else None
+        return CursorPage(rows, self, has_next, bool(offset), next_cursor, previous_cursor)
@@ -0,0 +1,220 @@
+"""
+Resume text extraction for applicant search.
+
+Saving an application queues its resume file as a pending ResumeText row;
+nothing is parsed on the request path. The extract_resumes command claims
+pending rows and parses them in a multiprocessing pool (parsing is CPU
+bound, and a malformed file must not take the worker down), then stores the
+text and refreshes the applicant search index for every application using
+that file.
+Rows are claimed like outbox emails (see jobs/outbox.py): one UPDATE stamps
+them with the run's token and a lease expiry, so two runs never parse the
+same file, and a run that dies mid-batch leaves its rows to be claimed again
+once the lease has passed.
+Files are content-addressed (see common/storage.py), so a CV attached to many
+applications is extracted once.
+
+.docx is read straight from its zip container's word/document.xml, .pdf with
+pypdf, and legacy binary .doc falls back to pulling out runs of readable
+text. Every format stops at MAX_TEXT_LENGTH characters.
+"""
+import multiprocessing
+import re
+import uuid
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+MAX_TEXT_LENGTH = 100000
+# document.xml is read in full, so refuse anything that inflates beyond this
+MAX_DOCX_XML_BYTES = 20 * 1024 * 1024
+MAX_ATTEMPTS = 3
+EXTRACT_TIMEOUT = 60
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOC_TEXT_RE = re.compile(rb'(?:[\x20-\x7e]\x00){4,}|[\x20-\x7e\r\n\t]{4,}')
+WHITESPACE_RE = re.compile(r'[ \t\f\v]+')
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def clean(text):
+    lines = (WHITESPACE_RE.sub(' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)[:MAX_TEXT_LENGTH]
+
+
+def extract_docx(path):
+    try:
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo('word/document.xml')
+            if info.file_size > MAX_DOCX_XML_BYTES:
+                raise ExtractionError('word/document.xml is too large')
+            with archive.open(info) as document:
+                parts = []
+                length = 0
+                for _, element in ElementTree.iterparse(document):
+                    tag = element.tag
+                    if tag == WORD_NS + 't' and element.text:
+                        parts.append(element.text)
+                        length += len(element.text)
+                    elif tag == WORD_NS + 'tab':
+                        parts.append('\t')
+                    elif tag in (WORD_NS + 'br', WORD_NS + 'cr', WORD_NS + 'p'):
+                        parts.append('\n')
+                    if tag == WORD_NS + 'p':
+                        # Paragraphs are done with; keep memory flat on long documents
+                        element.clear()
+                    if length > MAX_TEXT_LENGTH:
+                        break
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        raise ExtractionError(f'Not a readable .docx file: {e}')
+    return clean(''.join(parts))
+
+
+def extract_pdf(path):
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise ExtractionError('The PDF is password protected')
+        parts = []
+        length = 0
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+            if length > MAX_TEXT_LENGTH:
+                break
+    except PdfReadError as e:
+        raise ExtractionError(f'Not a readable PDF: {e}')
+    return clean('\n'.join(parts))
+
+
+def extract_doc(path):
+    """Legacy Word binary: keep the runs of printable text, UTF-16 or single byte"""
+    with open(path, 'rb') as document:
+        data = document.read(MAX_TEXT_LENGTH * 8)
+    parts = []
+    for match in DOC_TEXT_RE.finditer(data):
+        run = match.group()
+        parts.append(run.decode('utf-16-le', 'ignore') if run[1:2] == b'\x00' else run.decode('latin-1'))
+    return clean('\n'.join(parts))
+
+
+EXTRACTORS = {
+    '.docx': extract_docx,
+    '.pdf': extract_pdf,
+    '.doc': extract_doc,
+}
+
+
+def extract(path):
+    """Plain text of the resume at path, chosen by extension"""
+    extension = path[path.rfind('.'):].lower() if '.' in path else ''
+    if extension not in EXTRACTORS:
+        raise ExtractionError(f'Unsupported file type {extension or "(none)"}')
+    return EXTRACTORS[extension](path)
+
+
+def queue(name):
+    """Make sure a stored file has a ResumeText row; returns it"""
+    from .models import ResumeText
+
+    if not name:
+        return None
+    try:
+        with transaction.atomic():
+            return ResumeText.objects.get_or_create(file=name)[0]
+    except IntegrityError:
+        # Queued concurrently by another application with the same file
+        return ResumeText.objects.get(file=name)
+
+
+def claim(batch_size, lease_seconds):
+    """Lease up to batch_size unclaimed pending rows, oldest first, counted as an attempt"""
+    from .models import ResumeText
+
+    now = timezone.now()
+    pending = ResumeText.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lte=now), status=ResumeText.PENDING,
+    )
+    ids = list(pending.order_by('created_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Re-checking the lease makes this a compare-and-set against other runs
+    pending.filter(id__in=ids).update(
+        claimed_by=token, claimed_until=now + timedelta(seconds=lease_seconds), attempts=F('attempts') + 1,
+    )
+    return list(ResumeText.objects.filter(status=ResumeText.PENDING, claimed_by=token).order_by('created_at'))
+
+
+def _extract_file(path):
+    # Runs in a pool process: return errors rather than raising across processes
+    try:
+        return extract(path), ''
+    except ExtractionError as e:
+        return '', str(e)
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def record(resume_text, text, error):
+    """Store one result and reindex the applications that use the file"""
+    from .models import Application, ResumeText
+    from .search import get_search_backend
+
+    if text is None and resume_text.attempts < MAX_ATTEMPTS:
+        # Unexpected failure; release it, still pending, for another try
+        ResumeText.objects.filter(pk=resume_text.pk).update(error=error, claimed_by='', claimed_until=None)
+        return False
+    resume_text.text = text or ''
+    resume_text.error = error
+    resume_text.status = ResumeText.DONE if not error else ResumeText.FAILED
+    resume_text.extracted_at = timezone.now()
+    resume_text.claimed_by, resume_text.claimed_until = '', None
+    with transaction.atomic():
+        resume_text.save(update_fields=['text', 'error', 'status', 'extracted_at', 'claimed_by', 'claimed_until'])
+        get_search_backend().index_applications(
+            Application.objects.filter(resume=resume_text.file).values_list('pk', flat=True)
+        )
+    return resume_text.status == ResumeText.DONE
+
+
+def process(batch_size=50, workers=2, timeout=EXTRACT_TIMEOUT):
+    """Extract one batch in a pool of worker processes; returns (extracted, failed)"""
+    # Long enough for every file in the batch to run into its timeout
+    batch = claim(batch_size, lease_seconds=batch_size * timeout)
+    if not batch:
+        return 0, 0
+    extracted = failed = 0
+    # Leaving the block terminates the pool, which also kills a worker stuck on a hostile file
+    with multiprocessing.Pool(workers) as pool:
+        results = []
+        for resume_text in batch:
+            if not default_storage.exists(resume_text.file):
+                results.append((resume_text, None))
+            else:
+                results.append((resume_text, pool.apply_async(_extract_file, (default_storage.path(resume_text.file),))))
+        for resume_text, result in results:
+            if result is None:
+                text, error = '', 'File is missing from storage'
+            else:
+                try:
+                    text, error = result.get(timeout=timeout)
+                except multiprocessing.TimeoutError:
+                    text, error = None, f'Timed out after {timeout}s'
+            if record(resume_text, text, error):
+                extracted += 1
+            else:
+                failed += 1
+    return extracted, failed
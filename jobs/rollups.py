@@ -0,0 +1,103 @@
+"""
+Daily application rollups for employer analytics.
+
+ApplicationDailyRollup counts applications per (job, day applied, current
+status), so applications-per-day is a sum over statuses and status
+conversion is a sum over days. refresh() keeps it current incrementally:
+it reads only the applications whose last_status_update moved past the
+stored watermark, and recounts just the (job, day) cohorts those touch from
+the application_job_recent_idx index. Deleted applications leave no row to
+notice, so a periodic full refresh repairs those.
+
+last_status_update is auto_now, which queryset.update() does not apply, so
+bulk status changes must set it explicitly for this to see them.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+WATERMARK_NAME = 'application_daily_rollup'
+DEFAULT_LAG_SECONDS = 5
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _grouped(applications):
+    return (
+        applications.order_by()
+        .annotate(day=TruncDate('applied_date'))
+        .values_list('job_id', 'day', 'status')
+        .annotate(total=Count('id'))
+    )
+
+
+def refresh(full=False, lag_seconds=DEFAULT_LAG_SECONDS, using='default'):
+    """
+    Bring the rollups up to date and advance the watermark. Rows written in
+    the last ``lag_seconds`` wait for the next run, so transactions still in
+    flight when it starts are not skipped. Returns the cohorts recounted.
+    """
+    from .models import Application, ApplicationDailyRollup, RollupWatermark
+
+    high = timezone.now() - timedelta(seconds=lag_seconds)
+    rollups = ApplicationDailyRollup.objects.using(using)
+    with transaction.atomic(using=using):
+        watermark, _ = RollupWatermark.objects.using(using).select_for_update().get_or_create(name=WATERMARK_NAME)
+
+        if full or watermark.value is None:
+            rows = _grouped(Application.objects.using(using).filter(last_status_update__lte=high))
+            rollups.all().delete()
+            rollups.bulk_create(
+                [ApplicationDailyRollup(job_id=job_id, day=day, status=status, count=total)
+                 for job_id, day, status, total in rows],
+                batch_size=500,
+            )
+            cohorts = {(row.job_id, row.day) for row in rollups.only('job_id', 'day')}
+        else:
+            changed = Application.objects.using(using).filter(
+                last_status_update__gt=watermark.value, last_status_update__lte=high,
+            )
+            cohorts = set(
+                changed.order_by().annotate(day=TruncDate('applied_date')).values_list('job_id', 'day').distinct()
+            )
+            days_by_job = defaultdict(set)
+            for job_id, day in cohorts:
+                days_by_job[job_id].add(day)
+            for job_id, days in days_by_job.items():
+                rollups.filter(job_id=job_id, day__in=days).delete()
+                # A range on applied_date itself, so (job, applied_date) stays usable as an index
+                rows = _grouped(Application.objects.using(using).filter(
+                    job_id=job_id,
+                    applied_date__gte=_day_start(min(days)),
+                    applied_date__lt=_day_start(max(days) + timedelta(days=1)),
+                ))
+                rollups.bulk_create([
+                    ApplicationDailyRollup(job_id=job_id, day=day, status=status, count=total)
+                    for _, day, status, total in rows if day in days
+                ])
+
+        watermark.value = high
+        watermark.save(update_fields=['value'])
+    return len(cohorts)
+
+
+def applications_per_day(rollups, days):
+    """[(day, count)] for each of the last ``days`` days, oldest first, zeros included"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    totals = dict(
+        rollups.filter(day__gte=start).order_by().values_list('day').annotate(total=Sum('count'))
+    )
+    return [(start + timedelta(days=offset), totals.get(start + timedelta(days=offset), 0))
+            for offset in range(days)]
+
+
+def status_totals(rollups):
+    """{status: count} over all days"""
+    return dict(rollups.order_by().values_list('status').annotate(total=Sum('count')))
@@ -0,0 +1,132 @@
+"""
+Salary histogram for the job search range slider.
+
+SalaryHistogram holds the number of active jobs with a salary per (job type,
+experience level, salary bucket, deadline date). Signals (see
+jobs/signals.py) move a job's count between rows with F() updates whenever it
+is saved or deleted, so reading the histogram sums a small table instead of
+aggregating over the job table. Keying rows by deadline date lets readers
+skip expired postings without anything having to be written when a deadline
+passes; rebuild_salary_histogram recounts from scratch and prunes those rows.
+A date is coarser than job_list's application_deadline > now, so today's
+rows are not read: the jobs closing later today are counted from the job
+table through the job_active_closing_idx index.
+
+Buckets are JOB_SALARY_BUCKET_WIDTH wide; the last of JOB_SALARY_BUCKET_COUNT
+buckets is open-ended and collects everything above it.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+BUCKET_WIDTH = 10000
+BUCKET_COUNT = 30
+
+
+def get_bucket_width():
+    return getattr(settings, 'JOB_SALARY_BUCKET_WIDTH', BUCKET_WIDTH)
+
+
+def get_bucket_count():
+    return getattr(settings, 'JOB_SALARY_BUCKET_COUNT', BUCKET_COUNT)
+
+
+def bucket_for(salary):
+    return min(int(salary // get_bucket_width()), get_bucket_count() - 1)
+
+
+def contribution(is_active, salary, job_type, experience_level, application_deadline):
+    """The histogram row a job with these values counts towards, or None"""
+    if not is_active or salary is None:
+        return None
+    return (job_type, experience_level, bucket_for(salary), timezone.localdate(application_deadline))
+
+
+def job_contribution(job):
+    return contribution(job.is_active, job.salary, job.job_type, job.experience_level, job.application_deadline)
+
+
+def adjust(key, delta, using='default'):
+    from .models import SalaryHistogram
+
+    if key is None:
+        return
+    job_type, experience_level, bucket, deadline_date = key
+    rows = SalaryHistogram.objects.using(using).filter(
+        job_type=job_type, experience_level=experience_level, bucket=bucket, deadline_date=deadline_date,
+    )
+    if rows.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic(using=using):
+            SalaryHistogram.objects.using(using).create(
+                job_type=job_type, experience_level=experience_level, bucket=bucket,
+                deadline_date=deadline_date, count=delta,
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(count=F('count') + delta)
+
+
+def move(old, new, using='default'):
+    if old != new:
+        adjust(old, -1, using)
+        adjust(new, 1, using)
+
+
+def rebuild(using='default'):
+    """Recount the whole histogram from the job table; returns the number of rows"""
+    from .models import Job, SalaryHistogram
+
+    totals = Counter()
+    jobs = (
+        Job.objects.using(using)
+        .filter(is_active=True, salary__isnull=False, application_deadline__gt=timezone.now())
+        .values_list('is_active', 'salary', 'job_type', 'experience_level', 'application_deadline')
+    )
+    for values in jobs.iterator():
+        totals[contribution(*values)] += 1
+    with transaction.atomic(using=using):
+        SalaryHistogram.objects.using(using).all().delete()
+        SalaryHistogram.objects.using(using).bulk_create([
+            SalaryHistogram(job_type=job_type, experience_level=experience_level, bucket=bucket,
+                            deadline_date=deadline_date, count=total)
+            for (job_type, experience_level, bucket, deadline_date), total in totals.items()
+        ])
+    return len(totals)
+
+
+def histogram(job_type=None, experience_level=None, using=None):
+    """
+    [(lower, upper, count)] per bucket from the first to the last non-empty
+    one; upper is None for the open-ended last bucket. Read from the
+    database router's choice unless ``using`` is given.
+    """
+    from .models import Job, SalaryHistogram
+
+    today = timezone.localdate()
+    tomorrow = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+    rows = SalaryHistogram.objects.using(using).filter(deadline_date__gt=today)
+    closing_today = Job.objects.using(using).filter(
+        is_active=True, salary__isnull=False, application_deadline__gt=timezone.now(), application_deadline__lt=tomorrow,
+    ).order_by()
+    if job_type:
+        rows = rows.filter(job_type=job_type)
+        closing_today = closing_today.filter(job_type=job_type)
+    if experience_level:
+        rows = rows.filter(experience_level=experience_level)
+        closing_today = closing_today.filter(experience_level=experience_level)
+    grouped = rows.order_by().values_list('bucket').annotate(total=Sum('count'))
+    counts = Counter({bucket: total for bucket, total in grouped if total > 0})
+    counts.update(bucket_for(value) for value in closing_today.values_list('salary', flat=True))
+    if not counts:
+        return []
+    width, bucket_count = get_bucket_width(), get_bucket_count()
+    return [
+        (bucket * width, (bucket + 1) * width if bucket < bucket_count - 1 else None, counts[bucket])
+        for bucket in range(min(counts), max(counts) + 1)
+    ]
@@ -0,0 +1,298 @@
+"""
+Full-text search for job listings and applicants.
+
+The search indexes are shadow tables kept in sync with Job, Company and
+Application (including the text extracted from resumes, see
+jobs/resume_text.py) through signals (see jobs/signals.py). Backends are pluggable through the
+JOB_SEARCH_BACKEND setting so a non-SQLite deployment can fall back to plain
+database filtering without touching the views.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_backends = {}
+
+
+def tokenize(text):
+    """Split free text into lowercase search terms"""
+    return [token.lower() for token in TOKEN_RE.findall(text or '')]
+
+
+class BaseSearchBackend:
+    """Interface every job search backend implements"""
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def filter(self, queryset, query):
+        """Restrict a Job queryset to the jobs matching query"""
+        raise NotImplementedError
+
+    def rank(self, queryset, query):
+        """Filter like filter() and order the matches best first, exposing a relevance score"""
+        raise NotImplementedError
+
+    def index_jobs(self, job_ids):
+        """Add or refresh the index entries for the given job ids"""
+
+    def index_company(self, company_id):
+        """Refresh the entries of every job posted under a company"""
+        from .models import Job
+        self.index_jobs(
+            Job.objects.using(self.using).filter(company_id=company_id).values_list('pk', flat=True)
+        )
+
+    def remove_jobs(self, job_ids):
+        """Drop the index entries for the given job ids"""
+
+    def rebuild(self):
+        """Rebuild the whole index from the Job table, returning the row count"""
+        return 0
+
+    def filter_applications(self, queryset, query):
+        """Restrict an Application queryset to applicants matching query"""
+        raise NotImplementedError
+
+    def index_applications(self, application_ids):
+        """Add or refresh the applicant index entries for the given application ids"""
+
+    def index_applicant(self, user_id):
+        """Refresh the entries of every application by a user"""
+        from .models import Application
+        self.index_applications(
+            Application.objects.using(self.using).filter(applicant_id=user_id).values_list('pk', flat=True)
+        )
+
+    def remove_applications(self, application_ids):
+        """Drop the applicant index entries for the given application ids"""
+
+    def rebuild_applications(self):
+        """Rebuild the whole applicant index, returning the row count"""
+        return 0
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unindexed fallback that filters with icontains lookups"""
+
+    def filter(self, queryset, query):
+        # Like the FTS index: every term must occur, not necessarily as one phrase
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) |
+                Q(description__icontains=term) |
+                Q(company__name__icontains=term) |
+                Q(requirements__icontains=term)
+            )
+        return queryset
+
+    def rank(self, queryset, query):
+        # No term statistics here, so approximate the field boosts by where the phrase occurs
+        weights = get_field_weights()
+        return self.filter(queryset, query).annotate(relevance=Case(
+            When(title__icontains=query, then=Value(weights['title'])),
+            When(company__name__icontains=query, then=Value(weights['company_name'])),
+            default=Value(weights['description']),
+            output_field=FloatField(),
+        )).order_by('-relevance', '-created_at')
+
+    def filter_applications(self, queryset, query):
+        from .models import ResumeText
+        return queryset.filter(
+            Q(applicant__username__icontains=query) |
+            Q(applicant__first_name__icontains=query) |
+            Q(applicant__last_name__icontains=query) |
+            Q(applicant__email__icontains=query) |
+            Q(cover_letter__icontains=query) |
+            Q(resume__in=ResumeText.objects.using(self.using).filter(text__icontains=query).values('file'))
+        )
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """SQLite FTS5 index over job title, company name, description and requirements"""
+
+    CREATE_SQL = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_job_fts USING fts5("
+        "title, company_name, description, requirements, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    DROP_SQL = "DROP TABLE IF EXISTS jobs_job_fts"
+
+    # Pulls the indexed columns straight from the source tables so a refresh
+    # is one INSERT ... SELECT instead of a Python round trip per job.
+    SELECT_SQL = (
+        "SELECT j.id, j.title, c.name, j.description, j.requirements "
+        "FROM jobs_job j INNER JOIN jobs_company c ON c.id = j.company_id"
+    )
+
+    APPLICATION_CREATE_SQL = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_application_fts USING fts5("
+        "applicant, email, cover_letter, resume, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    APPLICATION_DROP_SQL = "DROP TABLE IF EXISTS jobs_application_fts"
+
+    # Resume text joins in by file name; one extracted row serves every
+    # application that attached the same file.
+    APPLICATION_SELECT_SQL = (
+        "SELECT a.id, u.username || ' ' || u.first_name || ' ' || u.last_name, u.email, "
+        "a.cover_letter, COALESCE(r.text, '') "
+        "FROM jobs_application a INNER JOIN users_customuser u ON u.id = a.applicant_id "
+        "LEFT JOIN jobs_resumetext r ON r.file = a.resume AND r.status = 'done'"
+    )
+    APPLICATION_INSERT_SQL = 'INSERT INTO jobs_application_fts (rowid, applicant, email, cover_letter, resume) '
+
+    @staticmethod
+    def match_expression(query):
+        """Build an FTS5 MATCH expression that ANDs a prefix match per term"""
+        return ' '.join('"%s"*' % term for term in tokenize(query))
+
+    def filter(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        # A join rather than id IN (SELECT rowid ...), so SQLite can drive the
+        # query from the index's matches and look each job up by primary key
+        return queryset.extra(
+            tables=['jobs_job_fts'],
+            where=['jobs_job_fts.rowid = jobs_job.id', 'jobs_job_fts MATCH %s'],
+            params=[expression],
+        )
+
+    def rank(self, queryset, query):
+        if not self.match_expression(query):
+            return queryset.none()
+        weights = get_field_weights()
+        # bm25() is negative with better matches lower, so flip the sign and
+        # let the score halve once a posting is JOB_SEARCH_RECENCY_HALF_LIFE days old.
+        score = (
+            '-bm25(jobs_job_fts, %s, %s, %s, %s) / '
+            "(1.0 + MAX(julianday('now') - julianday(jobs_job.created_at), 0) / %s)"
+        )
+        return self.filter(queryset, query).extra(
+            select={'relevance': score},
+            select_params=[
+                weights['title'], weights['company_name'],
+                weights['description'], weights['requirements'],
+                float(getattr(settings, 'JOB_SEARCH_RECENCY_HALF_LIFE', 30)),
+            ],
+        ).order_by('-relevance', '-created_at')
+
+    def _chunks(self, job_ids, size=500):
+        job_ids = list(job_ids)
+        for start in range(0, len(job_ids), size):
+            yield job_ids[start:start + size]
+
+    def index_jobs(self, job_ids):
+        with connections[self.using].cursor() as cursor:
+            for chunk in self._chunks(job_ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    'DELETE FROM jobs_job_fts WHERE rowid IN (%s)' % placeholders, chunk
+                )
+                cursor.execute(
+                    'INSERT INTO jobs_job_fts (rowid, title, company_name, description, requirements) '
+                    + self.SELECT_SQL + ' WHERE j.id IN (%s)' % placeholders, chunk
+                )
+
+    def index_company(self, company_id):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM jobs_job_fts WHERE rowid IN (SELECT id FROM jobs_job WHERE company_id = %s)',
+                [company_id]
+            )
+            cursor.execute(
+                'INSERT INTO jobs_job_fts (rowid, title, company_name, description, requirements) '
+                + self.SELECT_SQL + ' WHERE j.company_id = %s', [company_id]
+            )
+
+    def remove_jobs(self, job_ids):
+        with connections[self.using].cursor() as cursor:
+            for chunk in self._chunks(job_ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    'DELETE FROM jobs_job_fts WHERE rowid IN (%s)' % placeholders, chunk
+                )
+
+    def rebuild(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(self.DROP_SQL)
+            cursor.execute(self.CREATE_SQL)
+            cursor.execute(
+                'INSERT INTO jobs_job_fts (rowid, title, company_name, description, requirements) '
+                + self.SELECT_SQL
+            )
+            cursor.execute("INSERT INTO jobs_job_fts (jobs_job_fts) VALUES ('optimize')")
+            cursor.execute('SELECT COUNT(*) FROM jobs_job_fts')
+            return cursor.fetchone()[0]
+
+    def filter_applications(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(
+            'SELECT rowid FROM jobs_application_fts WHERE jobs_application_fts MATCH %s', (expression,)
+        ))
+
+    def index_applications(self, application_ids):
+        with connections[self.using].cursor() as cursor:
+            for chunk in self._chunks(application_ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    'DELETE FROM jobs_application_fts WHERE rowid IN (%s)' % placeholders, chunk
+                )
+                cursor.execute(
+                    self.APPLICATION_INSERT_SQL + self.APPLICATION_SELECT_SQL
+                    + ' WHERE a.id IN (%s)' % placeholders, chunk
+                )
+
+    def index_applicant(self, user_id):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM jobs_application_fts WHERE rowid IN '
+                '(SELECT id FROM jobs_application WHERE applicant_id = %s)', [user_id]
+            )
+            cursor.execute(
+                self.APPLICATION_INSERT_SQL + self.APPLICATION_SELECT_SQL + ' WHERE a.applicant_id = %s', [user_id]
+            )
+
+    def remove_applications(self, application_ids):
+        with connections[self.using].cursor() as cursor:
+            for chunk in self._chunks(application_ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    'DELETE FROM jobs_application_fts WHERE rowid IN (%s)' % placeholders, chunk
+                )
+
+    def rebuild_applications(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(self.APPLICATION_DROP_SQL)
+            cursor.execute(self.APPLICATION_CREATE_SQL)
+            cursor.execute(self.APPLICATION_INSERT_SQL + self.APPLICATION_SELECT_SQL)
+            cursor.execute("INSERT INTO jobs_application_fts (jobs_application_fts) VALUES ('optimize')")
+            cursor.execute('SELECT COUNT(*) FROM jobs_application_fts')
+            return cursor.fetchone()[0]
+
+
+def get_field_weights():
+    """Per-column boosts, title and company name outranking body text by default"""
+    weights = {'title': 10.0, 'company_name': 5.0, 'description': 1.0, 'requirements': 1.0}
+    weights.update(getattr(settings, 'JOB_SEARCH_FIELD_WEIGHTS', {}))
+    return weights
+
+
+def get_search_backend(using='default'):
+    """Return the configured search backend for a database alias"""
+    if using not in _backends:
+        path = getattr(settings, 'JOB_SEARCH_BACKEND', 'jobs.search.SQLiteFTSBackend')
+        _backends[using] = import_string(path)(using=using)
+    return _backends[using]
@@ -0,0 +1,107 @@
+"""
+Versioned cache for job search results.
+
+Every key embeds a version number that Job and Company saves/deletes bump
+(see jobs/signals.py), so a change invalidates all cached searches at once
+without scanning keys; stale entries simply age out. Result pages store only
+the ordered job ids of the page plus its cursors, and the jobs themselves are
+re-read by primary key, which keeps entries small and lets expired or
+deactivated postings drop out even before the TTL runs out.
+
+Hits and misses are counted per kind ('results', 'count', 'facets') in the
+cache itself; with a shared cache backend the search_cache_stats command
+reports the ratios across all processes.
+"""
+import time
+
+from django.core.cache import cache
+
+from .pagination import CursorPage
+
+VERSION_KEY = 'search:version'
+STATS_KEY = 'search:stats:%s:%s'
+KINDS = ('results', 'count', 'facets')
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def make_key(kind, key):
+    return 'search:v%s:%s:%s' % (get_version(), kind, key)
+
+
+def record(kind, hit):
+    stats_key = STATS_KEY % (kind, 'hit' if hit else 'miss')
+    if not cache.add(stats_key, 1, None):
+        try:
+            cache.incr(stats_key)
+        except ValueError:
+            cache.add(stats_key, 1, None)
+
+
+def get_stats():
+    """{kind: (hits, misses)} for every cached kind"""
+    keys = [STATS_KEY % (kind, outcome) for kind in KINDS for outcome in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    return {
+        kind: (values.get(STATS_KEY % (kind, 'hit'), 0), values.get(STATS_KEY % (kind, 'miss'), 0))
+        for kind in KINDS
+    }
+
+
+def reset_stats():
+    cache.delete_many([STATS_KEY % (kind, outcome) for kind in KINDS for outcome in ('hit', 'miss')])
+
+
+def get_or_set(kind, key, default, timeout):
+    """cache.get_or_set under the current version, recording the outcome"""
+    full_key = make_key(kind, key)
+    value = cache.get(full_key)
+    record(kind, value is not None)
+    if value is None:
+        value = default()
+        cache.set(full_key, value, timeout)
+    return value
+
+
+def get_page(paginator, key, cursor, objects, timeout):
+    """
+    Return paginator's page for cursor, serving it from the id cache when
+    possible. ``objects`` is the unsearched queryset the cached ids are
+    re-read from, so cache hits skip the full-text match entirely.
+    Returns (page, hit).
+    """
+    full_key = make_key('results', '%s:%s' % (key, cursor or ''))
+    cached = cache.get(full_key)
+    record('results', cached is not None)
+    if cached is None:
+        page = paginator.get_page(cursor)
+        cache.set(full_key, {
+            'ids': [obj.pk for obj in page],
+            'has_next': page.has_next,
+            'has_previous': page.has_previous,
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        }, timeout)
+        return page, False
+
+    found = objects.in_bulk(cached['ids'])
+    rows = [found[pk] for pk in cached['ids'] if pk in found]
+    page = CursorPage(
+        rows, paginator, cached['has_next'], cached['has_previous'],
+        cached['next_cursor'], cached['previous_cursor'],
+    )
+    return page, True
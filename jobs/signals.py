@@ -0,0 +1,176 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.conf import settings
+from django.dispatch import receiver
+
+from .models import Job, Company, Place, Application, Notification
+from .search import get_search_backend
+from .autocomplete import autocomplete
+from . import counters, geo, notifications, resume_text, salary, search_cache
+
+
+@receiver(pre_save, sender=Job)
+def geocode_job(sender, instance, raw=False, **kwargs):
+    if not raw:
+        geo.geocode_job(instance)
+
+
+# User fields that go into the applicant search index
+APPLICANT_INDEXED_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+# Counters and the salary histogram need the values a row had before this save
+JOB_TRACKED_FIELDS = ('is_active', 'salary', 'job_type', 'experience_level', 'application_deadline', 'company_id')
+
+
+@receiver(pre_save, sender=Job)
+def remember_stored_job(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    instance._stored = None
+    if instance.pk:
+        instance._stored = Job.objects.using(using).filter(pk=instance.pk).values(*JOB_TRACKED_FIELDS).first()
+
+
+@receiver(pre_save, sender=Application)
+def remember_stored_application(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    instance._stored = None
+    if instance.pk:
+        instance._stored = (
+            Application.objects.using(using).filter(pk=instance.pk)
+            .values('job_id', 'status', 'resume', 'cover_letter').first()
+        )
+
+
+@receiver(post_save, sender=Job)
+def update_salary_histogram(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored', None)
+    old = salary.contribution(*(stored[name] for name in JOB_TRACKED_FIELDS[:5])) if stored else None
+    salary.move(old, salary.job_contribution(instance), using)
+
+
+@receiver(post_delete, sender=Job)
+def remove_from_salary_histogram(sender, instance, using='default', **kwargs):
+    salary.adjust(salary.job_contribution(instance), -1, using)
+
+
+@receiver(post_save, sender=Job)
+def update_company_job_count(sender, instance, created=False, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored', None)
+    if created or stored is None:
+        counters.adjust_jobs(instance.company_id, 1, using)
+    elif stored['company_id'] != instance.company_id:
+        counters.adjust_jobs(stored['company_id'], -1, using)
+        counters.adjust_jobs(instance.company_id, 1, using)
+
+
+@receiver(post_delete, sender=Job)
+def decrement_company_job_count(sender, instance, using='default', **kwargs):
+    counters.adjust_jobs(instance.company_id, -1, using)
+
+
+@receiver(post_save, sender=Application)
+def update_application_counts(sender, instance, created=False, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored', None)
+    if created or stored is None:
+        counters.application_added(instance.job_id, instance.status, using)
+    elif (stored['job_id'], stored['status']) != (instance.job_id, instance.status):
+        counters.application_removed(stored['job_id'], stored['status'], using)
+        counters.application_added(instance.job_id, instance.status, using)
+
+
+@receiver(post_delete, sender=Application)
+def decrement_application_counts(sender, instance, using='default', **kwargs):
+    counters.application_removed(instance.job_id, instance.status, using)
+
+
+# Also sent for notifications deleted by cascade with their job, application or user
+@receiver(post_delete, sender=Notification)
+def uncount_notification(sender, instance, using='default', **kwargs):
+    notifications.removed(instance, using)
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def clear_place_lookup(sender, **kwargs):
+    geo.clear_lookup()
+
+
+# Keep the search index in sync with the rows it is built from
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    get_search_backend(using).index_jobs([instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, using='default', **kwargs):
+    get_search_backend(using).remove_jobs([instance.pk])
+
+
+@receiver(post_save, sender=Application)
+def index_application(sender, instance, created=False, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored', None)
+    if created or stored is None or (stored['resume'], stored['cover_letter']) != (instance.resume.name, instance.cover_letter):
+        # Extraction happens later in extract_resumes, which reindexes again
+        resume_text.queue(instance.resume.name)
+        get_search_backend(using).index_applications([instance.pk])
+
+
+@receiver(post_delete, sender=Application)
+def unindex_application(sender, instance, using='default', **kwargs):
+    get_search_backend(using).remove_applications([instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_applicant(sender, instance, created=False, raw=False, using='default', update_fields=None, **kwargs):
+    # Logins save only last_login; only names and email are indexed
+    if raw or created or (update_fields is not None and not set(update_fields) & APPLICANT_INDEXED_FIELDS):
+        return
+    get_search_backend(using).index_applicant(instance.pk)
+
+
+@receiver(post_save, sender=Company)
+def reindex_company_jobs(sender, instance, created=False, raw=False, using='default', **kwargs):
+    # A new company has no jobs yet; a renamed one changes every job's company_name column
+    if raw or created:
+        return
+    get_search_backend(using).index_company(instance.pk)
+
+
+# Autocomplete is updated in place; it only exists once something has asked for suggestions
+@receiver(post_save, sender=Job)
+def update_autocomplete(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete.update_job(instance)
+
+
+@receiver(post_delete, sender=Job)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    autocomplete.remove_job(instance.pk)
+
+
+@receiver(post_save, sender=Company)
+def rename_in_autocomplete(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created or autocomplete.built_at is None:
+        return
+    for job in instance.job_set.only('id', 'title', 'location', 'is_active', 'application_deadline'):
+        autocomplete.update_job(job, instance.name)
+
+
+# Any change to a listing or its company makes every cached search stale
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_search_cache(sender, **kwargs):
+    search_cache.bump_version()
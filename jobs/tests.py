@@ -1,3 +1,567 @@
-from django.test import TestCase
+import smtplib
+import socket
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import EmployerProfile
+
+from . import alerts, counters, notifications, outbox, resume_text
+from .autocomplete import SCAN_LIMIT, Autocomplete, PrefixIndex
+from .models import (
+    Application, ApplicationStatusCount, Company, Job, JobAlertMatch, Notification, NotificationCounter, OutboundEmail,
+    PendingJobAlert, ResumeText, SavedSearch,
+)
+from .pagination import CursorPaginator, InvalidCursor, encode_cursor
+
+
+class FakeConnection:
+    """Stands in for an SMTP connection; send_messages raises ``error`` if one is given"""
+
+    def __init__(self, error=None, open_error=None):
+        self.error = error
+        self.open_error = open_error
+        self.opened = 0
+        self.sent = []
+
+    def open(self):
+        self.opened += 1
+        if self.open_error:
+            raise self.open_error
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.error:
+            raise self.error
+        self.sent.extend(messages)
+        return len(messages)
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class OutboxTests(TestCase):
+    def queue_email(self, to_email='seeker@example.com'):
+        return OutboundEmail.objects.create(
+            from_email='noreply@example.com', to_email=to_email, subject='Update', body='Hello',
+        )
+
+    def test_claim_leases_until_the_lease_expires(self):
+        email = self.queue_email()
+        first = outbox.claim(10, lease_seconds=60)
+        self.assertEqual([e.pk for e in first], [email.pk])
+        self.assertEqual(outbox.claim(10, lease_seconds=60), [])
+
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch('jobs.outbox.timezone.now', return_value=later):
+            second = outbox.claim(10, lease_seconds=60)
+        self.assertEqual([e.pk for e in second], [email.pk])
+        self.assertNotEqual(second[0].claimed_by, first[0].claimed_by)
+
+    def test_success_marks_the_email_sent(self):
+        self.queue_email()
+        connection = FakeConnection()
+        self.assertEqual(outbox.deliver(outbox.claim(10), connection), (1, 0, 0))
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.SENT)
+        self.assertEqual(email.claimed_by, '')
+        self.assertEqual(len(connection.sent), 1)
+
+    def test_temporary_refusal_is_retried_with_backoff(self):
+        for error in (
+            smtplib.SMTPRecipientsRefused({'seeker@example.com': (450, b'Greylisted, try again later')}),
+            smtplib.SMTPSenderRefused(451, b'Local error', 'noreply@example.com'),
+            smtplib.SMTPDataError(452, b'Insufficient storage'),
+        ):
+            with self.subTest(error=type(error).__name__):
+                OutboundEmail.objects.all().delete()
+                self.queue_email()
+                before = timezone.now()
+                self.assertEqual(outbox.deliver(outbox.claim(10), FakeConnection(error)), (0, 1, 0))
+                email = OutboundEmail.objects.get()
+                self.assertEqual(email.status, OutboundEmail.PENDING)
+                self.assertEqual(email.attempts, 1)
+                self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=outbox.retry_delay(1)))
+
+    def test_permanent_refusal_is_dead_lettered(self):
+        for error in (
+            smtplib.SMTPRecipientsRefused({'seeker@example.com': (550, b'No such user')}),
+            smtplib.SMTPSenderRefused(553, b'Sender not allowed', 'noreply@example.com'),
+            smtplib.SMTPDataError(554, b'Rejected as spam'),
+        ):
+            with self.subTest(error=type(error).__name__):
+                OutboundEmail.objects.all().delete()
+                self.queue_email()
+                self.assertEqual(outbox.deliver(outbox.claim(10), FakeConnection(error)), (0, 0, 1))
+                email = OutboundEmail.objects.get()
+                self.assertEqual(email.status, OutboundEmail.DEAD)
+                self.assertIn('SMTP', email.last_error)
+
+    def test_mixed_recipient_codes_are_retried(self):
+        error = smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'No such user'), 'b@example.com': (451, b'Later')})
+        self.assertFalse(outbox.is_permanent(error))
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_dead_lettered_after_max_attempts(self):
+        self.queue_email()
+        connection = FakeConnection(smtplib.SMTPDataError(451, b'Try again later'))
+        self.assertEqual(outbox.deliver(outbox.claim(10), connection), (0, 1, 0))
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.deliver(outbox.claim(10), connection), (0, 0, 1))
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.DEAD)
+
+    def test_drain_backs_off_when_the_server_is_unreachable(self):
+        self.queue_email()
+        self.queue_email('other@example.com')
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=unused_port(), EMAIL_USE_TLS=False, EMAIL_TIMEOUT=2,
+        ):
+            self.assertEqual(outbox.drain(), (0, 1, 0))
+        tried, untried = OutboundEmail.objects.order_by('id')
+        self.assertEqual((tried.attempts, untried.attempts), (1, 0))
+        self.assertIn('ConnectionRefusedError', tried.last_error)
+        for email in (tried, untried):
+            self.assertEqual(email.status, OutboundEmail.PENDING)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+        # Nothing is due again until the backoff has passed
+        self.assertEqual(outbox.claim(10), [])
+
+    def test_connection_failure_stops_the_batch(self):
+        for _ in range(5):
+            self.queue_email()
+        connection = FakeConnection(open_error=socket.timeout('timed out'))
+        with self.assertRaises(outbox.ServerUnavailable) as raised:
+            outbox.deliver(outbox.claim(10), connection)
+        self.assertEqual(raised.exception.outcome, (0, 1, 0))
+        self.assertEqual(connection.opened, 1)
+        emails = list(OutboundEmail.objects.order_by('id'))
+        self.assertEqual([email.attempts for email in emails], [1, 0, 0, 0, 0])
+        self.assertTrue(all(email.claimed_by == '' for email in emails))
+        self.assertEqual({email.next_attempt_at for email in emails[1:]}, {emails[0].next_attempt_at})
+
+    def test_drain_stops_at_a_connection_failure(self):
+        for _ in range(5):
+            self.queue_email()
+        connection = FakeConnection(open_error=ConnectionRefusedError('Connection refused'))
+        batches = []
+        totals = outbox.drain(batch_size=2, connection=connection, on_batch=lambda *outcome: batches.append(outcome))
+        self.assertEqual(totals, (0, 1, 0))
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(connection.opened, 1)
+        self.assertEqual(OutboundEmail.objects.filter(attempts=0).count(), 4)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class JobAlertDigestTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        employer = User.objects.create_user('employer', 'employer@example.com', 'pw', user_type='employer')
+        company = Company.objects.create(name='Acme', description='Widgets')
+        self.jobs = [
+            Job.objects.create(
+                title=f'Python Developer {n}', company=company, employer=employer, description='Django',
+                requirements='Python', location='Nairobi', job_type='full_time',
+                application_deadline=timezone.now() + timedelta(days=30),
+            )
+            for n in range(2)
+        ]
+        self.seekers = []
+        for n in range(3):
+            seeker = User.objects.create_user(f'seeker{n}', f'seeker{n}@example.com', 'pw')
+            search = SavedSearch.objects.create(user=seeker, name='Python', filters={'query': 'python'}, filters_key='python')
+            for job in self.jobs:
+                JobAlertMatch.objects.create(saved_search=search, job=job)
+            self.seekers.append(seeker)
+
+    def send(self, **options):
+        call_command('send_job_alerts', stdout=StringIO(), **options)
+
+    def test_one_digest_per_seeker(self):
+        self.send()
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('to_email', flat=True)),
+            [seeker.email for seeker in self.seekers],
+        )
+        self.assertFalse(JobAlertMatch.objects.filter(emailed_at__isnull=True).exists())
+        self.assertEqual(OutboundEmail.objects.first().kind, 'job_alert_digest')
+
+    def test_job_matching_several_searches_is_listed_once(self):
+        seeker = self.seekers[0]
+        other = SavedSearch.objects.create(user=seeker, name='Nairobi', filters={'location': 'Nairobi'}, filters_key='nairobi')
+        JobAlertMatch.objects.create(saved_search=other, job=self.jobs[0])
+        self.send()
+        digest = OutboundEmail.objects.get(to_email=seeker.email)
+        self.assertEqual(digest.subject, '2 new jobs matching your searches')
+        self.assertEqual(digest.html_body.count('Python Developer 0'), 1)
+
+    def test_rerun_after_a_failure_partway_sends_no_duplicates(self):
+        enqueue = outbox.enqueue
+        calls = []
+
+        def fail_on_second_batch(emails):
+            calls.append(emails)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return enqueue(emails)
+
+        with mock.patch('jobs.outbox.enqueue', side_effect=fail_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.send(batch_size=1)
+        # The first batch committed with its matches marked; the failed one rolled back
+        self.assertEqual(list(OutboundEmail.objects.values_list('to_email', flat=True)), [self.seekers[0].email])
+        self.assertEqual(JobAlertMatch.objects.filter(emailed_at__isnull=False).count(), len(self.jobs))
+
+        self.send(batch_size=1)
+        self.send(batch_size=1)
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('to_email', flat=True)),
+            [seeker.email for seeker in self.seekers],
+        )
+
+    def test_unreachable_smtp_server_does_not_affect_queueing(self):
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=unused_port(), EMAIL_USE_TLS=False, EMAIL_TIMEOUT=2,
+        ):
+            self.send()
+            # The first digest fails to connect and the rest wait with it
+            self.assertEqual(outbox.drain(), (0, 1, 0))
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count(), len(self.seekers))
+        self.assertEqual(OutboundEmail.objects.filter(attempts=0).count(), len(self.seekers) - 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class NotificationCounterTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.employer = User.objects.create_user('employer', 'employer@example.com', 'pw', user_type='employer')
+        self.seeker = User.objects.create_user('seeker', 'seeker@example.com', 'pw')
+        company = Company.objects.create(name='Acme', description='Widgets')
+        self.job = Job.objects.create(
+            title='Python Developer', company=company, employer=self.employer, description='Django',
+            requirements='Python', location='Nairobi', job_type='full_time',
+            application_deadline=timezone.now() + timedelta(days=30),
+        )
+
+    def notify(self, count, **related):
+        notifications.create([
+            Notification(user=self.seeker, notification_type='job_alert', title='New job', message='', **related)
+            for _ in range(count)
+        ])
+
+    def test_deleting_a_job_uncounts_its_notifications(self):
+        self.notify(2, related_job=self.job)
+        self.notify(1)
+        notifications.mark_read(self.seeker, Notification.objects.filter(related_job=self.job).first().id)
+        self.assertEqual(notifications.counts(self.seeker)['unread'], 2)
+
+        self.job.delete()
+        self.assertEqual(Notification.objects.count(), 1)
+        totals = notifications.counts(self.seeker)
+        self.assertEqual((totals['total'], totals['unread']), (1, 1))
+        self.assertEqual(notifications.reconcile(), 0)
+
+    def test_deleting_an_application_uncounts_its_notifications(self):
+        application = Application.objects.create(job=self.job, applicant=self.seeker, resume='resumes/cv.pdf')
+        self.notify(1, related_application=application)
+        application.delete()
+        self.assertEqual(notifications.unread_count(self.seeker), 0)
+        self.assertEqual(notifications.reconcile(), 0)
+
+    def test_counters_never_go_negative(self):
+        self.notify(1)
+        NotificationCounter.objects.update(total=0, unread=0)  # drifted low
+        Notification.objects.get().delete()
+        totals = notifications.counts(self.seeker)
+        self.assertEqual((totals['total'], totals['unread']), (0, 0))
+
+    def test_prune_uncounts_each_deleted_notification_once(self):
+        self.notify(3)
+        Notification.objects.update(is_read=True, created_at=timezone.now() - timedelta(days=100))
+        notifications.reconcile()
+        self.assertEqual(notifications.prune(days=90, batch_size=2), 3)
+        self.assertEqual(notifications.counts(self.seeker)['total'], 0)
+        self.assertEqual(notifications.reconcile(), 0)
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        # Pairs of companies share a created_at, so pages must break ties on id
+        start = timezone.now()
+        for n in range(7):
+            company = Company.objects.create(name=f'Company {n}', description='')
+            Company.objects.filter(pk=company.pk).update(created_at=start - timedelta(minutes=n // 2))
+        self.expected = list(Company.objects.order_by('-created_at', '-id'))
+
+    def paginator(self):
+        return CursorPaginator(Company.objects.all(), 3)
+
+    def test_pages_forward_and_back_through_ties(self):
+        paginator = self.paginator()
+        pages = [paginator.page()]
+        while pages[-1].has_next:
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([company for page in pages for company in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_next and back.has_previous)
+        first = paginator.page(back.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous)
+
+    def test_malformed_cursors_are_rejected(self):
+        paginator = self.paginator()
+        created_at = self.expected[0].created_at.isoformat()
+        for token in (
+            'not base64 !',
+            encode_cursor([1, 2]),
+            encode_cursor({'k': 'abc'}),
+            encode_cursor({'k': [created_at]}),
+            encode_cursor({'k': [1, 2]}),
+            encode_cursor({'k': [created_at, [1, 2]]}),
+            encode_cursor({'k': ['yesterday', 1]}),
+            encode_cursor({'k': [None, 1]}),
+        ):
+            with self.subTest(token=token):
+                with self.assertRaises(InvalidCursor):
+                    paginator.page(token)
+                self.assertEqual(list(paginator.get_page(token)), self.expected[:3])
+
+
+class AutocompleteTests(TestCase):
+    def test_short_prefix_ranks_the_whole_run(self):
+        index = PrefixIndex()
+        for n in range(SCAN_LIMIT * 2):
+            index.add(f'developer {n:04}')
+        # Sorts after every other key under "d", so a capped scan never reaches it
+        for _ in range(3):
+            index.add('dz popular')
+        self.assertEqual(index.search('d', 2)[0], ('dz popular', 3))
+        self.assertEqual(index.search('dz', 2), [('dz popular', 3)])
+
+        for _ in range(5):
+            index.add('dy busier')
+        self.assertEqual(index.search('d', 2), [('dy busier', 5), ('dz popular', 3)])
+        for _ in range(5):
+            index.remove('dy busier')
+        self.assertEqual(index.search('d', 1), [('dz popular', 3)])
+        # Later words are indexed too
+        index.add('senior dx')
+        self.assertIn(('senior dx', 1), index.search('dx', 5))
+
+    def test_concurrent_requests_build_once(self):
+        completer = Autocomplete()
+        builds = []
+
+        def slow_rebuild():
+            builds.append(1)
+            time.sleep(0.05)
+            completer.built_at = time.monotonic()
+
+        with mock.patch.object(completer, 'rebuild', side_effect=slow_rebuild):
+            threads = [threading.Thread(target=completer.ensure_built) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(builds), 1)
+
+            # A stale index keeps serving while one request rebuilds it
+            completer.built_at -= 3600
+            completer.build_lock.acquire()
+            try:
+                completer.ensure_built()
+            finally:
+                completer.build_lock.release()
+            self.assertEqual(len(builds), 1)
+            completer.ensure_built()
+            self.assertEqual(len(builds), 2)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CounterTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.employer = User.objects.create_user('employer', 'employer@example.com', 'pw', user_type='employer')
+        self.seekers = [User.objects.create_user(f'seeker{n}', f'seeker{n}@example.com', 'pw') for n in range(3)]
+        self.company = Company.objects.create(name='Acme', description='Widgets')
+        self.job = Job.objects.create(
+            title='Python Developer', company=self.company, employer=self.employer, description='Django',
+            requirements='Python', location='Nairobi', job_type='full_time',
+            application_deadline=timezone.now() + timedelta(days=30),
+        )
+
+    def apply(self, seeker):
+        return Application.objects.create(job=self.job, applicant=seeker, resume='applications/resumes/cv.pdf')
+
+    def status_counts(self):
+        return dict(ApplicationStatusCount.objects.filter(job=self.job, count__gt=0).values_list('status', 'count'))
+
+    def test_counters_follow_applications(self):
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.job_count, 1)
+
+        applications = [self.apply(seeker) for seeker in self.seekers]
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.application_count, 3)
+        self.assertEqual(self.status_counts(), {'submitted': 3})
+
+        applications[0].status = 'shortlisted'
+        applications[0].save()
+        self.assertEqual(self.status_counts(), {'submitted': 2, 'shortlisted': 1})
+
+        applications[1].delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.application_count, 2)
+        self.assertEqual(self.status_counts(), {'submitted': 1, 'shortlisted': 1})
+        self.assertEqual(counters.reconcile(), {'application_count': 0, 'job_count': 0, 'status_counts': 0})
+
+    def test_reconcile_repairs_drift(self):
+        for seeker in self.seekers:
+            self.apply(seeker)
+        # Bypasses the signals
+        Application.objects.filter(applicant=self.seekers[0]).update(status='rejected')
+        Job.objects.filter(pk=self.job.pk).update(application_count=7)
+        self.assertEqual(counters.reconcile(), {'application_count': 1, 'job_count': 0, 'status_counts': 2})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.application_count, 3)
+        self.assertEqual(self.status_counts(), {'submitted': 2, 'rejected': 1})
+
+    def test_decrements_stop_at_zero(self):
+        application = self.apply(self.seekers[0])
+        Job.objects.filter(pk=self.job.pk).update(application_count=0)
+        application.delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.application_count, 0)
+
+    def test_dashboard_reads_the_counters(self):
+        cache.clear()  # cached identities of rolled-back users with the same ids
+        self.apply(self.seekers[0])
+        self.apply(self.seekers[1]).delete()
+        self.client.force_login(self.employer)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_applications'], 1)
+        self.assertEqual(list(response.context['applicant_stats']), [{'status': 'submitted', 'count': 1}])
+        self.assertFalse([query for query in queries if 'FROM "jobs_application"' in query['sql']])
+
+
+class ResumeTextClaimTests(TestCase):
+    def setUp(self):
+        self.rows = [resume_text.queue(f'blobs/aa/bb/{n}.pdf') for n in range(3)]
+
+    def test_claimed_rows_are_leased_to_one_run(self):
+        first = resume_text.claim(2, lease_seconds=60)
+        self.assertEqual([row.pk for row in first], [row.pk for row in self.rows[:2]])
+        self.assertEqual({row.attempts for row in first}, {1})
+        self.assertEqual(len({row.claimed_by for row in first}), 1)
+        # Another run only gets what is left
+        second = resume_text.claim(10, lease_seconds=60)
+        self.assertEqual([row.pk for row in second], [self.rows[2].pk])
+        self.assertEqual(resume_text.claim(10, lease_seconds=60), [])
+
+    def test_rows_of_a_dead_run_are_claimed_again_after_the_lease(self):
+        first = resume_text.claim(10, lease_seconds=60)
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch('jobs.resume_text.timezone.now', return_value=later):
+            again = resume_text.claim(10, lease_seconds=60)
+        self.assertEqual([row.pk for row in again], [row.pk for row in first])
+        self.assertNotEqual(again[0].claimed_by, first[0].claimed_by)
+        self.assertEqual({row.attempts for row in again}, {2})
+
+    def test_record_releases_the_claim(self):
+        done, retried, _ = resume_text.claim(10, lease_seconds=60)
+        with mock.patch('jobs.search.get_search_backend'):
+            self.assertTrue(resume_text.record(done, 'Python developer', ''))
+        self.assertFalse(resume_text.record(retried, None, 'MemoryError: out of memory'))
+
+        done.refresh_from_db()
+        self.assertEqual((done.status, done.claimed_by, done.claimed_until), (ResumeText.DONE, '', None))
+        # The failed file is pending and can be claimed again straight away
+        retried.refresh_from_db()
+        self.assertEqual((retried.status, retried.claimed_by), (ResumeText.PENDING, ''))
+        self.assertEqual([row.pk for row in resume_text.claim(10, lease_seconds=60)], [retried.pk])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AlertMatchingTests(TestCase):
+    def setUp(self):
+        cache.clear()  # cached identities of rolled-back users with the same ids
+        User = get_user_model()
+        self.employer = User.objects.create_user('employer', 'employer@example.com', 'pw', user_type='employer')
+        EmployerProfile.objects.create(user=self.employer, company_name='Acme')
+        self.company = Company.objects.create(name='Acme', description='Widgets')
+        self.seekers = [User.objects.create_user(f'seeker{n}', f'seeker{n}@example.com', 'pw') for n in range(2)]
+        for seeker in self.seekers:
+            SavedSearch.objects.create(user=seeker, name='Python', filters={'query': 'python'}, filters_key='python')
+
+    def post_job(self, title='Python Developer'):
+        self.client.force_login(self.employer)
+        response = self.client.post(reverse('create_job'), {
+            'title': title, 'company': self.company.pk, 'description': 'Django', 'requirements': 'Python',
+            'location': 'Nairobi', 'job_type': 'full_time', 'experience_level': 'mid',
+            'application_deadline': (timezone.localtime() + timedelta(days=30)).strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertEqual(response.status_code, 302)
+        return Job.objects.get(title=title)
+
+    def test_posting_a_job_only_queues_it(self):
+        job = self.post_job()
+        self.assertTrue(PendingJobAlert.objects.filter(job=job).exists())
+        self.assertFalse(JobAlertMatch.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_send_job_alerts_matches_queued_jobs_first(self):
+        job = self.post_job()
+        call_command('send_job_alerts', stdout=StringIO())
+        self.assertFalse(PendingJobAlert.objects.exists())
+        self.assertEqual(JobAlertMatch.objects.filter(job=job).count(), len(self.seekers))
+        self.assertEqual(Notification.objects.filter(related_job=job, notification_type='job_alert').count(), 2)
+        self.assertEqual(OutboundEmail.objects.count(), len(self.seekers))
+
+    def test_match_only_notifies_without_queueing_digests(self):
+        self.post_job()
+        call_command('send_job_alerts', match_only=True, stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), len(self.seekers))
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertFalse(JobAlertMatch.objects.filter(emailed_at__isnull=False).exists())
+
+    def test_failed_match_is_retried_without_duplicates(self):
+        first = self.post_job('Python Developer')
+        second = self.post_job('Python Engineer')
+        notify_matches = alerts.notify_matches
+
+        def fail_on_second_job(job):
+            if job == second:
+                raise RuntimeError('database went away')
+            return notify_matches(job)
+
+        with mock.patch('jobs.alerts.notify_matches', side_effect=fail_on_second_job):
+            with self.assertRaises(RuntimeError):
+                alerts.match_pending()
+        # The first job's notifications committed with its dequeue; the second is still queued
+        self.assertEqual(list(PendingJobAlert.objects.values_list('job', flat=True)), [second.pk])
+        self.assertEqual(alerts.match_pending(), (1, 2))
+        self.assertEqual(alerts.match_pending(), (0, 0))
+        for job in (first, second):
+            self.assertEqual(Notification.objects.filter(related_job=job).count(), len(self.seekers))
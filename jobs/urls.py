@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.job_list, name='job_list'),
+    path('autocomplete/', views.job_autocomplete, name='job_autocomplete'),
     path('<int:job_id>/', views.job_detail, name='job_detail'),
     path('<int:job_id>/apply/', views.apply_job, name='apply_job'),
     path('<int:job_id>/save/', views.save_job, name='save_job'),
@@ -12,14 +13,23 @@ urlpatterns = [
     path('<int:job_id>/toggle-status/', views.toggle_job_status, name='toggle_job_status'),
     path('my-applications/', views.my_applications, name='my_applications'),
     path('saved-jobs/', views.saved_jobs, name='saved_jobs'),
+    path('saved-searches/', views.saved_searches, name='saved_searches'),
+    path('saved-searches/save/', views.save_search, name='save_search'),
+    path('saved-searches/<int:search_id>/delete/', views.delete_saved_search, name='delete_saved_search'),
+    path('saved-searches/<int:search_id>/toggle-alerts/', views.toggle_search_alerts, name='toggle_search_alerts'),
     path('employer/dashboard/', views.employer_dashboard, name='employer_dashboard'),
+    path('employer/analytics/', views.employer_analytics, name='employer_analytics'),
     path('companies/manage/', views.manage_companies, name='manage_companies'),# Add this line
 
 #adding applicant_notification urls
 path('job/<int:job_id>/applicants/', views.view_applicants, name='view_applicants'),
+    path('job/<int:job_id>/applicants/bulk-status/', views.bulk_update_application_status, name='bulk_update_application_status'),
     path('application/<int:application_id>/', views.application_detail, name='application_detail'),
     path('application/<int:application_id>/update-status/', views.update_application_status, name='update_application_status'),
     path('employer/notifications/', views.employer_notifications, name='employer_notifications'),
+    path('notifications/', views.notifications, name='notifications'),
+    path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
     path('notification/<int:notification_id>/mark-read/', views.mark_notification_read, name='mark_notification_read'),
 
 ]
\ No newline at end of file
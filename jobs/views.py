@@ -4,57 +4,147 @@ from django.shortcuts import render
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Substr
+from collections import Counter
 from django.utils import timezone
 from django.conf import settings
-from .models import Job, Application, Company, SavedJob
+from .models import Job, Application, ApplicationDailyRollup, ApplicationStatusCount, Company, SavedJob, SavedSearch
 from .forms import JobForm, ApplicationForm, CompanyForm, JobSearchForm
+from .search import get_search_backend
+from .pagination import CursorPaginator
+from .facets import grouped_rows, facet_counts
+from . import alerts, counters, outbox, rollups, salary, search_cache
+from . import notifications as notification_service
+from .geo import within_radius, haversine_km
+from .autocomplete import autocomplete
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import connection as db_connection
+from asgiref.sync import sync_to_async
+from .broker import get_broker
+import asyncio
+import json
+from django.utils.http import url_has_allowed_host_and_scheme
+from common.replicas import read_from_replica
 
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from .models import Notification
 
 # All your view functions remain the same, they'll automatically use the custom user model
 
+# Notification stream: client reconnect delay and most missed notifications replayed on reconnect
+NOTIFICATION_STREAM_RETRY_MS = 5000
+NOTIFICATION_STREAM_BACKLOG = 50
+
+# Columns view_applicants renders
+APPLICANT_LIST_FIELDS = (
+    'id', 'job_id', 'status', 'applied_date',
+    'applicant__id', 'applicant__username', 'applicant__first_name', 'applicant__last_name',
+    'applicant__email', 'applicant__phone_number', 'applicant__jobseekerprofile__resume',
+)
+
+@read_from_replica
 def job_list(request):
-    jobs = Job.objects.filter(is_active=True, application_deadline__gt=timezone.now())
+    listable = Job.objects.filter(is_active=True, application_deadline__gt=timezone.now())
+    jobs = listable
     
     # Search and filtering
     form = JobSearchForm(request.GET or None)
+    custom_order = False
+    sort = 'newest'
+    center = None
+    facet_jobs = jobs
     if form.is_valid():
         query = form.cleaned_data.get('query')
         location = form.cleaned_data.get('location')
         job_type = form.cleaned_data.get('job_type')
         experience_level = form.cleaned_data.get('experience_level')
+        sort = form.cleaned_data.get('sort')
+        radius_km = form.cleaned_data.get('radius_km')
+        center = form.cleaned_data.get('center')
+        min_salary = form.cleaned_data.get('min_salary')
+        max_salary = form.cleaned_data.get('max_salary')
         
         if query:
-            jobs = jobs.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(company__name__icontains=query) |
-                Q(requirements__icontains=query)
-            )
-        if location:
+            backend = get_search_backend(jobs.db)
+            if sort == 'relevance':
+                jobs = backend.rank(jobs, query)
+                custom_order = True
+            else:
+                jobs = backend.filter(jobs, query)
+        if center:
+            # A radius search replaces the plain text match on location
+            jobs = within_radius(jobs, center[0], center[1], radius_km)
+            if sort == 'distance':
+                jobs = jobs.order_by('distance_km', '-id')
+                custom_order = True
+        elif location:
             jobs = jobs.filter(location__icontains=location)
+        if min_salary is not None:
+            jobs = jobs.filter(salary__gte=min_salary)
+        if max_salary is not None:
+            jobs = jobs.filter(salary__lte=max_salary)
+        facet_jobs = jobs
         if job_type:
             jobs = jobs.filter(job_type=job_type)
         if experience_level:
             jobs = jobs.filter(experience_level=experience_level)
     
-    # Pagination
-    paginator = Paginator(jobs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Everything below is served from the versioned search cache when possible:
+    # facet rows per keywords/location, the total per filter set, and the ids
+    # of each page per filter set, sort and cursor.
+    timeout = settings.JOB_SEARCH_CACHE_TIMEOUT
+    filters = form.get_filters()
+    facet_rows = search_cache.get_or_set(
+        'facets', form.get_cache_key(exclude=('job_type', 'experience_level')),
+        lambda: grouped_rows(facet_jobs), timeout,
+    )
+    facets = facet_counts(
+        facet_rows,
+        {'job_type': filters.get('job_type'), 'experience_level': filters.get('experience_level')},
+    )
+    form.set_facet_counts(facets)
+    
+    # Pagination: keyset on (created_at, id) for newest-first, offset cursors
+    # for relevance and distance, which order the queryset themselves.
+    paginator = CursorPaginator(
+        jobs.select_related('company'), 10,
+        ordering=None if custom_order else ('-created_at', '-id'),
+        count_key=form.get_cache_key(),
+        count_timeout=timeout,
+        count_cache=lambda key, default, timeout: search_cache.get_or_set('count', key, default, timeout),
+    )
+    page_obj, cache_hit = search_cache.get_page(
+        paginator, '%s:%s' % (form.get_cache_key(), sort), request.GET.get('cursor'),
+        objects=listable.select_related('company'), timeout=timeout,
+    )
+    if center:
+        for job in page_obj:
+            if job.latitude is not None and getattr(job, 'distance_km', None) is None:
+                job.distance_km = haversine_km(center[0], center[1], job.latitude, job.longitude)
+    
+    salary_histogram = salary.histogram(filters.get('job_type'), filters.get('experience_level'))
     
     context = {
         'page_obj': page_obj,
         'form': form,
+        'location_facets': facets['location'].most_common(),
+        'salary_histogram': salary_histogram,
+        'salary_histogram_max': max((count for lower, upper, count in salary_histogram), default=0),
         'search_query': request.GET.get('query', ''),
     }
-    return render(request, 'jobs/job_list.html', context)
+    response = render(request, 'jobs/job_list.html', context)
+    response['X-Search-Cache'] = 'hit' if cache_hit else 'miss'
+    return response
 
+def job_autocomplete(request):
+    """Typeahead suggestions for the search form's keyword and location fields"""
+    prefix = request.GET.get('q', '')[:100]
+    kinds = ('location',) if request.GET.get('field') == 'location' else ('title', 'company')
+    return JsonResponse({'suggestions': autocomplete.suggest(prefix, kinds)})
+
+@read_from_replica
 def job_detail(request, job_id):
     job = get_object_or_404(Job, id=job_id, is_active=True)
     has_applied = False
@@ -96,7 +186,9 @@ def apply_job(request, job_id):
             application = form.save(commit=False)
             application.job = job
             application.applicant = request.user
-            application.save()
+            # Save and counter updates (jobs/signals.py) commit together
+            with transaction.atomic():
+                application.save()
             messages.success(request, 'Your application has been submitted successfully!')
             return redirect('job_detail', job_id=job_id)
     else:
@@ -134,6 +226,8 @@ def create_job(request):
             job = form.save(commit=False)
             job.employer = request.user
             job.save()
+            # Matched against saved searches by send_job_alerts, off the request
+            alerts.queue(job)
             messages.success(request, 'Job posted successfully!')
             return redirect('employer_dashboard')
     else:
@@ -185,16 +279,58 @@ def employer_dashboard(request):
         return redirect('home')
     
     jobs = Job.objects.filter(employer=request.user).order_by('-created_at')
-    total_applications = Application.objects.filter(job__employer=request.user).count()
+    # Application totals come from the denormalized counters, not a COUNT per job
+    total_applications = jobs.aggregate(total=Sum('application_count'))['total'] or 0
     active_jobs = jobs.filter(is_active=True, application_deadline__gt=timezone.now()).count()
+    applicant_stats = (
+        ApplicationStatusCount.objects.filter(job__employer=request.user, count__gt=0)
+        .values('status').annotate(count=Sum('count')).order_by('status')
+    )
     
     context = {
         'jobs': jobs,
+        'recent_jobs': jobs,
         'total_applications': total_applications,
         'active_jobs': active_jobs,
+        'applicant_stats': applicant_stats,
+        'unread_count': notification_service.unread_count(request.user),
     }
     return render(request, 'jobs/employer_dashboard.html', context)
 
+@login_required
+def employer_analytics(request):
+    """Applications per day and status conversion, read from the daily rollups only"""
+    if request.user.user_type != 'employer':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    
+    jobs = Job.objects.filter(employer=request.user).order_by('-created_at').only('id', 'title')
+    daily = ApplicationDailyRollup.objects.filter(job__employer=request.user)
+    selected_job = None
+    if request.GET.get('job', '').isdigit():
+        selected_job = get_object_or_404(jobs, id=request.GET['job'])
+        daily = daily.filter(job=selected_job)
+    
+    days = 30
+    per_day = rollups.applications_per_day(daily, days)
+    totals = rollups.status_totals(daily)
+    total_applications = sum(totals.values())
+    status_breakdown = [
+        (label, totals.get(status, 0), round(100 * totals.get(status, 0) / total_applications) if total_applications else 0)
+        for status, label in Application.STATUS_CHOICES
+    ]
+    
+    context = {
+        'jobs': jobs,
+        'selected_job': selected_job,
+        'days': days,
+        'per_day': per_day,
+        'per_day_max': max((count for day, count in per_day), default=0),
+        'status_breakdown': status_breakdown,
+        'total_applications': total_applications,
+    }
+    return render(request, 'jobs/employer_analytics.html', context)
+
 @login_required
 def my_applications(request):
     if request.user.user_type != 'job_seeker':
@@ -202,9 +338,10 @@ def my_applications(request):
         return redirect('home')
     
     applications = Application.objects.filter(applicant=request.user).select_related('job', 'job__company')
+    paginator = CursorPaginator(applications, 10, ordering=('-applied_date', '-id'))
     
     context = {
-        'applications': applications,
+        'applications': paginator.get_page(request.GET.get('cursor')),
     }
     return render(request, 'jobs/my_application.html', context)
 
@@ -239,12 +376,67 @@ def saved_jobs(request):
         return redirect('home')
     
     saved_jobs = SavedJob.objects.filter(user=request.user).select_related('job', 'job__company')
+    paginator = CursorPaginator(saved_jobs, 10, ordering=('-saved_date', '-id'))
     
     context = {
-        'saved_jobs': saved_jobs,
+        'saved_jobs': paginator.get_page(request.GET.get('cursor')),
     }
     return render(request, 'jobs/saved_jobs.html', context)
 
+@login_required
+def save_search(request):
+    """Save the job_list filters in the query string as an alert"""
+    if request.method != 'POST' or request.user.user_type != 'job_seeker':
+        messages.error(request, 'Only job seekers can save searches.')
+        return redirect('job_list')
+
+    form = JobSearchForm(request.GET)
+    filters = form.get_filters()
+    if not filters:
+        messages.error(request, 'Add some search criteria before saving a search.')
+        return redirect('job_list')
+
+    saved_search, created = SavedSearch.objects.get_or_create(
+        user=request.user,
+        filters_key=form.get_cache_key(),
+        defaults={
+            'name': request.POST.get('name', '').strip()[:100] or form.describe(),
+            'filters': filters,
+        },
+    )
+    if created:
+        messages.success(request, "Search saved! We'll let you know when matching jobs are posted.")
+    else:
+        messages.info(request, 'You have already saved this search.')
+    return redirect('saved_searches')
+
+@login_required
+def saved_searches(request):
+    if request.user.user_type != 'job_seeker':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+
+    context = {
+        'saved_searches': SavedSearch.objects.filter(user=request.user),
+    }
+    return render(request, 'jobs/saved_searches.html', context)
+
+@login_required
+def delete_saved_search(request, search_id):
+    saved_search = get_object_or_404(SavedSearch, id=search_id, user=request.user)
+    if request.method == 'POST':
+        saved_search.delete()
+        messages.success(request, 'Saved search removed.')
+    return redirect('saved_searches')
+
+@login_required
+def toggle_search_alerts(request, search_id):
+    saved_search = get_object_or_404(SavedSearch, id=search_id, user=request.user)
+    if request.method == 'POST':
+        saved_search.email_alerts = not saved_search.email_alerts
+        saved_search.save(update_fields=['email_alerts'])
+    return redirect('saved_searches')
+
 @login_required
 def manage_companies(request):
     if request.user.user_type != 'employer':
@@ -287,8 +479,14 @@ def view_applicants(request, job_id):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    job = get_object_or_404(Job, id=job_id, employer=request.user)
-    applications = Application.objects.filter(job=job).select_related('applicant', 'applicant__jobseekerprofile')
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id, employer=request.user)
+    # Only the columns the list shows; the cover letter is cut down in SQL
+    applications = (
+        Application.objects.filter(job=job)
+        .select_related('applicant', 'applicant__jobseekerprofile')
+        .only(*APPLICANT_LIST_FIELDS)
+        .annotate(cover_letter_preview=Substr('cover_letter', 1, 300))
+    )
     
     # Status filter
     status_filter = request.GET.get('status', '')
@@ -298,20 +496,95 @@ def view_applicants(request, job_id):
     # Search
     search_query = request.GET.get('search', '')
     if search_query:
-        applications = applications.filter(
-            Q(applicant__username__icontains=search_query) |
-            Q(applicant__email__icontains=search_query) |
-            Q(cover_letter__icontains=search_query)
-        )
+        # Names, email, cover letter and extracted resume text (see jobs/resume_text.py)
+        applications = get_search_backend().filter_applications(applications, search_query)
+    
+    # Without a search the total is already counted (see jobs/counters.py)
+    count = None
+    if not search_query:
+        if status_filter:
+            count = job.status_counts.filter(status=status_filter).values_list('count', flat=True).first() or 0
+        else:
+            count = job.application_count
+    paginator = CursorPaginator(applications, 20, ordering=('-applied_date', '-id'), count=count)
     
     context = {
         'job': job,
-        'applications': applications,
+        'applications': paginator.get_page(request.GET.get('cursor')),
         'status_filter': status_filter,
         'search_query': search_query,
+        'application_status_choices': Application.STATUS_CHOICES,
+        'unread_count': notification_service.unread_count(request.user),
     }
     return render(request, 'jobs/view_applicants.html', context)
 
+@login_required
+def bulk_update_application_status(request, job_id):
+    """Set one status on every selected application of a job"""
+    if request.user.user_type != 'employer':
+        messages.error(request, 'Access denied.')
+        return redirect('home')
+    
+    job = get_object_or_404(Job.objects.select_related('company'), id=job_id, employer=request.user)
+    if request.method != 'POST':
+        return redirect('view_applicants', job_id=job.id)
+    
+    new_status = request.POST.get('status')
+    ids = [value for value in request.POST.getlist('application_ids') if value.isdigit()]
+    if new_status not in dict(Application.STATUS_CHOICES) or not ids:
+        messages.error(request, 'Select some applicants and a status.')
+        return redirect('view_applicants', job_id=job.id)
+    notify_applicant = request.POST.get('notify_applicant') == 'on'
+    
+    selected = Application.objects.filter(job=job, id__in=ids).exclude(status=new_status)
+    with transaction.atomic():
+        changed = list(
+            selected.select_for_update().select_related('applicant').only(
+                'id', 'status', 'applicant__username', 'applicant__email',
+                'applicant__first_name', 'applicant__last_name',
+            )
+        )
+        if not changed:
+            messages.info(request, 'The selected applications already have that status.')
+            return redirect('view_applicants', job_id=job.id)
+        now = timezone.now()
+        # One UPDATE; last_status_update is auto_now, which update() skips, so set it for the rollups
+        updates = {'status': new_status, 'last_status_update': now}
+        if notify_applicant:
+            updates['notified_at'] = now
+        Application.objects.filter(id__in=[application.id for application in changed]).update(**updates)
+        counters.statuses_changed(job.id, Counter(application.status for application in changed), new_status)
+        
+        status_label = dict(Application.STATUS_CHOICES)[new_status]
+        notifications = [Notification(
+            user=request.user,
+            notification_type='application_status',
+            title='Application Statuses Updated',
+            message=f'You marked {len(changed)} application{"s" if len(changed) != 1 else ""} for {job.title} as {status_label}.',
+        )]
+        if notify_applicant:
+            notifications += [
+                Notification(
+                    user_id=application.applicant_id,
+                    notification_type='application_status',
+                    title=f'Application Status Update - {job.title}',
+                    message=f'Your application status has been updated to {new_status}.',
+                    related_application_id=application.id,
+                )
+                for application in changed
+            ]
+        notification_service.create(notifications)
+        
+        if notify_applicant:
+            emails = []
+            for application in changed:
+                old_status, application.status, application.job = application.status, new_status, job
+                emails.append(outbox.application_status_email(application, old_status, new_status))
+            outbox.enqueue(emails)
+    
+    messages.success(request, f'{len(changed)} application{"s" if len(changed) != 1 else ""} marked as {status_label}.')
+    return redirect('view_applicants', job_id=job.id)
+
 @login_required
 def update_application_status(request, application_id):
     """Update application status and notify applicant"""
@@ -330,31 +603,36 @@ def update_application_status(request, application_id):
             old_status = application.status
             application.status = new_status
             application.employer_notes = employer_notes
-            application.save()
-            
-            # Create notification for employer
-            Notification.objects.create(
-                user=request.user,
-                notification_type='application_status',
-                title=f'Application Status Updated',
-                message=f'You updated {application.applicant.username}\'s application status from {old_status} to {new_status} for {application.job.title}.',
-                related_application=application
-            )
-            
-            # Notify applicant if requested
-            if notify_applicant:
-                send_application_status_email(application, old_status, new_status)
-                application.mark_as_notified()
+            # The email is queued with the change, so it goes out only if the change commits
+            with transaction.atomic():
+                if notify_applicant:
+                    application.notified_at = timezone.now()
+                application.save()
                 
-                # Create notification for applicant
-                Notification.objects.create(
-                    user=application.applicant,
+                # Create notification for employer
+                notifications = [Notification(
+                    user=request.user,
                     notification_type='application_status',
-                    title=f'Application Status Update - {application.job.title}',
-                    message=f'Your application status has been updated to {new_status}.',
+                    title=f'Application Status Updated',
+                    message=f'You updated {application.applicant.username}\'s application status from {old_status} to {new_status} for {application.job.title}.',
                     related_application=application
-                )
+                )]
                 
+                # Notify applicant if requested
+                if notify_applicant:
+                    outbox.enqueue([outbox.application_status_email(application, old_status, new_status)])
+                    
+                    # Create notification for applicant
+                    notifications.append(Notification(
+                        user=application.applicant,
+                        notification_type='application_status',
+                        title=f'Application Status Update - {application.job.title}',
+                        message=f'Your application status has been updated to {new_status}.',
+                        related_application=application
+                    ))
+                notification_service.create(notifications)
+            
+            if notify_applicant:
                 messages.success(request, f'Application status updated and applicant notified!')
             else:
                 messages.success(request, f'Application status updated!')
@@ -363,36 +641,6 @@ def update_application_status(request, application_id):
     
     return redirect('view_applicants', job_id=application.job.id)
 
-def send_application_status_email(application, old_status, new_status):
-    """Send email notification to applicant about status change"""
-    subject = f'Application Status Update - {application.job.title}'
-    
-    context = {
-        'applicant': application.applicant,
-        'job': application.job,
-        'old_status': old_status,
-        'new_status': new_status,
-        'application': application,
-        'company': application.job.company,
-    }
-    
-    html_message = render_to_string('emails/application_status_update.html', context)
-    plain_message = strip_tags(html_message)
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email='noreply@jobportal.com',
-            recipient_list=[application.applicant.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Email sending failed: {e}")
-        return False
-
 @login_required
 def application_detail(request, application_id):
     """View detailed application information"""
@@ -411,6 +659,11 @@ def application_detail(request, application_id):
     }
     return render(request, 'jobs/application_details.html', context)
 
+@login_required
+def notifications(request):
+    """Notification inbox for any user"""
+    return render_inbox(request, 'notifications')
+
 @login_required
 def employer_notifications(request):
     """View employer notifications"""
@@ -418,31 +671,103 @@ def employer_notifications(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_count = notifications.filter(is_read=False).count()
-    application_updates_count = notifications.filter(notification_type='application_status').count()
-    system_count = notifications.filter(notification_type='system').count()
-    
-    # Mark as read if specified
+    # Older links mark everything read with ?mark_read=all
     if request.GET.get('mark_read') == 'all':
-        notifications.update(is_read=True)
+        notification_service.mark_all_read(request.user)
         messages.success(request, 'All notifications marked as read!')
         return redirect('employer_notifications')
     
+    return render_inbox(request, 'employer_notifications')
+
+def render_inbox(request, url_name):
+    """One keyset page of the user's notifications, with the header figures from their counters"""
+    totals = notification_service.counts(request.user)
+    notification_type = request.GET.get('type', '')
+    if notification_type not in dict(Notification.NOTIFICATION_TYPES):
+        notification_type = ''
+    by_type = totals['by_type']
+    
     context = {
-        'notifications': notifications,
-        'unread_count': unread_count,
-        'application_updates_count': application_updates_count,
-        'system_count': system_count,
+        'notifications': notification_service.inbox(
+            request.user, notification_type, request.GET.get('cursor'), totals=totals,
+        ),
+        'notification_type': notification_type,
+        'notification_types': Notification.NOTIFICATION_TYPES,
+        'inbox_url_name': url_name,
+        'total_count': totals['total'],
+        'unread_count': totals['unread'],
+        'application_updates_count': by_type.get('application_status', {}).get('total', 0),
+        'system_count': by_type.get('system', {}).get('total', 0),
     }
     return render(request, 'jobs/employer_notifications.html', context)
 
+def _stream_backlog(user, last_event_id):
+    """Notifications created since the client's last event, for a reconnecting stream"""
+    try:
+        if not last_event_id.isdigit():
+            return []
+        return list(
+            Notification.objects.filter(user=user, id__gt=int(last_event_id)).order_by('id')[:NOTIFICATION_STREAM_BACKLOG]
+        )
+    finally:
+        # Streams stay open for minutes; don't hold a database connection for that long
+        db_connection.close()
+
+def _sse(event, event_type='notification'):
+    return f'id: {event["id"]}\nevent: {event_type}\ndata: {json.dumps(event)}\n\n'
+
+@login_required
+async def notification_stream(request):
+    """Server-Sent Events stream of the user's new notifications"""
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the endless response would hold a worker; 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    user = await request.auser()
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 25)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    
+    async def events():
+        yield f'retry: {NOTIFICATION_STREAM_RETRY_MS}\n\n'
+        # Subscribe before reading the backlog so nothing committed in between is missed
+        async with get_broker().subscribe(user.pk) as queue:
+            sent = 0
+            for notification in await sync_to_async(_stream_backlog)(user, last_event_id):
+                sent = notification.id
+                yield _sse(notification_service.as_event(notification))
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                if event['id'] > sent:
+                    yield _sse(event)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def mark_all_notifications_read(request):
+    """Mark all (or one type of) the user's notifications as read"""
+    if request.method == 'POST':
+        notification_type = request.POST.get('type', '')
+        if notification_type not in dict(Notification.NOTIFICATION_TYPES):
+            notification_type = None
+        notification_service.mark_all_read(request.user, notification_type)
+        messages.success(request, 'All notifications marked as read!')
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('notifications')
+
 @login_required
 def mark_notification_read(request, notification_id):
     """Mark a notification as read"""
-    notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    notification.is_read = True
-    notification.save()
+    get_object_or_404(Notification, id=notification_id, user=request.user)
+    notification_service.mark_read(request.user, notification_id)
     
     if request.headers.get('HTTP_REFERER'):
         return redirect(request.headers.get('HTTP_REFERER'))
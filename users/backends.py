@@ -0,0 +1,85 @@
+"""
+Cached user loading for authenticated requests.
+
+AuthenticationMiddleware resolves request.user through the backend's
+get_user() on every request, and pages then reach for the user's
+jobseekerprofile or employerprofile, each a query of its own.
+CachedModelBackend loads the user with both profiles in one query and keeps
+the result in USER_CACHE_ALIAS, so a warm request needs no queries for
+identity at all.
+
+Entries are keyed by user id and a per-user version token. Saving or
+deleting a user or either profile replaces the token once the transaction
+commits, so a request that read the old row just before the save can only
+refill the old, now unreachable, key. Updates that bypass signals
+(QuerySet.update) are picked up when the entry times out. A per-process
+cache only sees its own process's invalidations, so USER_CACHE_TIMEOUT is
+kept short unless the cache is shared.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+CACHE_TIMEOUT = 60
+PROFILE_RELATIONS = ('jobseekerprofile', 'employerprofile')
+
+
+def get_cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return 'users:auth:version:%s' % user_id
+
+
+def cache_key(user_id):
+    """The current key of a user's cache entry, starting a version if there is none"""
+    cache = get_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(user_id))
+    return 'users:auth:%s:%s' % (user_id, version)
+
+
+def invalidate(user_id):
+    get_cache().set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is served from the cache, profiles included"""
+
+    def get_user(self, user_id):
+        cache = get_cache()
+        key = cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            UserModel = get_user_model()
+            user = (
+                UserModel._default_manager.select_related(*PROFILE_RELATIONS)
+                .filter(pk=user_id).first()
+            )
+            if user is None:
+                return None
+            cache.set(key, user, getattr(settings, 'USER_CACHE_TIMEOUT', CACHE_TIMEOUT))
+        return user if self.user_can_authenticate(user) else None
+
+
+def invalidate_user(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    user_id = instance.pk if isinstance(instance, get_user_model()) else instance.user_id
+    transaction.on_commit(lambda: invalidate(user_id))
+
+
+def connect_signals():
+    from .models import EmployerProfile, JobSeekerProfile
+
+    for model in (get_user_model(), JobSeekerProfile, EmployerProfile):
+        post_save.connect(invalidate_user, sender=model, dispatch_uid='user_cache_save_%s' % model._meta.label)
+        post_delete.connect(invalidate_user, sender=model, dispatch_uid='user_cache_delete_%s' % model._meta.label)
@@ -1,3 +1,93 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .backends import CachedModelBackend
+from .models import EmployerProfile, JobSeekerProfile
+
+IDENTITY_TABLES = ('users_customuser', 'users_jobseekerprofile', 'users_employerprofile')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        # Users from rolled-back tests never commit their invalidation, and ids are reused
+        cache.clear()
+        User = get_user_model()
+        self.backend = CachedModelBackend()
+        self.seeker = User.objects.create_user('seeker', 'seeker@example.com', 'pw', first_name='Ann')
+        self.profile = JobSeekerProfile.objects.create(user=self.seeker, skills='Python')
+        self.employer = User.objects.create_user('employer', 'employer@example.com', 'pw', user_type='employer')
+        self.employer_profile = EmployerProfile.objects.create(user=self.employer, company_name='Acme')
+
+    def get_user(self, user, queries):
+        with self.assertNumQueries(queries):
+            return self.backend.get_user(user.pk)
+
+    def test_warm_lookup_runs_no_queries(self):
+        cold = self.get_user(self.seeker, 1)
+        warm = self.get_user(self.seeker, 0)
+        self.assertEqual(warm, self.seeker)
+        # The profile came with the user
+        with self.assertNumQueries(0):
+            self.assertEqual(warm.jobseekerprofile.skills, 'Python')
+        self.assertEqual(cold.jobseekerprofile, warm.jobseekerprofile)
+
+    def test_warm_request_runs_no_identity_queries(self):
+        self.client.force_login(self.seeker)
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.seeker)
+        self.assertFalse([
+            query['sql'] for query in queries
+            if any('FROM "%s"' % table in query['sql'] for table in IDENTITY_TABLES)
+        ])
+
+    def test_saves_invalidate_after_commit(self):
+        for saved, user, save in (
+            ('user', self.seeker, get_user_model().objects.get(pk=self.seeker.pk).save),
+            ('job seeker profile', self.seeker, self.profile.save),
+            ('employer profile', self.employer, self.employer_profile.save),
+        ):
+            with self.subTest(saved=saved):
+                self.backend.get_user(user.pk)
+                with self.captureOnCommitCallbacks(execute=True):
+                    save()
+                    # Still the old entry until the transaction commits
+                    self.get_user(user, 0)
+                self.get_user(user, 1)
+
+    def test_changes_are_seen_after_commit(self):
+        self.get_user(self.seeker, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.skills = 'Go'
+            self.profile.save()
+        self.assertEqual(self.get_user(self.seeker, 1).jobseekerprofile.skills, 'Go')
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.force_login(self.seeker)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            seeker = get_user_model().objects.get(pk=self.seeker.pk)
+            seeker.set_password('new password')
+            seeker.save()
+        # The session's auth hash no longer matches the freshly loaded user
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_deleted_user_is_not_served(self):
+        self.get_user(self.seeker, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.get(pk=self.seeker.pk).delete()
+        self.assertIsNone(self.backend.get_user(self.seeker.pk))
+
+    def test_inactive_user_is_refused(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.seeker.is_active = False
+            self.seeker.save()
+        self.assertIsNone(self.backend.get_user(self.seeker.pk))
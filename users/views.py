@@ -20,11 +20,14 @@ def register(request):
 
 @login_required
 def profile(request):
-    # Get or create profiles based on user type
+    # Get or create profiles based on user type; the auth backend has usually loaded it already
     if request.user.user_type == 'job_seeker':
-        profile_obj, created = JobSeekerProfile.objects.get_or_create(user=request.user)
+        profile_model, relation = JobSeekerProfile, 'jobseekerprofile'
     else:
-        profile_obj, created = EmployerProfile.objects.get_or_create(user=request.user)
+        profile_model, relation = EmployerProfile, 'employerprofile'
+    profile_obj = getattr(request.user, relation, None)
+    if profile_obj is None:
+        profile_obj, created = profile_model.objects.get_or_create(user=request.user)
 
     if request.method == 'POST':
         user_form = UserUpdateForm(request.POST, request.FILES, instance=request.user)